@@ -1,30 +1,44 @@
-import json
 import re
-import os
-from typing import Any, Text, Dict, List
+from abc import ABCMeta, abstractmethod
+from typing import Any, Text, Dict, List, Optional, Tuple
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
 from fuzzywuzzy import process, fuzz
 
-# Biến toàn cục lưu đường dẫn đến file nganh.json
-NGANH_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nganh.json")
+from .khoi_thi import KHOI_THI_REGISTRY, KHOI_XET_TUYEN_DATA, mask_of
+from .match_index import resolve_nganh
+from .render_cache import get_response_cache, render_xu_huong
+from .mon_hoc import extract_subject_scores
+from .normalize import clean_name, fold_diacritics, normalize_text
+from .score_analytics import get_score_analytics
+from .score_index import get_khoi_index, get_score_index
+from .search_index import get_search_index
+from .single_flight import ACTION_COALESCE, get_single_flight
+from .so_thich import get_interest_engine
+from .tenants import get_tenant_catalog, tenant_id
+from .worker_pool import BUSY_MESSAGE, TIMEOUT_MESSAGE, get_worker_pool
 
-def load_nganh_data():
+# Các cách hỏi về diễn biến điểm chuẩn qua các năm, so trên tin nhắn đã chuẩn hóa và bỏ dấu
+XU_HUONG_PATTERN = re.compile(r'xu huong|bien dong|tang hay giam|giam hay tang|thay doi (?:the|nhu) nao')
+
+def load_nganh_data(tracker: Optional[Tracker] = None):
     """
-    Hàm đọc dữ liệu từ file nganh.json
+    Hàm lấy danh sách ngành từ danh mục của trường đang được hỏi.
+
+    Danh mục chỉ đọc file nganh.json một lần và tự nạp lại khi file thay đổi,
+    nên hàm này không còn đọc file ở mỗi lượt hội thoại.
     
+    Args:
+        tracker (Tracker): Trạng thái hội thoại, dùng để biết trường (xem tenants)
+
     Returns:
-        list: Danh sách các ngành học
+        list: Danh sách các ngành học, rỗng nếu trường không có trong cấu hình
     """
-    try:
-        with open(NGANH_JSON_PATH, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except Exception as e:
-        print(f"Lỗi khi đọc file JSON: {e}")
-        return []
+    catalog = get_tenant_catalog(tracker)
+    return catalog.nganh_list if catalog is not None else []
 
-def find_similar_nganh(nganh_name, nganh_list, threshold=60):
+def find_similar_nganh(nganh_name, nganh_list, threshold=60, ma_nganh=None):
     """
     Tìm kiếm ngành gần đúng sử dụng fuzzywuzzy với cải tiến nhận dạng từ viết tắt
     
@@ -32,127 +46,88 @@ def find_similar_nganh(nganh_name, nganh_list, threshold=60):
         nganh_name (str): Tên ngành cần tìm
         nganh_list (list): Danh sách các ngành
         threshold (int): Ngưỡng điểm tương đồng (mặc định: 60)
+        ma_nganh (str): Mã ngành đã tìm ra ở lượt trước (slot ma_nganh), nếu có
         
     Returns:
         dict: Ngành học tương đồng nhất nếu điểm cao hơn ngưỡng, None nếu không tìm thấy
     """
-    if not nganh_name or not nganh_list:
+    # Lấy thẳng theo mã nếu ngành vẫn là ngành của lượt trước; nếu không thì chuẩn hóa,
+    # mở rộng viết tắt và tra trên chỉ mục, kết quả được ghi nhớ theo phiên bản danh mục
+    nganh, _ = resolve_nganh(nganh_name, nganh_list, threshold, ma_nganh)
+    return nganh
+
+def nganh_slots(nganh: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    """
+    Các slot ghi nhớ ngành vừa tìm ra: tên chuẩn để hiển thị và mã ngành để lượt sau tra thẳng
+
+    Args:
+        nganh (dict): Bản ghi ngành trong danh mục
+
+    Returns:
+        list: Các event SlotSet
+    """
+    return [SlotSet("ten_nganh", nganh["ten_nganh"]), SlotSet("ma_nganh", str(nganh["ma_nganh"]).strip())]
+
+def nganh_key(tracker: Tracker) -> Tuple:
+    """Khóa gộp lượt của các hành động chỉ phụ thuộc ngành đang hỏi (slot ten_nganh, ma_nganh)"""
+    # Giữ nguyên tên người dùng nhập vì câu trả lời khi không tìm thấy ngành nhắc lại tên đó
+    return tracker.get_slot("ten_nganh"), tracker.get_slot("ma_nganh")
+
+def _reusable(result) -> bool:
+    # Lượt bị từ chối hoặc quá hạn không được dùng lại cho các lượt đến sau
+    messages, _ = result
+    return not any(message.get("text") in (BUSY_MESSAGE, TIMEOUT_MESSAGE) for message in messages)
+
+class CatalogAction(Action, metaclass=ABCMeta):
+    """
+    Lớp cơ sở cho các hành động dùng danh mục ngành.
+
+    Phần xử lý đồng bộ `xu_ly` (so khớp tên ngành, tính toán gợi ý, tạo tin
+    nhắn) được chạy trong worker pool để không chặn event loop của action
+    server khi có nhiều cuộc hội thoại cùng lúc. `admission` là nhóm nhận việc
+    của hành động trong worker pool (xem worker_pool.ADMISSION_CLASSES).
+
+    Các lượt cùng trường, cùng hành động và cùng `coalesce_key` đến cùng lúc
+    (ví dụ nhiều người cùng hỏi điểm chuẩn một ngành ngay sau khi công bố)
+    chỉ được xử lý một lần, mỗi lượt nhận bản sao riêng của tin nhắn và event.
+    """
+    admission = "tra_cuu"
+
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        pool = get_worker_pool()
+        key = self.coalesce_key(tracker) if ACTION_COALESCE else None
+        if key is None:
+            return await pool.run(self.xu_ly, dispatcher, tracker, domain, self.name(), self.admission)
+
+        async def compute():
+            collected = CollectingDispatcher()
+            events = await pool.run(self.xu_ly, collected, tracker, domain, self.name(), self.admission)
+            return collected.messages, events
+
+        messages, events = await get_single_flight().run(
+            (tenant_id(tracker), self.name(), key), compute, _reusable, self.name())
+        dispatcher.messages.extend(messages)
+        return events
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        """
+        Các đầu vào quyết định câu trả lời của hành động (slot, số trích từ tin nhắn)
+
+        Returns:
+            tuple: Khóa gộp lượt, None nếu không gộp các lượt của hành động này
+        """
         return None
-    
-    # Tiền xử lý tên ngành cần tìm
-    nganh_name = nganh_name.lower().strip()
-    
-    # Ánh xạ từ viết tắt sang tên đầy đủ
-    viet_tat_mapping = {
-    # Công nghệ
-    "cntt": "công nghệ thông tin",
-    "it": "công nghệ thông tin",
-    "cnktck": "công nghệ kỹ thuật cơ khí",
-    "cnktdh": "công nghệ kỹ thuật điều khiển và tự động hóa",
-    "cnktgt": "công nghệ kỹ thuật giao thông",
-    "cnkto": "công nghệ kỹ thuật ô tô",
-    "cnoto": "công nghệ kỹ thuật ô tô",
-    
-    # Hệ thống, khoa học
-    "htttql": "hệ thống thông tin quản lý",
-    "httql": "hệ thống thông tin quản lý",
-    "khdl": "khoa học dữ liệu",
-    "khdlieu": "khoa học dữ liệu",
-    "khhh": "khoa học hàng hải",
-    
-    # Kinh tế
-    "ktvt": "kinh tế vận tải",
-    "ktxd": "kinh tế xây dựng",
-    
-    # Kỹ thuật
-    "ktck": "kỹ thuật cơ khí",
-    "ktđ": "kỹ thuật điện",
-    "ktddt": "kỹ thuật điện, điện tử và điều khiển",
-    "ktđk": "kỹ thuật điều khiển và tự động hóa",
-    "ktmt": "kỹ thuật môi trường",
-    "oto": "kỹ thuật ô tô",
-    "kttt": "kỹ thuật tàu thủy",
-    "ktxd": "kỹ thuật xây dựng",
-    "ktxdctgt": "kỹ thuật xây dựng công trình giao thông",
-
-    # Logistics
-    "logistics": "logistics và quản lý chuỗi cung ứng",
-    "qlccu": "logistics và quản lý chuỗi cung ứng",
-    "log": "logistics và quản lý chuỗi cung ứng",
-    
-    # Luật, mạng, ngôn ngữ
-    "luat": "luật",
-    "mmt": "mạng máy tính và truyền thông dữ liệu",
-    "mmtvttdl": "mạng máy tính và truyền thông dữ liệu",
-    "nnanh": "ngôn ngữ anh",
-    "nna": "ngôn ngữ anh",
-    
-    # Quản lý
-    "qlxd": "quản lý xây dựng",
-
-    # Lỗi chính tả phổ biến
-    "công nghê thông tin": "công nghệ thông tin",
-    "kỹ thuât ô tô": "kỹ thuật ô tô",
-    "kinh tê xây dưng": "kinh tế xây dựng",
-    "luât": "luật",
-    "mang may tinh": "mạng máy tính và truyền thông dữ liệu",
-    "ngon ngu anh": "ngôn ngữ anh",
-    "he thong thong tin": "hệ thống thông tin quản lý"
-}
 
-    
-    # Xử lý viết tắt: kiểm tra xem nganh_name có phải là viết tắt không
-    for viet_tat, ten_day_du in viet_tat_mapping.items():
-        if viet_tat in nganh_name:
-            nganh_name = nganh_name.replace(viet_tat, ten_day_du)
-    
-    # Tạo từ điển ánh xạ từ tên ngành viết thường sang ngành gốc
-    nganh_mapping = {nganh["ten_nganh"].lower(): nganh for nganh in nganh_list}
-    
-    # Kiểm tra trùng khớp trực tiếp
-    if nganh_name in nganh_mapping:
-        return nganh_mapping[nganh_name]
-    
-    # Tìm kiếm bằng từng phần
-    for ten_nganh, nganh in nganh_mapping.items():
-        if nganh_name in ten_nganh or ten_nganh in nganh_name:
-            return nganh
-    
-    # Tìm kiếm dựa trên các từ khóa chính
-    keywords = nganh_name.split()
-    if len(keywords) >= 2:  # Nếu có ít nhất 2 từ khóa
-        for ten_nganh, nganh in nganh_mapping.items():
-            # Kiểm tra xem có ít nhất 2 từ khóa có trong tên ngành không
-            count_matches = sum(1 for keyword in keywords if keyword in ten_nganh)
-            if count_matches >= 2:
-                return nganh
-    
-    # Sử dụng fuzzywuzzy để tìm kiếm tương đồng nếu các phương pháp trên không tìm thấy
-    # Trích xuất tên ngành từ danh sách
-    nganh_names = list(nganh_mapping.keys())
-    
-    # Thêm xử lý cho từng khúc của tên ngành để tăng độ chính xác
-    best_score = 0
-    best_match = None
-    
-    # Tìm với toàn bộ tên ngành
-    for ten_nganh in nganh_names:
-        # Sử dụng token_sort_ratio để so sánh không phụ thuộc vào thứ tự từ
-        score = fuzz.token_sort_ratio(nganh_name, ten_nganh)
-        # Sử dụng partial_ratio để bắt trường hợp tên ngành là một phần của ngành đầy đủ
-        partial_score = fuzz.partial_ratio(nganh_name, ten_nganh)
-        # Lấy điểm cao nhất giữa hai phương pháp
-        final_score = max(score, partial_score)
-        
-        if final_score > best_score:
-            best_score = final_score
-            best_match = ten_nganh
-    
-    if best_score >= threshold:
-        return nganh_mapping[best_match]
-    
+    @abstractmethod
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        """
+        Phần xử lý chính của hành động, chạy trong worker
+        """
 
-    return None
 class ActionXuLyTen(Action):
     """
     Hành động xử lý tên người dùng
@@ -195,110 +170,119 @@ class ActionXuLyTen(Action):
         if not name:
             return ""
             
-        # Loại bỏ ký tự đặc biệt và số
-        name = re.sub(r'[^a-zA-ZÀÁÂÃÈÉÊÌÍÒÓÔÕÙÚĂĐĨŨƠàáâãèéêìíòóôõùúăđĩũơƯĂẠẢẤẦẨẪẬẮẰẲẴẶẸẺẼỀỀỂưăạảấầẩẫậắằẳẵặẹẻẽềềểỄỆỈỊỌỎỐỒỔỖỘỚỜỞỠỢỤỦỨỪễếệỉịọỏốồổỗộớờởỡợụủứừỬỮỰỲỴÝỶỸửữựỳỵỷỹ\s]', '', name)
-        
-        # Loại bỏ khoảng trắng thừa
-        name = re.sub(r'\s+', ' ', name).strip()
+        # Loại bỏ ký tự đặc biệt, số và khoảng trắng thừa
+        name = clean_name(name)
         
         # Chuẩn hóa chữ cái đầu thành chữ hoa
         name = name.title()
         
         return name
-class ActionTraLoiNganhTuyenSinh(Action):
+class ActionTraLoiNganhTuyenSinh(CatalogAction):
     """
     Hành động trả lời về các ngành tuyển sinh
     """
     def name(self) -> Text:
         return "action_tra_loi_nganh_tuyen_sinh"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        # Danh sách ngành chỉ phụ thuộc trường
+        return ()
         
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        # Đọc danh sách ngành từ JSON
-        nganh_list = load_nganh_data()
+        # Đọc danh sách ngành từ danh mục của trường
+        catalog = get_tenant_catalog(tracker)
+        nganh_list = catalog.nganh_list if catalog is not None else []
         
         if not nganh_list:
             dispatcher.utter_message(text="Hiện tại tôi không thể cung cấp thông tin về các ngành tuyển sinh. Xin vui lòng thử lại sau.")
             return []
             
-        # Tạo thông báo về các ngành
-        message = "Trường Đại học Giao thông Vận tải TP.HCM đào tạo các ngành sau:\n"
-        for i, nganh in enumerate(nganh_list, 1):
-            message += f"\n{i}. {nganh['ten_nganh']}\n\n"
-            
+        # Danh sách ngành được dựng một lần cho mỗi phiên bản danh mục
+        message = get_response_cache(nganh_list).danh_sach_nganh(catalog.ten_truong)
         dispatcher.utter_message(text=message)
         return []
 
-class ActionTraLoiThongTinNganh(Action):
+class ActionTraLoiThongTinNganh(CatalogAction):
     """
     Hành động trả lời thông tin giới thiệu về ngành
     """
     def name(self) -> Text:
         return "action_tra_loi_thong_tin_nganh"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        return nganh_key(tracker)
         
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         ten_nganh = tracker.get_slot("ten_nganh")
         if not ten_nganh:
             dispatcher.utter_message(text="Bạn muốn tìm hiểu về ngành nào?")
             return []
             
-        nganh_list = load_nganh_data()
-        nganh = find_similar_nganh(ten_nganh, nganh_list)
+        nganh_list = load_nganh_data(tracker)
+        nganh = find_similar_nganh(ten_nganh, nganh_list, ma_nganh=tracker.get_slot("ma_nganh"))
         
         if nganh:
-            message = f"Dưới đây là thông tin về ngành {nganh['ten_nganh']}, mã ngành {nganh['ma_nganh']}:\n\n"
-            message += nganh["gioi_thieu_chung"]
+            message = get_response_cache(nganh_list).nganh("thong_tin", nganh)
             dispatcher.utter_message(text=message)
-            return [SlotSet("ten_nganh", nganh["ten_nganh"])]
+            return nganh_slots(nganh)
         else:
             dispatcher.utter_message(text=f"Tôi không tìm thấy thông tin về ngành '{ten_nganh}'. Bạn có thể kiểm tra lại tên ngành hoặc tìm hiểu về ngành khác.")
             return []
 
-class ActionTraLoiCoHoiViecLam(Action):
+class ActionTraLoiCoHoiViecLam(CatalogAction):
     """
     Hành động trả lời về cơ hội việc làm của ngành
     """
     def name(self) -> Text:
         return "action_tra_loi_co_hoi_viec_lam"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        return nganh_key(tracker)
         
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         ten_nganh = tracker.get_slot("ten_nganh")
         if not ten_nganh:
             dispatcher.utter_message(text="Bạn muốn tìm hiểu cơ hội việc làm của ngành nào?")
             return []
             
-        nganh_list = load_nganh_data()
-        nganh = find_similar_nganh(ten_nganh, nganh_list)
+        nganh_list = load_nganh_data(tracker)
+        nganh = find_similar_nganh(ten_nganh, nganh_list, ma_nganh=tracker.get_slot("ma_nganh"))
         
         if nganh:
-            message = f"Cơ hội việc làm của ngành {nganh['ten_nganh']}:\n\n"
-            for i, co_hoi in enumerate(nganh["co_hoi_viec_lam"], 1):
-                message += f"{i}. {co_hoi}\n"
-                
+            message = get_response_cache(nganh_list).nganh("co_hoi_viec_lam", nganh)
             dispatcher.utter_message(text=message)
-            return [SlotSet("ten_nganh", nganh["ten_nganh"])]
+            return nganh_slots(nganh)
         else:
             dispatcher.utter_message(text=f"Tôi không tìm thấy thông tin về cơ hội việc làm của ngành '{ten_nganh}'. Bạn có thể kiểm tra lại tên ngành hoặc tìm hiểu về ngành khác.")
             return []
 
-class ActionTraLoiDiemChuanNganh(Action):
+class ActionTraLoiDiemChuanNganh(CatalogAction):
     """
     Hành động trả lời về điểm chuẩn của ngành
     """
     def name(self) -> Text:
         return "action_tra_loi_diem_chuan_nganh"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        return nganh_key(tracker) + (tracker.get_slot("nam"), self.hoi_xu_huong(tracker))
+
+    @staticmethod
+    def hoi_xu_huong(tracker: Tracker) -> bool:
+        """Tin nhắn mới nhất có hỏi về diễn biến điểm chuẩn qua các năm không"""
+        return bool(XU_HUONG_PATTERN.search(fold_diacritics(normalize_text(tracker.latest_message.get('text', '')))))
         
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         ten_nganh = tracker.get_slot("ten_nganh")
         nam = tracker.get_slot("nam")
@@ -307,20 +291,26 @@ class ActionTraLoiDiemChuanNganh(Action):
             dispatcher.utter_message(text="Bạn muốn tìm hiểu điểm chuẩn của ngành nào?")
             return []
             
-        nganh_list = load_nganh_data()
-        nganh = find_similar_nganh(ten_nganh, nganh_list)
+        nganh_list = load_nganh_data(tracker)
+        nganh = find_similar_nganh(ten_nganh, nganh_list, ma_nganh=tracker.get_slot("ma_nganh"))
         
         if not nganh:
             dispatcher.utter_message(text=f"Tôi không tìm thấy thông tin về ngành '{ten_nganh}'. Bạn có thể kiểm tra lại tên ngành hoặc tìm hiểu về ngành khác.")
             return []
         
+        # Thống kê điểm chuẩn được tính một lần cho mỗi phiên bản danh mục
+        analytics = get_score_analytics(nganh_list)
+        
         # Biến để theo dõi xem có cần xóa slot nam không
         should_reset_nam = False
             
+        if self.hoi_xu_huong(tracker):
+            # Hỏi về xu hướng điểm chuẩn qua các năm
+            dispatcher.utter_message(text=render_xu_huong(nganh, analytics.of(nganh)))
         # Xử lý năm cụ thể nếu có
-        if nam:
-            # Lấy năm hiện tại
-            current_year = 2024  # Cập nhật theo năm hiện tại của hệ thống
+        elif nam:
+            # "Năm nay" là năm mới nhất có điểm chuẩn trong danh mục
+            current_year = int(analytics.latest_year) if analytics.latest_year else None
             
             # Trích xuất năm từ chuỗi (ví dụ: "năm 2024" -> "2024")
             nam_match = re.search(r'\d{4}', nam)
@@ -330,21 +320,21 @@ class ActionTraLoiDiemChuanNganh(Action):
                 # Trường hợp có số năm cụ thể
                 nam_value = nam_match.group(0)
                 should_reset_nam = True
-                self.tra_loi_diem_chuan_nam_cu_the(dispatcher, nganh, nam_value)
+                self.tra_loi_diem_chuan_nam_cu_the(dispatcher, nganh, nam_value, analytics)
             else:
                 # Xử lý các cụm từ "năm ngoái", "năm trước", v.v.
-                nam_value = self.xu_ly_nam_mo_ta(nam, current_year)
+                nam_value = self.xu_ly_nam_mo_ta(nam, current_year) if current_year else None
                 if nam_value:
                     should_reset_nam = True
-                    self.tra_loi_diem_chuan_nam_cu_the(dispatcher, nganh, str(nam_value))
+                    self.tra_loi_diem_chuan_nam_cu_the(dispatcher, nganh, str(nam_value), analytics)
                 else:
-                    self.tra_loi_diem_chuan_khong_co_nam(dispatcher, nganh)
+                    self.tra_loi_diem_chuan_khong_co_nam(dispatcher, nganh, nganh_list)
         else:
             # Trường hợp không có năm cụ thể
-            self.tra_loi_diem_chuan_khong_co_nam(dispatcher, nganh)
+            self.tra_loi_diem_chuan_khong_co_nam(dispatcher, nganh, nganh_list)
         
         # Danh sách các events cần trả về
-        events = [SlotSet("ten_nganh", nganh["ten_nganh"])]
+        events = nganh_slots(nganh)
         
         # Nếu đã xử lý năm cụ thể, reset slot nam
         if should_reset_nam:
@@ -358,12 +348,12 @@ class ActionTraLoiDiemChuanNganh(Action):
         
         Args:
             nam_mo_ta (str): Chuỗi miêu tả năm
-            current_year (int): Năm hiện tại
+            current_year (int): Năm mới nhất có điểm chuẩn trong danh mục
             
         Returns:
             int: Năm cụ thể sau khi xử lý, None nếu không xác định được
         """
-        nam_mo_ta = nam_mo_ta.lower()
+        nam_mo_ta = normalize_text(nam_mo_ta)
         
         # Xử lý "năm ngoái", "năm trước"
         if re.search(r'năm\s+(ngoái|trước|vừa\s+rồi|vừa\s+qua)', nam_mo_ta):
@@ -385,124 +375,94 @@ class ActionTraLoiDiemChuanNganh(Action):
         
         return None
         
-    def tra_loi_diem_chuan_nam_cu_the(self, dispatcher, nganh, nam_value):
+    def tra_loi_diem_chuan_nam_cu_the(self, dispatcher, nganh, nam_value, analytics):
         """
         Trả lời điểm chuẩn cho một năm cụ thể
         
         Args:
             dispatcher: Rasa dispatcher
-            nganh (dict): Thông tin về ngành
+            nganh (Nganh): Thông tin về ngành
             nam_value (str): Năm cần tra cứu
+            analytics (ScoreAnalytics): Thống kê điểm chuẩn của danh mục
         """
-        if nam_value in nganh["diem_chuan"] and nganh["diem_chuan"][nam_value] is not None:
-            diem = nganh["diem_chuan"][nam_value]
+        diem = nganh.diem_chuan_nam(nam_value)
+        if diem is not None:
             dispatcher.utter_message(text=f"Điểm chuẩn ngành {nganh['ten_nganh']} năm {nam_value} là: {diem} điểm.")
-        else:
-            # Kiểm tra xem năm có trong danh sách các năm không
-            nam_list = list(nganh["diem_chuan"].keys())
-            if nam_value not in nam_list:
-                # Nếu không có thông tin năm này, tìm năm gần nhất
-                nam_gan_nhat = self.tim_nam_gan_nhat(nam_value, nam_list)
-                if nam_gan_nhat:
-                    diem = nganh["diem_chuan"][nam_gan_nhat]
-                    dispatcher.utter_message(text=f"Không có thông tin điểm chuẩn ngành {nganh['ten_nganh']} năm {nam_value}. Nhưng tôi có thể cung cấp điểm chuẩn năm {nam_gan_nhat} là: {diem} điểm.")
-                else:
-                    dispatcher.utter_message(text=f"Chưa có thông tin điểm chuẩn ngành {nganh['ten_nganh']} năm {nam_value}.")
+        elif nam_value not in nganh["diem_chuan"]:
+            # Nếu không có thông tin năm này, tìm năm gần nhất có điểm chuẩn
+            nam_gan_nhat = analytics.nam_gan_nhat(nganh, nam_value)
+            if nam_gan_nhat:
+                diem = nganh["diem_chuan"][nam_gan_nhat]
+                dispatcher.utter_message(text=f"Không có thông tin điểm chuẩn ngành {nganh['ten_nganh']} năm {nam_value}. Nhưng tôi có thể cung cấp điểm chuẩn năm {nam_gan_nhat} là: {diem} điểm.")
             else:
                 dispatcher.utter_message(text=f"Chưa có thông tin điểm chuẩn ngành {nganh['ten_nganh']} năm {nam_value}.")
-                
-    def tim_nam_gan_nhat(self, nam_value, nam_list):
-        """
-        Tìm năm gần nhất với năm được yêu cầu trong danh sách các năm có sẵn
-        
-        Args:
-            nam_value (str): Năm cần tìm
-            nam_list (list): Danh sách các năm có sẵn
-            
-        Returns:
-            str: Năm gần nhất, None nếu không tìm thấy
-        """
-        try:
-            # Chuyển đổi sang số nguyên để so sánh
-            target_year = int(nam_value)
-            year_list = [int(year) for year in nam_list]
-            
-            # Sắp xếp các năm dựa trên khoảng cách với năm cần tìm
-            closest_years = sorted(year_list, key=lambda x: abs(x - target_year))
-            
-            if closest_years:
-                return str(closest_years[0])
-                
-        except (ValueError, TypeError):
-            pass
-            
-        return None
-        
-    def tra_loi_diem_chuan_khong_co_nam(self, dispatcher, nganh):
+        else:
+            dispatcher.utter_message(text=f"Chưa có thông tin điểm chuẩn ngành {nganh['ten_nganh']} năm {nam_value}.")
+
+    def tra_loi_diem_chuan_khong_co_nam(self, dispatcher, nganh, nganh_list):
         """
         Trả lời điểm chuẩn khi không có năm cụ thể
         """
-        # Kiểm tra xem có thông tin điểm chuẩn không
-        if not nganh["diem_chuan"]:
-            dispatcher.utter_message(text=f"Hiện tại chưa có thông tin về điểm chuẩn ngành {nganh['ten_nganh']}.")
-            return
-            
-        message = f"Điểm chuẩn ngành {nganh['ten_nganh']} các năm gần đây:\n\n"
-        
-        # Sắp xếp các năm từ mới nhất đến cũ nhất
-        sorted_years = sorted([int(year) for year in nganh["diem_chuan"].keys()], reverse=True)
-        
-        for year in sorted_years:
-            year_str = str(year)
-            diem = nganh["diem_chuan"][year_str]
-            if diem is not None:
-                message += f"Năm {year_str}: {diem} điểm\n"
-                
+        # Câu trả lời chỉ phụ thuộc dữ liệu ngành nên được dựng một lần cho mỗi phiên bản danh mục
+        message = get_response_cache(nganh_list).nganh("diem_chuan", nganh)
         dispatcher.utter_message(text=message)
 
-class ActionTraLoiKhoiXetTuyen(Action):
+class ActionTraLoiKhoiXetTuyen(CatalogAction):
     """
     Hành động trả lời về khối xét tuyển của ngành
     """
     def name(self) -> Text:
         return "action_tra_loi_khoi_xet_tuyen"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        return nganh_key(tracker)
         
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         ten_nganh = tracker.get_slot("ten_nganh")
         if not ten_nganh:
             dispatcher.utter_message(text="Bạn muốn tìm hiểu khối xét tuyển của ngành nào?")
             return []
             
-        nganh_list = load_nganh_data()
-        nganh = find_similar_nganh(ten_nganh, nganh_list)
+        nganh_list = load_nganh_data(tracker)
+        nganh = find_similar_nganh(ten_nganh, nganh_list, ma_nganh=tracker.get_slot("ma_nganh"))
         
         if nganh:
             message = f"Khối xét tuyển của ngành {nganh['ten_nganh']} là: "
             message += ", ".join(nganh["khoi_xet_tuyen"])
             
             dispatcher.utter_message(text=message)
-            return [SlotSet("ten_nganh", nganh["ten_nganh"])]
+            return nganh_slots(nganh)
         else:
             dispatcher.utter_message(text=f"Tôi không tìm thấy thông tin về khối xét tuyển của ngành '{ten_nganh}'. Bạn có thể kiểm tra lại tên ngành hoặc tìm hiểu về ngành khác.")
             return []
         
 # Thêm các hàm tư vấn ngành theo điểm và sở thích
-class ActionTuVanNganhTheoDiem(Action):
+class ActionTuVanNganhTheoDiem(CatalogAction):
     """
     Hành động tư vấn ngành học dựa trên điểm thi của thí sinh
     """
+    admission = "tu_van"
+
     def name(self) -> Text:
         return "action_tu_van_nganh_theo_diem"
-        
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        # Trích xuất thông tin điểm từ tin nhắn của người dùng
-        message = tracker.latest_message.get('text', '')
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        return (self.doc_diem(tracker.latest_message.get('text', '')),)
+
+    @staticmethod
+    def doc_diem(message: Text) -> Optional[float]:
+        """
+        Trích xuất tổng điểm từ tin nhắn của người dùng
+
+        Args:
+            message (str): Tin nhắn, ví dụ "em được 24.5 điểm"
+
+        Returns:
+            float: Tổng điểm, None nếu không tìm thấy
+        """
         diem_pattern = r'(\d{1,2}(\.\d+)?)\s*(?:điểm|diem)'
         diem_matches = re.findall(diem_pattern, message)
         
@@ -524,120 +484,88 @@ class ActionTuVanNganhTheoDiem(Action):
                     diem = float(diem_matches[0][0])
                 except (ValueError, IndexError):
                     pass
+        return diem
+        
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        
+        # Trích xuất thông tin điểm từ tin nhắn của người dùng
+        diem = self.doc_diem(tracker.latest_message.get('text', ''))
         
         if not diem:
             dispatcher.utter_message(text="Xin lỗi, tôi không xác định được điểm của bạn. Vui lòng cho biết tổng điểm 3 môn là bao nhiêu?")
             return []
         
         # Đọc danh sách ngành từ JSON
-        nganh_list = load_nganh_data()
+        nganh_list = load_nganh_data(tracker)
         
         if not nganh_list:
             dispatcher.utter_message(text="Hiện tại tôi không thể cung cấp thông tin về các ngành tuyển sinh. Xin vui lòng thử lại sau.")
             return []
         
-        # Tư vấn dựa theo mức điểm
-        suitable_nganh = []
-        
         # Lấy điểm chuẩn các ngành năm gần nhất
-        latest_year = "2024"  # Năm mới nhất trong dữ liệu
+        latest_year = get_score_analytics(nganh_list).latest_year  # Năm mới nhất trong dữ liệu
+        if not latest_year:
+            dispatcher.utter_message(text="Hiện tại tôi chưa có thông tin điểm chuẩn các ngành. Xin vui lòng thử lại sau.")
+            return []
         
-        for nganh in nganh_list:
-            if latest_year in nganh["diem_chuan"] and nganh["diem_chuan"][latest_year] is not None:
-                diem_chuan = nganh["diem_chuan"][latest_year]
-                chenh_lech = diem - diem_chuan
-                
-                # Chỉ xét các ngành có điểm chênh lệch từ -2 trở lên
-                if chenh_lech >= -2:
-                    # Thêm thông tin về khối xét tuyển
-                    khoi_xet_tuyen = nganh["khoi_xet_tuyen"][0] if nganh["khoi_xet_tuyen"] else "N/A"
-                    
-                    suitable_nganh.append({
-                        "ten_nganh": nganh["ten_nganh"],
-                        "ma_khoi": khoi_xet_tuyen,
-                        "diem_dat": diem,
-                        "diem_chuan": diem_chuan,
-                        "chenh_lech": chenh_lech
-                    })
-        
-        # Sắp xếp theo chênh lệch điểm từ cao xuống thấp
-        suitable_nganh.sort(key=lambda x: (-x["chenh_lech"], x["ten_nganh"]))
+        # Các ngành có điểm chênh lệch từ -2 trở lên là một đoạn đầu của chỉ mục điểm chuẩn,
+        # đã sắp theo chênh lệch giảm dần nên chỉ cần cắt tối đa 26 ngành
+        year_index = get_score_index(nganh_list).year(latest_year)
+        suitable_nganh = year_index.within(diem, margin=2, limit=26)
         
         if suitable_nganh:
-            message = f"Với tổng điểm {diem:.1f}, dựa vào điểm chuẩn năm 2024, tôi tư vấn cho bạn các ngành sau:\n\n"
+            lines = [f"Với tổng điểm {diem:.1f}, dựa vào điểm chuẩn năm {latest_year}, tôi tư vấn cho bạn các ngành sau:\n\n"]
             
-            for i, nganh in enumerate(suitable_nganh[:26], 1):  # Giới hạn 26 ngành
-                message += f"{i}. {nganh['ten_nganh']} - Khối {nganh['ma_khoi']}\n"
+            for i, nganh in enumerate(suitable_nganh, 1):
+                chenh_lech = diem - nganh.diem_chuan
+                lines.append(f"{i}. {nganh.ten_nganh} - Khối {nganh.ma_khoi}\n")
                 
                 # Format theo trạng thái chênh lệch điểm
-                if nganh["chenh_lech"] >= 0:
-                    message += f"   Điểm của bạn: {nganh['diem_dat']:.1f}, Điểm chuẩn: {nganh['diem_chuan']:.1f} (Chênh lệch: +{nganh['chenh_lech']:.1f})\n\n"
+                if chenh_lech >= 0:
+                    lines.append(f"   Điểm của bạn: {diem:.1f}, Điểm chuẩn: {nganh.diem_chuan:.1f} (Chênh lệch: +{chenh_lech:.1f})\n\n")
                 else:
-                    message += f"   Điểm của bạn: {nganh['diem_dat']:.1f}, Điểm chuẩn: {nganh['diem_chuan']:.1f} (Chênh lệch: {nganh['chenh_lech']:.1f}) - cân nhắc phương thức xét tuyển khác\n\n"
+                    lines.append(f"   Điểm của bạn: {diem:.1f}, Điểm chuẩn: {nganh.diem_chuan:.1f} (Chênh lệch: {chenh_lech:.1f}) - cân nhắc phương thức xét tuyển khác\n\n")
                 
-            message += "Bạn có muốn biết thêm thông tin về ngành nào trong số này không?"
+            lines.append("Bạn có muốn biết thêm thông tin về ngành nào trong số này không?")
+            message = "".join(lines)
         else:
             message = f"Với mức điểm {diem:.1f}, bạn chưa đạt đủ điểm chuẩn các ngành của trường. Bạn có thể cân nhắc các phương thức xét tuyển khác như xét học bạ hoặc đánh giá năng lực."
         
         dispatcher.utter_message(text=message)
         return []
 
-class ActionTuVanNganhTheoSoThich(Action):
+class ActionTuVanNganhTheoSoThich(CatalogAction):
     """
     Hành động tư vấn ngành học dựa trên sở thích của thí sinh
     """
+    admission = "tu_van"
+
     def name(self) -> Text:
         return "action_tu_van_nganh_theo_so_thich"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        # Các sở thích được tìm trên tin nhắn đã chuẩn hóa
+        return (normalize_text(tracker.latest_message.get('text', '')),)
         
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Lấy tin nhắn chứa sở thích của người dùng
-        message = tracker.latest_message.get('text', '').lower()
-        
-        # Từ khóa ánh xạ sở thích với ngành học
-        so_thich_nganh_mapping = {
-            "máy tính": ["Công nghệ thông tin", "Kỹ thuật phần mềm", "Hệ thống thông tin", "An toàn thông tin"],
-            "lập trình": ["Công nghệ thông tin", "Kỹ thuật phần mềm", "Khoa học máy tính"],
-            "thiết kế": ["Kiến trúc", "Kỹ thuật công trình", "Thiết kế công nghiệp"],
-            "ô tô": ["Công nghệ kỹ thuật ô tô", "Kỹ thuật cơ khí động lực"],
-            "xe máy": ["Công nghệ kỹ thuật ô tô", "Kỹ thuật cơ khí động lực"],
-            "động cơ": ["Công nghệ kỹ thuật ô tô", "Kỹ thuật cơ khí động lực"],
-            "điện": ["Công nghệ kỹ thuật điện, điện tử", "Công nghệ kỹ thuật điều khiển và tự động hóa"],
-            "điện tử": ["Công nghệ kỹ thuật điện, điện tử", "Công nghệ kỹ thuật điều khiển và tự động hóa"],
-            "tự động hóa": ["Công nghệ kỹ thuật điều khiển và tự động hóa"],
-            "robot": ["Công nghệ kỹ thuật điều khiển và tự động hóa", "Công nghệ kỹ thuật cơ điện tử"],
-            "cơ khí": ["Công nghệ kỹ thuật cơ khí", "Công nghệ chế tạo máy"],
-            "máy móc": ["Công nghệ kỹ thuật cơ khí", "Công nghệ chế tạo máy"],
-            "công trình": ["Kỹ thuật xây dựng", "Kỹ thuật xây dựng công trình giao thông"],
-            "xây dựng": ["Kỹ thuật xây dựng", "Kỹ thuật xây dựng công trình giao thông"],
-            "cầu đường": ["Kỹ thuật xây dựng công trình giao thông"],
-            "giao thông": ["Kỹ thuật xây dựng công trình giao thông", "Quy hoạch và quản lý giao thông"],
-            "vận tải": ["Logistics và hạ tầng giao thông", "Quy hoạch và quản lý giao thông"],
-            "logistics": ["Logistics và hạ tầng giao thông"],
-            "kinh doanh": ["Quản trị kinh doanh", "Marketing", "Thương mại điện tử"],
-            "quản lý": ["Quản trị kinh doanh", "Quản trị nhân lực"],
-            "marketing": ["Marketing", "Thương mại điện tử"],
-            "tiếng anh": ["Ngôn ngữ Anh"],
-            "ngoại ngữ": ["Ngôn ngữ Anh"]
-        }
-        
-        # Tìm các từ khóa liên quan đến sở thích trong tin nhắn
-        matched_interests = []
-        for keyword, nganh_list in so_thich_nganh_mapping.items():
-            if keyword in message:
-                matched_interests.extend(nganh_list)
-        
-        # Loại bỏ các ngành trùng lặp và lấy tối đa 5 ngành
-        recommended_nganh = list(dict.fromkeys(matched_interests))[:5]
+        message = tracker.latest_message.get('text', '')
+        
+        # Tìm các sở thích trong tin nhắn và chấm điểm các ngành liên quan (tối đa 5 ngành)
+        recommended_nganh = get_interest_engine(load_nganh_data(tracker)).match(message)
         
         if recommended_nganh:
-            message = "Dựa trên sở thích của bạn, tôi gợi ý các ngành sau:\n\n"
-            for i, nganh in enumerate(recommended_nganh, 1):
-                message += f"{i}. {nganh}\n"
+            lines = ["Dựa trên sở thích của bạn, tôi gợi ý các ngành sau:\n\n"]
+            for i, goi_y in enumerate(recommended_nganh, 1):
+                lines.append(f"{i}. {goi_y.nganh['ten_nganh']}\n")
                 
-            message += "\nBạn có muốn biết thêm thông tin về ngành nào trong số này không?"
+            lines.append("\nBạn có muốn biết thêm thông tin về ngành nào trong số này không?")
+            message = "".join(lines)
         else:
             message = "Tôi chưa xác định được sở thích rõ ràng của bạn. Bạn có thể cho tôi biết bạn thích gì hoặc quan tâm đến lĩnh vực nào không?"
         
@@ -646,65 +574,69 @@ class ActionTuVanNganhTheoSoThich(Action):
 
 
 
-class ActionTuVanTheoMonVaDiem(Action):
+class ActionTimKiemNganh(CatalogAction):
+    """
+    Hành động tìm ngành theo nội dung giới thiệu và cơ hội việc làm, cho các câu
+    hỏi mở như "ngành nào làm việc ở cảng biển"
+    """
+    def name(self) -> Text:
+        return "action_tim_kiem_nganh"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        return (normalize_text(tracker.latest_message.get('text', '')),)
+
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+
+        message = tracker.latest_message.get('text', '')
+        nganh_list = load_nganh_data(tracker)
+        if not nganh_list:
+            dispatcher.utter_message(text="Hiện tại tôi không thể cung cấp thông tin về các ngành tuyển sinh. Xin vui lòng thử lại sau.")
+            return []
+
+        # Xếp hạng BM25 trên chỉ mục toàn văn dựng một lần cho mỗi phiên bản danh mục
+        ket_qua = get_search_index(nganh_list).search(message)
+
+        if ket_qua:
+            lines = ["Các ngành phù hợp với câu hỏi của bạn:\n\n"]
+            for i, tim_thay in enumerate(ket_qua, 1):
+                lines.append(f"{i}. {tim_thay.nganh['ten_nganh']}\n")
+                if tim_thay.trich_doan:
+                    lines.append(f"   {tim_thay.trich_doan}\n")
+                lines.append("\n")
+            lines.append("Bạn có muốn biết thêm thông tin về ngành nào trong số này không?")
+            message = "".join(lines)
+        else:
+            message = "Tôi chưa tìm thấy ngành nào phù hợp với câu hỏi của bạn. Bạn có thể nói rõ hơn về công việc hoặc lĩnh vực bạn quan tâm không?"
+
+        dispatcher.utter_message(text=message)
+        return []
+
+
+class ActionTuVanTheoMonVaDiem(CatalogAction):
     """
     Hành động tư vấn ngành học dựa trên điểm 3 môn cụ thể và tự động quy ra khối thi
     """
+    admission = "tu_van"
+
     def name(self) -> Text:
         return "action_tu_van_theo_mon_va_diem"
+
+    def coalesce_key(self, tracker: Tracker) -> Optional[Tuple]:
+        # Câu trả lời chỉ phụ thuộc điểm từng môn, không phụ thuộc thứ tự nhắc đến
+        found_subjects = extract_subject_scores(normalize_text(tracker.latest_message.get('text', '')))
+        return tuple(sorted(found_subjects.items()))
         
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    def xu_ly(self, dispatcher: CollectingDispatcher,
+              tracker: Tracker,
+              domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Lấy tin nhắn của người dùng
-        message = tracker.latest_message.get('text', '').lower()
-        
-        # Định nghĩa các mã khối thi và môn tương ứng
-        khoi_thi = {
-            "A00": ["toán", "lý", "hóa"],
-            "A01": ["toán", "lý", "anh"],
-            "B00": ["toán", "hóa", "sinh"],
-            "C00": ["văn", "sử", "địa"],
-            "C01": ["văn", "toán", "lý"],
-            "C02": ["văn", "toán", "hóa"],
-            "D01": ["toán", "văn", "anh"],
-            "D07": ["toán", "hóa", "anh"],
-            "D08": ["toán", "sinh", "anh"],
-            "D09": ["toán", "sử", "anh"],
-            "D10": ["toán", "địa", "anh"]
-        }
-        
-        # Định nghĩa các từ khóa cần nhận dạng cho các môn học
-        mon_tu_dong = {
-            "toán": ["toán", "toan", "đại số", "dai so", "hình học", "hinh hoc", "math"],
-            "lý": ["lý", "ly", "vật lý", "vat ly", "physics"],
-            "hóa": ["hóa", "hoa", "hóa học", "hoa hoc", "chemistry"],
-            "sinh": ["sinh", "sinh học", "sinh hoc", "biology"],
-            "văn": ["văn", "van", "ngữ văn", "ngu van", "literature"],
-            "sử": ["sử", "su", "lịch sử", "lich su", "history"],
-            "địa": ["địa", "dia", "địa lý", "dia ly", "geography"],
-            "anh": ["anh", "tiếng anh", "tieng anh", "english"]
-        }
-        
-        # Tìm kiếm các môn học trong tin nhắn
-        found_subjects = {}
-        
-        for mon, keywords in mon_tu_dong.items():
-            for keyword in keywords:
-                if keyword in message:
-                    # Tìm điểm số gần với tên môn
-                    diem_pattern = r'{}.*?(\d+(\.\d+)?)'.format(keyword)
-                    diem_match = re.search(diem_pattern, message)
-                    
-                    if not diem_match:
-                        # Tìm ngược lại: điểm trước rồi đến tên môn
-                        diem_pattern = r'(\d+(\.\d+)?).*?{}'.format(keyword)
-                        diem_match = re.search(diem_pattern, message)
-                    
-                    if diem_match:
-                        found_subjects[mon] = float(diem_match.group(1))
-                        break
+        message = normalize_text(tracker.latest_message.get('text', ''))
+        
+        # Trích xuất điểm từng môn trong một lượt duyệt tin nhắn
+        found_subjects = extract_subject_scores(message)
         
         # Nếu không tìm thấy đủ 3 môn, thông báo cho người dùng
         if len(found_subjects) < 3:
@@ -714,12 +646,11 @@ class ActionTuVanTheoMonVaDiem(Action):
         # Tính tổng điểm
         total_score = sum(found_subjects.values())
         
-        # Xác định khối thi phù hợp
+        # Xác định khối thi phù hợp: tra bảng theo mặt nạ bit của các môn đã nhập
         matching_blocks = []
-        for ma_khoi, mon_list in khoi_thi.items():
-            if all(mon in found_subjects for mon in mon_list):
-                khoi_score = sum(found_subjects[mon] for mon in mon_list)
-                matching_blocks.append((ma_khoi, khoi_score))
+        for khoi in KHOI_THI_REGISTRY.satisfiable(mask_of(found_subjects)):
+            khoi_score = sum(found_subjects[mon] for mon in khoi.mon)
+            matching_blocks.append((khoi.ma_khoi, khoi_score))
         
         # Sắp xếp theo điểm từ cao xuống thấp
         matching_blocks.sort(key=lambda x: x[1], reverse=True)
@@ -729,48 +660,32 @@ class ActionTuVanTheoMonVaDiem(Action):
             return []
         
         # Đọc danh sách ngành
-        nganh_list = load_nganh_data()
+        nganh_list = load_nganh_data(tracker)
         if not nganh_list:
             dispatcher.utter_message(text="Hiện tại tôi không thể cung cấp thông tin về các ngành tuyển sinh. Xin vui lòng thử lại sau.")
             return []
         
+        # Năm gần nhất trong dữ liệu
+        latest_year = get_score_analytics(nganh_list).latest_year
+        if not latest_year:
+            dispatcher.utter_message(text="Hiện tại tôi chưa có thông tin điểm chuẩn các ngành. Xin vui lòng thử lại sau.")
+            return []
+        
         # Tạo response
         message = f"Từ các môn bạn đã nhập, tôi xác định được các khối phù hợp là:\n\n"
         
         for ma_khoi, khoi_score in matching_blocks[:3]:  # Chỉ hiển thị 3 khối phù hợp nhất
-            message += f"- Khối {ma_khoi} ({', '.join(khoi_thi[ma_khoi])}) với tổng điểm: {khoi_score:.1f}\n"
+            message += f"- Khối {ma_khoi} ({', '.join(KHOI_THI_REGISTRY[ma_khoi].mon)}) với tổng điểm: {khoi_score:.1f}\n"
         
-        message += "\nDựa vào điểm các khối này, tôi tư vấn cho bạn các ngành sau ( tính theo năm 2024):\n\n"
+        message += f"\nDựa vào điểm các khối này, tôi tư vấn cho bạn các ngành sau ( tính theo năm {latest_year}):\n\n"
         
-        # Năm gần nhất trong dữ liệu
-        latest_year = "2024"
-        
-        # Tìm các ngành phù hợp với khối và điểm
-        recommended_nganh = []
-        
-        for ma_khoi, khoi_score in matching_blocks[:3]:  # Chỉ xét 3 khối đầu tiên
-            for nganh in nganh_list:
-                if ma_khoi in nganh["khoi_xet_tuyen"] and latest_year in nganh["diem_chuan"] and nganh["diem_chuan"][latest_year] is not None:
-                    diem_chuan = nganh["diem_chuan"][latest_year]
-                    
-                    if khoi_score >= diem_chuan:
-                        # Tránh ngành trùng lặp
-                        if nganh["ten_nganh"] not in [n["ten_nganh"] for n in recommended_nganh]:
-                            recommended_nganh.append({
-                                "ten_nganh": nganh["ten_nganh"],
-                                "ma_khoi": ma_khoi,
-                                "diem_dat": khoi_score,
-                                "diem_chuan": diem_chuan,
-                                "chenh_lech": khoi_score - diem_chuan
-                            })
-        
-        # Sắp xếp theo mức độ phù hợp (chênh lệch tăng dần)
-        recommended_nganh.sort(key=lambda x: (-x["chenh_lech"], x["ten_nganh"]))
+        # Trộn các danh sách ngành đã sắp theo điểm chuẩn của 3 khối đầu tiên
+        recommended_nganh = get_khoi_index(nganh_list).recommend(latest_year, matching_blocks[:3], limit=26)
         
         if recommended_nganh:
-            for i, nganh in enumerate(recommended_nganh[:26], 1):  # Giới hạn 10 ngành
-                message += f"{i}. {nganh['ten_nganh']} - Khối {nganh['ma_khoi']}\n"
-                message += f"   Điểm của bạn: {nganh['diem_dat']:.1f}, Điểm chuẩn: {nganh['diem_chuan']:.1f} (Chênh lệch: +{nganh['chenh_lech']:.1f})\n\n"
+            for i, nganh in enumerate(recommended_nganh, 1):
+                message += f"{i}. {nganh.ten_nganh} - Khối {nganh.ma_khoi}\n"
+                message += f"   Điểm của bạn: {nganh.diem_dat:.1f}, Điểm chuẩn: {nganh.diem_chuan:.1f} (Chênh lệch: +{nganh.chenh_lech:.1f})\n\n"
                 
             message += "Bạn có muốn biết thêm thông tin về ngành nào trong số này không?"
         else:
@@ -780,27 +695,7 @@ class ActionTuVanTheoMonVaDiem(Action):
         return []
     
 
-# Thêm vào cuối file actions.py
-
-# Dữ liệu khối xét tuyển và môn học
-KHOI_XET_TUYEN_DATA = {
-    "A00": ["Toán", "Lý", "Hóa"],
-    "A01": ["Toán", "Lý", "Anh"],
-    "A02": ["Toán", "Lý", "Sinh"],
-    "B00": ["Toán", "Hóa", "Sinh"],
-    "C00": ["Văn", "Sử", "Địa"],
-    "C01": ["Toán", "Văn", "Lý"],
-    "C08": ["Toán", "Văn", "Hóa"],
-    "C19": ["Toán", "Văn", "Sử"],
-    "C20": ["Toán", "Văn", "Anh"],
-    "D01": ["Toán", "Văn", "Anh"],
-    "D07": ["Toán", "Hóa", "Anh"],
-    "D08": ["Toán", "Sinh", "Anh"],
-    "D90": ["Toán", "Anh", "KHTN"],
-    "D96": ["Toán", "Anh", "KHXH"]
-}
-
-class ActionTraLoiKhoiXetTuyen(Action):
+class ActionTraLoiKhoiXetTuyenMonHoc(Action):
     """
     Hành động trả lời về môn học trong khối xét tuyển
     """
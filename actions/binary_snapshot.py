@@ -0,0 +1,298 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from .catalog import NGANH_JSON_PATH, CatalogError, validate_nganh_data
+from .nganh_model import DiemChuanMatrix, NganhBase, compact_nganh_list
+
+# Snapshot nhị phân của nganh.json để nhiều tiến trình action server dùng chung
+# qua mmap chỉ đọc: mọi tiến trình cùng đọc một bản trong page cache. Cấu trúc
+# file (little-endian), các phần đều căn theo 8 byte:
+#     header   HEADER
+#     years    n_years × int32, tăng dần
+#     matrix   n_years × n_nganh × float64, NaN là không có điểm (xem DiemChuanMatrix)
+#     records  n_nganh × RECORD
+#     refs     n_refs × uint32, số hiệu chuỗi của các phần tử danh sách
+#     offsets  (n_strings + 1) × uint64, vị trí từng chuỗi trong heap
+#     heap     các chuỗi UTF-8, mỗi chuỗi khác nhau lưu một lần
+MAGIC = b"NGANHBIN"
+FORMAT_VERSION = 1
+
+# magic, phiên bản, dự phòng, n_nganh, n_years, n_strings, n_refs, crc32 phần thân, độ dài phần thân, sha256 nguồn
+HEADER = struct.Struct("<8sHHIIIIIQ32s")
+
+# mặt nạ năm có mặt, mặt nạ năm có điểm nguyên, ma_nganh, ten_nganh, gioi_thieu_chung,
+# cơ hội việc làm (vị trí, số phần tử), khối xét tuyển (vị trí, số phần tử), trường thêm (JSON)
+RECORD = struct.Struct("<QQIIIIIIII")
+
+# Số hiệu chuỗi dùng khi ngành không có trường thêm
+NO_STRING = 0xFFFFFFFF
+
+# Mặt nạ năm là số 64 bit
+MAX_YEARS = 64
+
+
+def _align(buffer: bytearray) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+
+def _column(kind: Text, values) -> bytes:
+    column = array(kind, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def encode_snapshot(data: List[Dict[Text, Any]], source_sha256: bytes = b"\0" * 32) -> bytes:
+    """
+    Mã hóa danh sách ngành (đã kiểm tra) thành snapshot nhị phân
+
+    Args:
+        data (list): Danh sách ngành đọc từ nganh.json
+        source_sha256 (bytes): sha256 của file nguồn, ghi vào header để biết snapshot dựng từ đâu
+
+    Returns:
+        bytes: Nội dung file snapshot
+
+    Raises:
+        CatalogError: Nếu danh mục có quá MAX_YEARS năm
+    """
+    records = compact_nganh_list(data)
+    matrix = records[0]._matrix if records else DiemChuanMatrix([], 0)
+    if len(matrix.years) > MAX_YEARS:
+        raise CatalogError(f"Snapshot nhị phân chỉ hỗ trợ tối đa {MAX_YEARS} năm điểm chuẩn")
+
+    strings: Dict[Text, int] = {}
+
+    def string_id(text: Text) -> int:
+        return strings.setdefault(text, len(strings))
+
+    refs: List[int] = []
+
+    def list_ref(items) -> Tuple[int, int]:
+        start = len(refs)
+        refs.extend(string_id(item) for item in items)
+        return start, len(items)
+
+    rows = bytearray()
+    for nganh in records:
+        co_hoi = list_ref(nganh.co_hoi_viec_lam)
+        khoi = list_ref(nganh.khoi_xet_tuyen)
+        extra = NO_STRING if nganh._extra is None else string_id(json.dumps(nganh._extra, ensure_ascii=False))
+        rows += RECORD.pack(nganh._present, nganh._integral, string_id(nganh.ma_nganh), string_id(nganh.ten_nganh),
+                            string_id(nganh.gioi_thieu_chung), *co_hoi, *khoi, extra)
+
+    heap = bytearray()
+    offsets = [0]
+    for text in strings:
+        heap += text.encode("utf-8")
+        offsets.append(len(heap))
+
+    body = bytearray()
+    for section in (_column("i", matrix.year_numbers), _column("d", matrix.values), rows,
+                    _column("I", refs), _column("Q", offsets), heap):
+        body += section
+        _align(body)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(records), len(matrix.years), len(strings), len(refs),
+                         zlib.crc32(body), len(body), source_sha256)
+    return header + body
+
+
+def convert(source: Text, target: Text) -> Dict[Text, Any]:
+    """
+    Chuyển nganh.json thành snapshot nhị phân
+
+    File đích được ghi ra file tạm rồi đổi tên, nên các tiến trình đang mmap
+    bản cũ vẫn đọc được bản cũ cho tới khi tự nạp lại.
+
+    Args:
+        source (str): Đường dẫn nganh.json
+        target (str): Đường dẫn file snapshot
+
+    Returns:
+        dict: Số ngành, số năm, số chuỗi và kích thước file
+    """
+    with open(source, 'rb') as file:
+        raw = file.read()
+    data = validate_nganh_data(json.loads(raw.decode("utf-8")))
+    content = encode_snapshot(data, hashlib.sha256(raw).digest())
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+        # mkstemp tạo file chỉ chủ sở hữu đọc được, các tiến trình khác cũng cần đọc
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    header = HEADER.unpack_from(content)
+    return {"nganh": header[3], "years": header[4], "strings": header[5], "bytes": len(content)}
+
+
+def is_snapshot_file(path: Text) -> bool:
+    """File có phải snapshot nhị phân (theo magic) hay không"""
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class MappedSnapshot:
+    """
+    Snapshot nhị phân được mmap chỉ đọc.
+
+    Header và crc32 được kiểm tra khi mở. Các cột số là memoryview trỏ thẳng
+    vào vùng nhớ ánh xạ, không sao chép; chuỗi được giải mã khi được đọc.
+    """
+
+    def __init__(self, path: Text):
+        with open(path, 'rb') as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise CatalogError(f"File snapshot '{path}' rỗng")
+        if len(self._mmap) < HEADER.size:
+            raise CatalogError(f"File snapshot '{path}' bị cắt cụt")
+        (magic, version, _, self.n_nganh, self.n_years, n_strings, n_refs,
+         crc, body_length, self.source_sha256) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise CatalogError(f"File '{path}' không phải snapshot danh mục ngành")
+        if version != FORMAT_VERSION:
+            raise CatalogError(f"Snapshot '{path}' có phiên bản định dạng {version}, cần {FORMAT_VERSION}")
+        body = memoryview(self._mmap)[HEADER.size:]
+        if len(body) != body_length or zlib.crc32(body) != crc:
+            raise CatalogError(f"Snapshot '{path}' sai checksum")
+
+        sections = []
+        position = 0
+        for kind, count in (("i", self.n_years), ("d", self.n_years * self.n_nganh),
+                            ("B", self.n_nganh * RECORD.size), ("I", n_refs), ("Q", n_strings + 1)):
+            size = struct.calcsize(kind) * count
+            sections.append(self._cast(body[position:position + size], kind))
+            position += size + (-size % 8)
+        years, values, self._records, self._refs, self._offsets = sections
+        self._heap = body[position:]
+        self.matrix = DiemChuanMatrix([str(nam) for nam in years], self.n_nganh, values)
+
+    @staticmethod
+    def _cast(section: memoryview, kind: Text):
+        if sys.byteorder == "little":
+            return section.cast(kind)
+        # Máy big-endian phải sao chép ra để đảo byte
+        column = array(kind, section.tobytes())
+        column.byteswap()
+        return column
+
+    def string(self, index: int) -> Text:
+        """Giải mã chuỗi thứ `index` trong heap"""
+        return str(self._heap[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def strings(self, start: int, count: int) -> Tuple[Text, ...]:
+        """Giải mã một danh sách chuỗi trong bảng refs"""
+        return tuple(self.string(index) for index in self._refs[start:start + count])
+
+    def nganh_list(self) -> List["MappedNganh"]:
+        """
+        Danh sách ngành đọc từ snapshot, dùng như danh sách ngành của NganhCatalog
+
+        Mỗi lần gọi tạo các bản ghi mới; bản thân bản ghi chỉ giữ mã, tên, khối
+        và vị trí của các đoạn văn trong file.
+
+        Returns:
+            list: Danh sách MappedNganh theo thứ tự trong nganh.json
+        """
+        short: Dict[int, Text] = {}
+
+        def short_string(index: int) -> Text:
+            text = short.get(index)
+            if text is None:
+                text = short[index] = sys.intern(self.string(index))
+            return text
+
+        return [MappedNganh(self, row, fields, short_string)
+                for row, fields in enumerate(RECORD.iter_unpack(self._records))]
+
+
+class MappedNganh(NganhBase):
+    """
+    Bản ghi ngành đọc từ MappedSnapshot.
+
+    Mã ngành, tên ngành và mã khối (dùng cho chỉ mục tra cứu) được giải mã và
+    intern khi mở snapshot; đoạn giới thiệu và cơ hội việc làm được giải mã từ
+    file mỗi lần được đọc.
+    """
+
+    __slots__ = ("ma_nganh", "ten_nganh", "khoi_xet_tuyen", "_snapshot", "_matrix", "_row",
+                 "_present", "_integral", "_text", "_co_hoi", "_extra_id")
+
+    def __init__(self, snapshot: MappedSnapshot, row: int, fields: Tuple[int, ...], short_string):
+        (self._present, self._integral, ma_nganh, ten_nganh, self._text,
+         co_hoi_start, co_hoi_count, khoi_start, khoi_count, self._extra_id) = fields
+        self.ma_nganh = short_string(ma_nganh)
+        self.ten_nganh = short_string(ten_nganh)
+        self.khoi_xet_tuyen = tuple(short_string(index)
+                                    for index in snapshot._refs[khoi_start:khoi_start + khoi_count])
+        self._co_hoi = (co_hoi_start, co_hoi_count)
+        self._snapshot = snapshot
+        self._matrix = snapshot.matrix
+        self._row = row
+
+    @property
+    def gioi_thieu_chung(self) -> Text:
+        return self._snapshot.string(self._text)
+
+    @property
+    def co_hoi_viec_lam(self) -> Tuple[Text, ...]:
+        return self._snapshot.strings(*self._co_hoi)
+
+    @property
+    def _extra(self) -> Optional[Dict[Text, Any]]:
+        if self._extra_id == NO_STRING:
+            return None
+        return json.loads(self._snapshot.string(self._extra_id))
+
+
+def open_snapshot(path: Text) -> List[MappedNganh]:
+    """
+    Mở snapshot nhị phân và lấy danh sách ngành
+
+    Args:
+        path (str): Đường dẫn file snapshot
+
+    Returns:
+        list: Danh sách MappedNganh
+
+    Raises:
+        CatalogError: Nếu file không phải snapshot, khác phiên bản định dạng hoặc sai checksum
+    """
+    return MappedSnapshot(path).nganh_list()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Chuyển nganh.json thành snapshot nhị phân dùng chung qua mmap. "
+                    "Trỏ NGANH_JSON_PATH tới file .bin để các tiến trình action server dùng snapshot.")
+    parser.add_argument("source", nargs="?", default=NGANH_JSON_PATH, help="file nganh.json")
+    parser.add_argument("target", nargs="?", help="file snapshot, mặc định cùng tên với đuôi .bin")
+    args = parser.parse_args()
+
+    target = args.target or os.path.splitext(args.source)[0] + ".bin"
+    info = convert(args.source, target)
+    print(f"Đã ghi {target}: {info['nganh']} ngành, {info['years']} năm, "
+          f"{info['strings']} chuỗi, {info['bytes'] / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+import argparse
+import codecs
+import csv
+import json
+import math
+import sys
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Text, Tuple
+
+from .catalog import NganhCatalog, get_catalog
+from .khoi_thi import KHOI_THI_REGISTRY, mask_of
+from .mon_hoc import DIEM_MON_TOI_DA, MON_HOC_ALIASES
+from .normalize import fold_diacritics
+from .score_analytics import get_score_analytics
+from .score_index import get_khoi_index, get_score_index
+
+# Định dạng dữ liệu vào/ra được hỗ trợ và content type tương ứng
+FORMATS = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson; charset=utf-8"}
+
+# Tên cột (không dấu, chữ thường) chứa mã học sinh và tổng điểm
+ID_COLUMNS = ("id", "ma hoc sinh", "sbd", "so bao danh")
+TONG_DIEM_COLUMNS = ("tong diem", "tong", "diem")
+
+# Giống các hành động tư vấn trong khung chat: tối đa 26 ngành, xét 3 khối điểm cao nhất,
+# tư vấn theo tổng điểm nhận cả ngành có điểm chuẩn cao hơn tối đa 2 điểm
+SO_NGANH_TOI_DA = 26
+SO_KHOI_TOI_DA = 3
+BIEN_DO_TONG_DIEM = 2
+
+# Tổng điểm hợp lệ của ba môn xét tuyển
+TONG_DIEM_TOI_DA = 3 * DIEM_MON_TOI_DA
+
+# Lỗi của mọi dòng khi danh mục chưa có điểm chuẩn năm nào
+NO_CUTOFF_MESSAGE = "Chưa có thông tin điểm chuẩn các ngành"
+
+# Số lời tư vấn (theo tổ hợp điểm) được ghi nhớ tối đa trong một lần chạy
+ADVICE_CACHE_SIZE = 16384
+
+# Các cột của kết quả dạng CSV, mỗi dòng là một ngành được gợi ý cho một học sinh
+CSV_COLUMNS = ("id", "nam", "tong_diem", "hang", "ten_nganh", "ma_khoi", "diem", "diem_chuan", "chenh_lech", "loi")
+
+# Cách gọi của từng môn (không dấu) -> môn, dùng để nhận tên cột
+_MON_COLUMNS = {fold_diacritics(alias): mon for mon, aliases in MON_HOC_ALIASES.items() for alias in aliases}
+
+
+def _column_key(name: Text) -> Text:
+    return " ".join(fold_diacritics(name.strip().lower()).replace("_", " ").split())
+
+
+def _parse_score(value: Any) -> Optional[float]:
+    # "nan", "inf" và NaN của JSON không phải điểm: NaN làm hỏng thứ tự khi tra điểm chuẩn theo lô
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        diem = float(value)
+    else:
+        try:
+            diem = float(str(value).strip().replace(",", "."))
+        except ValueError:
+            return None
+    return diem if math.isfinite(diem) else None
+
+
+class Advice(NamedTuple):
+    """Lời tư vấn cho một học sinh"""
+    id: Text
+    nam: Optional[Text]
+    tong_diem: Optional[float]
+    # Các cặp (mã khối, điểm khối) được xét, rỗng khi tư vấn theo tổng điểm
+    khoi: Tuple[Tuple[Text, float], ...]
+    # Các bộ (tên ngành, mã khối, điểm, điểm chuẩn, chênh lệch)
+    nganh: Tuple[Tuple[Text, Text, float, float, float], ...]
+    loi: Optional[Text]
+    # Khóa của tổ hợp điểm: các học sinh cùng khóa có cùng danh sách ngành
+    key: Optional[Tuple]
+
+
+class BulkAdvisor:
+    """
+    Tư vấn ngành cho nhiều học sinh cùng lúc bằng đúng logic của khung chat.
+
+    Học sinh có từ 3 môn trở lên được tư vấn như ActionTuVanTheoMonVaDiem (quy
+    ra các khối, gợi ý theo 3 khối điểm cao nhất); học sinh chỉ có tổng điểm
+    được tư vấn như ActionTuVanNganhTheoDiem. Mỗi lô được tính bằng các hàm
+    theo lô của chỉ mục điểm chuẩn (within_many, recommend_many), tên cột chỉ
+    được nhận dạng một lần cho mỗi tên. Học sinh trùng tổ hợp khối và điểm
+    (thường gặp vì điểm thi được chấm theo bậc 0,2 hoặc 0,25) dùng lại lời tư
+    vấn đã tính.
+    """
+
+    def __init__(self, nganh_list: List[Dict[Text, Any]], nam: Optional[Text] = None):
+        self.nam = nam or get_score_analytics(nganh_list).latest_year
+        self.year_index = get_score_index(nganh_list).year(self.nam) if self.nam else None
+        self.khoi_index = get_khoi_index(nganh_list)
+        self._cache: Dict[Tuple, Tuple] = {}
+        # tên cột -> ("id" | "tong" | môn | None)
+        self._columns: Dict[Text, Optional[Text]] = {}
+        self.cache_hits = 0
+
+    def _column(self, name: Text) -> Optional[Text]:
+        kind = self._columns.get(name, "")
+        if kind == "":
+            key = _column_key(name)
+            if key in ID_COLUMNS:
+                kind = "id"
+            elif key in TONG_DIEM_COLUMNS:
+                kind = "tong"
+            else:
+                kind = _MON_COLUMNS.get(key)
+            self._columns[name] = kind
+        return kind
+
+    def _row_scores(self, row: Dict[Text, Any]) -> Tuple[Text, Dict[Text, float], Optional[float]]:
+        # (mã học sinh, điểm từng môn, tổng điểm) của một dòng dữ liệu
+        ident = None
+        subjects: Dict[Text, float] = {}
+        total = None
+        for column, value in row.items():
+            if value is None or value == "":
+                continue
+            kind = self._column(column)
+            if kind is None:
+                continue
+            if kind == "id":
+                ident = ident or str(value).strip()
+            elif kind == "tong":
+                total = _parse_score(value)
+            else:
+                diem = _parse_score(value)
+                if diem is not None and 0 <= diem <= DIEM_MON_TOI_DA:
+                    subjects.setdefault(kind, diem)
+        return ident or str(row.get("_dong", "")), subjects, total
+
+    @staticmethod
+    def _khoi_key(subjects: Dict[Text, float]) -> Tuple:
+        # Các khối đủ môn, điểm cao nhất trước, như ActionTuVanTheoMonVaDiem
+        matching_blocks = [(khoi.ma_khoi, sum(subjects[mon] for mon in khoi.mon))
+                           for khoi in KHOI_THI_REGISTRY.satisfiable(mask_of(subjects))]
+        matching_blocks.sort(key=lambda x: x[1], reverse=True)
+        return "khoi", tuple(matching_blocks[:SO_KHOI_TOI_DA])
+
+    def _remember(self, key: Tuple, nganh: Tuple) -> None:
+        if len(self._cache) >= ADVICE_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = nganh
+
+    def advise(self, rows: List[Dict[Text, Any]]) -> List[Advice]:
+        """
+        Tư vấn cho một lô học sinh
+
+        Args:
+            rows (list): Các dòng dữ liệu {tên cột: giá trị}; cột môn được nhận theo
+                tên môn (có dấu hoặc không), cột tổng điểm là "tong_diem"
+
+        Returns:
+            list: Các Advice theo đúng thứ tự các dòng
+        """
+        parsed = []
+        for row in rows:
+            ident, subjects, total = self._row_scores(row)
+            if row.get("_loi"):
+                parsed.append((ident, None, None, row["_loi"]))
+            elif not self.nam:
+                parsed.append((ident, None, None, NO_CUTOFF_MESSAGE))
+            elif len(subjects) >= 3:
+                parsed.append((ident, self._khoi_key(subjects), round(sum(subjects.values()), 2), None))
+            elif total and not 0 < total <= TONG_DIEM_TOI_DA:
+                parsed.append((ident, None, None, f"Tổng điểm phải nằm trong khoảng 0-{TONG_DIEM_TOI_DA:g}"))
+            elif total:
+                parsed.append((ident, ("tong", total), total, None))
+            else:
+                parsed.append((ident, None, None, "Cần điểm ít nhất 3 môn hoặc tổng điểm"))
+
+        # Chỉ các tổ hợp chưa có trong bộ nhớ đệm mới phải tính, mỗi loại một lần gọi theo lô
+        pending = {key for _, key, _, _ in parsed if key is not None and key not in self._cache}
+        # Danh mục chưa có điểm chuẩn thì mọi dòng đã thành lỗi ở trên, không có gì để tra
+        totals = sorted(key[1] for key in pending if key[0] == "tong")
+        if self.nam and totals:
+            for total, entries in zip(totals, self.year_index.within_many(totals, BIEN_DO_TONG_DIEM,
+                                                                          SO_NGANH_TOI_DA)):
+                self._remember(("tong", total), tuple((entry.ten_nganh, entry.ma_khoi, total, entry.diem_chuan,
+                                                       round(total - entry.diem_chuan, 2)) for entry in entries))
+        blocks = [key for key in pending if key[0] == "khoi"]
+        if self.nam and blocks:
+            for key, goi_y in zip(blocks, self.khoi_index.recommend_many(self.nam, [key[1] for key in blocks],
+                                                                           limit=SO_NGANH_TOI_DA)):
+                self._remember(key, tuple((nganh.ten_nganh, nganh.ma_khoi, nganh.diem_dat, nganh.diem_chuan,
+                                           round(nganh.chenh_lech, 2)) for nganh in goi_y))
+        self.cache_hits += sum(key is not None for _, key, _, _ in parsed) - len(pending)
+
+        result = []
+        for ident, key, tong_diem, loi in parsed:
+            if key is None:
+                result.append(Advice(ident, self.nam, None, (), (), loi, None))
+                continue
+            nganh = self._cache.get(key)
+            if nganh is None:
+                # Bộ nhớ đệm đã được làm mới giữa lô
+                nganh = self._compute(key)
+            khoi = key[1] if key[0] == "khoi" else ()
+            if key[0] == "khoi" and not khoi:
+                loi = "Không xác định được khối thi từ các môn đã nhập"
+            result.append(Advice(ident, self.nam, tong_diem, khoi, nganh, loi, key))
+        return result
+
+    def _compute(self, key: Tuple) -> Tuple:
+        if key[0] == "tong":
+            total = key[1]
+            return tuple((entry.ten_nganh, entry.ma_khoi, total, entry.diem_chuan, round(total - entry.diem_chuan, 2))
+                         for entry in self.year_index.within(total, BIEN_DO_TONG_DIEM, SO_NGANH_TOI_DA))
+        return tuple((nganh.ten_nganh, nganh.ma_khoi, nganh.diem_dat, nganh.diem_chuan, round(nganh.chenh_lech, 2))
+                     for nganh in self.khoi_index.recommend(self.nam, key[1], limit=SO_NGANH_TOI_DA))
+
+
+class RowDecoder:
+    """
+    Tách dữ liệu vào (CSV có dòng tiêu đề hoặc JSONL) thành các dòng khi dữ liệu đến dần.
+
+    Dữ liệu được nhận theo từng đoạn byte bất kỳ; chỉ phần dòng chưa trọn được
+    giữ lại. Một bản ghi CSV có thể trải qua nhiều dòng nếu có ô trong ngoặc
+    kép, nên bản ghi chỉ được tách khi số dấu ngoặc kép là chẵn. Mỗi dòng được
+    gắn số thứ tự `_dong`; dòng JSONL hỏng được gắn `_loi` thay vì dừng cả lô.
+    """
+
+    def __init__(self, fmt: Text):
+        if fmt not in FORMATS:
+            raise ValueError(f"Định dạng '{fmt}' không được hỗ trợ, chọn một trong: {', '.join(FORMATS)}")
+        self.format = fmt
+        # utf-8-sig bỏ BOM ở đầu file CSV do Excel xuất ra
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._buffer = ""
+        self._record: List[Text] = []
+        self._quotes = 0
+        self._header: Optional[List[Text]] = None
+        self.count = 0
+
+    def feed(self, data: bytes, final: bool = False) -> List[Dict[Text, Any]]:
+        """
+        Nhận thêm một đoạn dữ liệu
+
+        Args:
+            data (bytes): Đoạn dữ liệu tiếp theo
+            final (bool): Đây là đoạn cuối cùng
+
+        Returns:
+            list: Các dòng đã trọn trong phần dữ liệu nhận được đến giờ
+        """
+        text = self._buffer + self._decoder.decode(data, final)
+        lines = text.split("\n")
+        self._buffer = "" if final else lines.pop()
+        rows = []
+        for line in lines:
+            row = self._line(line.rstrip("\r"))
+            if row is not None:
+                rows.append(row)
+        if final and self._record:
+            row = self._csv_record()
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def close(self) -> List[Dict[Text, Any]]:
+        """Các dòng còn lại khi hết dữ liệu"""
+        return self.feed(b"", final=True)
+
+    def _line(self, line: Text) -> Optional[Dict[Text, Any]]:
+        if self.format == "jsonl":
+            if not line.strip():
+                return None
+            self.count += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                return {"_dong": self.count, "_loi": "Dòng không phải JSON hợp lệ"}
+            if not isinstance(row, dict):
+                return {"_dong": self.count, "_loi": "Mỗi dòng phải là một object JSON"}
+            row["_dong"] = self.count
+            return row
+
+        self._record.append(line)
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            return None
+        return self._csv_record()
+
+    def _csv_record(self) -> Optional[Dict[Text, Any]]:
+        record = "\n".join(self._record)
+        self._record = []
+        self._quotes = 0
+        if not record.strip():
+            return None
+        values = next(csv.reader([record]), [])
+        if self._header is None:
+            self._header = values
+            return None
+        self.count += 1
+        row: Dict[Text, Any] = dict(zip(self._header, values))
+        row["_dong"] = self.count
+        return row
+
+
+class AdviceWriter:
+    """
+    Ghi lời tư vấn ra JSONL (một học sinh mỗi dòng) hoặc CSV (một ngành được gợi ý mỗi dòng).
+
+    Phần danh sách ngành đã định dạng được ghi nhớ theo khóa tổ hợp điểm, nên
+    các học sinh trùng tổ hợp chỉ tốn phần ghép mã học sinh; từng ngành đã
+    định dạng cũng được ghi nhớ vì lặp lại giữa các tổ hợp gần nhau.
+    """
+
+    def __init__(self, fmt: Text):
+        if fmt not in FORMATS:
+            raise ValueError(f"Định dạng '{fmt}' không được hỗ trợ, chọn một trong: {', '.join(FORMATS)}")
+        self.format = fmt
+        self._fragments: Dict[Tuple, Any] = {}
+        self._items: Dict[Tuple, Text] = {}
+
+    def header(self) -> Text:
+        """Phần mở đầu của kết quả"""
+        return ",".join(CSV_COLUMNS) + "\r\n" if self.format == "csv" else ""
+
+    def _fragment(self, advice: Advice) -> Any:
+        fragment = self._fragments.get(advice.key) if advice.key is not None else None
+        if fragment is not None:
+            return fragment
+        if self.format == "jsonl":
+            khoi = ""
+            if advice.khoi:
+                khoi = '"khoi": ' + json.dumps([{"ma_khoi": ma_khoi, "diem": diem} for ma_khoi, diem in advice.khoi],
+                                               ensure_ascii=False) + ", "
+            fragment = khoi + '"nganh": [' + ", ".join(map(self._item, advice.nganh)) + "]}"
+        else:
+            fragment = [f"{i},{self._item(nganh)}" for i, nganh in enumerate(advice.nganh, 1)]
+        if advice.key is not None:
+            if len(self._fragments) >= ADVICE_CACHE_SIZE:
+                self._fragments.clear()
+            self._fragments[advice.key] = fragment
+        return fragment
+
+    def _item(self, nganh: Tuple) -> Text:
+        item = self._items.get(nganh)
+        if item is None:
+            if self.format == "jsonl":
+                item = json.dumps(dict(zip(("ten_nganh", "ma_khoi", "diem", "diem_chuan", "chenh_lech"), nganh)),
+                                  ensure_ascii=False)
+            else:
+                item = _csv_line(nganh + ("",))
+            if len(self._items) >= ADVICE_CACHE_SIZE:
+                self._items.clear()
+            self._items[nganh] = item
+        return item
+
+    def write(self, advices: Iterable[Advice]) -> Text:
+        """
+        Định dạng một lô lời tư vấn
+
+        Returns:
+            str: Các dòng kết quả, mỗi dòng kết thúc bằng xuống dòng
+        """
+        parts = []
+        for advice in advices:
+            if self.format == "jsonl":
+                head = json.dumps({"id": advice.id, "nam": advice.nam, "tong_diem": advice.tong_diem,
+                                   "loi": advice.loi}, ensure_ascii=False)
+                parts.append(head[:-1] + ", " + self._fragment(advice) + "\n")
+                continue
+            prefix = _csv_line((advice.id, advice.nam or "", "" if advice.tong_diem is None else advice.tong_diem))
+            lines = self._fragment(advice)
+            if advice.loi or not lines:
+                parts.append(prefix + ",,,,,,," + _csv_field(advice.loi or "") + "\r\n")
+            else:
+                parts.extend(prefix + "," + line + "\r\n" for line in lines)
+        return "".join(parts)
+
+
+def _csv_field(value: Any) -> Text:
+    text = str(value)
+    if any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _csv_line(values: Iterable[Any]) -> Text:
+    return ",".join(_csv_field(value) for value in values)
+
+
+def advise_stream(chunks: Iterable[bytes], nganh_list: List[Dict[Text, Any]], input_format: Text = "csv",
+                  output_format: Text = "jsonl") -> Iterable[Text]:
+    """
+    Tư vấn cho một luồng dữ liệu vào, trả kết quả theo từng lô
+
+    Chỉ một đoạn dữ liệu vào và kết quả của nó nằm trong bộ nhớ tại một thời điểm.
+
+    Args:
+        chunks (iterable): Các đoạn byte của dữ liệu vào
+        nganh_list (list): Danh sách ngành dùng để tư vấn
+        input_format (str): "csv" hoặc "jsonl"
+        output_format (str): "csv" hoặc "jsonl"
+
+    Returns:
+        iterable: Các đoạn văn bản của kết quả
+    """
+    decoder = RowDecoder(input_format)
+    writer = AdviceWriter(output_format)
+    advisor = BulkAdvisor(nganh_list)
+    header = writer.header()
+    if header:
+        yield header
+    for chunk in chunks:
+        rows = decoder.feed(chunk)
+        if rows:
+            yield writer.write(advisor.advise(rows))
+    rows = decoder.close()
+    if rows:
+        yield writer.write(advisor.advise(rows))
+
+
+def _read_chunks(file, size: int = 1 << 20) -> Iterable[bytes]:
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Tư vấn ngành cho cả lớp học sinh từ file CSV/JSONL điểm từng môn hoặc tổng điểm. "
+                    "Cột môn được nhận theo tên môn (Toán, Vật lý, tieng_anh...), cột tổng điểm là tong_diem, "
+                    "cột mã học sinh là id hoặc sbd.")
+    parser.add_argument("input", help="file dữ liệu vào, '-' để đọc từ stdin")
+    parser.add_argument("-o", "--output", default="-", help="file kết quả, mặc định ghi ra stdout")
+    parser.add_argument("--input-format", choices=list(FORMATS), help="mặc định theo đuôi file vào, nếu không thì csv")
+    parser.add_argument("--output-format", choices=list(FORMATS), help="mặc định theo đuôi file kết quả, nếu không thì jsonl")
+    parser.add_argument("--source", help="file danh mục ngành, mặc định là danh mục của action server")
+    args = parser.parse_args()
+
+    input_format = args.input_format or ("jsonl" if args.input.endswith((".jsonl", ".ndjson")) else "csv")
+    output_format = args.output_format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    catalog = NganhCatalog(args.source) if args.source else get_catalog()
+
+    start = time.perf_counter()
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, 'rb')
+    target = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8', newline='')
+    lines = 0
+    try:
+        for part in advise_stream(_read_chunks(source), catalog.nganh_list, input_format, output_format):
+            target.write(part)
+            lines += part.count("\n")
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    print(f"Đã ghi {lines} dòng kết quả trong {time.perf_counter() - start:.2f} giây", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Mapping, Optional, Text, Tuple
+
+from .metrics import REGISTRY, tenant_label
+from .nganh_model import compact_nganh_list
+
+logger = logging.getLogger(__name__)
+
+# Đường dẫn mặc định đến file nganh.json
+NGANH_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nganh.json")
+
+# Tên trường của danh mục mặc định
+TEN_TRUONG = "Trường Đại học Giao thông Vận tải TP.HCM"
+
+# Khoảng thời gian tối thiểu (giây) giữa hai lần kiểm tra file có thay đổi hay không
+RELOAD_CHECK_INTERVAL = float(os.environ.get("NGANH_RELOAD_INTERVAL", "2.0"))
+
+# Các trường bắt buộc của một ngành và kiểu dữ liệu tương ứng
+REQUIRED_FIELDS = {
+    "ma_nganh": str,
+    "ten_nganh": str,
+    "gioi_thieu_chung": str,
+    "co_hoi_viec_lam": list,
+    "khoi_xet_tuyen": list,
+    "diem_chuan": dict,
+}
+
+
+class CatalogError(ValueError):
+    """
+    Lỗi khi dữ liệu ngành không hợp lệ
+    """
+
+
+def validate_nganh_data(data: Any) -> List[Dict[Text, Any]]:
+    """
+    Kiểm tra cấu trúc dữ liệu đọc từ nganh.json
+
+    Args:
+        data: Dữ liệu đã được json.load
+
+    Returns:
+        list: Danh sách ngành hợp lệ
+
+    Raises:
+        CatalogError: Nếu dữ liệu sai cấu trúc
+    """
+    if not isinstance(data, list):
+        raise CatalogError("Dữ liệu ngành phải là một danh sách")
+
+    for i, nganh in enumerate(data):
+        if not isinstance(nganh, dict):
+            raise CatalogError(f"Phần tử thứ {i} không phải là một ngành")
+        for field, kieu in REQUIRED_FIELDS.items():
+            if field not in nganh:
+                raise CatalogError(f"Ngành thứ {i} thiếu trường '{field}'")
+            if not isinstance(nganh[field], kieu):
+                raise CatalogError(f"Trường '{field}' của ngành thứ {i} phải có kiểu {kieu.__name__}")
+        if not nganh["ten_nganh"].strip():
+            raise CatalogError(f"Ngành thứ {i} có tên rỗng")
+        for nam, diem in nganh["diem_chuan"].items():
+            if not str(nam).isdigit():
+                raise CatalogError(f"Năm '{nam}' của ngành '{nganh['ten_nganh']}' không hợp lệ")
+            if diem is not None and not isinstance(diem, (int, float)):
+                raise CatalogError(f"Điểm chuẩn năm {nam} của ngành '{nganh['ten_nganh']}' không hợp lệ")
+    return data
+
+
+def load_nganh_file(path: Text) -> List[Mapping[Text, Any]]:
+    """
+    Đọc danh mục từ nganh.json hoặc từ snapshot nhị phân (xem binary_snapshot)
+
+    Args:
+        path (str): Đường dẫn file, loại file được nhận ra qua nội dung
+
+    Returns:
+        list: Danh sách bản ghi ngành
+
+    Raises:
+        CatalogError: Nếu dữ liệu sai cấu trúc hoặc snapshot hỏng
+    """
+    from .binary_snapshot import is_snapshot_file, open_snapshot  # binary_snapshot phụ thuộc module này
+
+    if is_snapshot_file(path):
+        return open_snapshot(path)
+    with open(path, 'r', encoding='utf-8') as file:
+        return compact_nganh_list(validate_nganh_data(json.load(file)))
+
+
+def artifacts_path(path: Text) -> Text:
+    """Đường dẫn file cấu trúc dựng sẵn (xem compiler) của một file nganh.json"""
+    return os.environ.get("NGANH_ARTIFACTS_PATH") or os.path.splitext(path)[0] + ".artifacts"
+
+
+def load_catalog(path: Text) -> Tuple[List[Mapping[Text, Any]], Dict[Text, Any]]:
+    """
+    Đọc danh mục kèm các cấu trúc dựng sẵn nếu có
+
+    Nếu `python -m actions.compiler` đã dựng sẵn các cấu trúc từ đúng nội dung
+    hiện tại của file, danh sách ngành và các cấu trúc được nạp thẳng từ file
+    dựng sẵn; ngược lại chỉ đọc danh mục và các cấu trúc được dựng khi cần.
+
+    Args:
+        path (str): Đường dẫn file danh mục
+
+    Returns:
+        tuple: (danh sách bản ghi ngành, {tên cấu trúc: cấu trúc})
+    """
+    if os.path.exists(artifacts_path(path)):
+        from .compiler import load_compiled  # compiler phụ thuộc các module dùng catalog
+
+        compiled = load_compiled(path)
+        if compiled is not None:
+            return compiled
+    return load_nganh_file(path), {}
+
+
+RELOAD_SECONDS = REGISTRY.histogram(
+    "catalog_reload_seconds", "Thời gian đọc và kiểm tra danh mục mỗi lần nạp thành công", ["tenant"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0))
+RELOAD_ERRORS = REGISTRY.counter(
+    "catalog_reload_errors_total", "Số lần nạp danh mục thất bại (vẫn dùng phiên bản cũ)", ["tenant"])
+
+# Số hiệu duy nhất trong tiến trình của mỗi snapshot, dùng làm khóa bộ đệm
+_snapshot_keys = itertools.count(1)
+
+# Snapshot của các danh mục đang sống, theo id của danh sách ngành
+_snapshots: "weakref.WeakValueDictionary[int, CatalogSnapshot]" = weakref.WeakValueDictionary()
+
+
+class CatalogSnapshot:
+    """
+    Một phiên bản bất biến của danh mục ngành.
+
+    Các cấu trúc dẫn xuất (chỉ mục, bộ đệm...) được gắn vào snapshot qua
+    `artifact`, nên chúng tự động bị bỏ đi khi có phiên bản mới. Mỗi snapshot
+    thuộc về một danh mục (một trường), nên các bộ đệm gắn vào snapshot không
+    bao giờ dùng chung giữa các trường.
+    """
+
+    def __init__(self, version: int, nganh_list: List[Dict[Text, Any]], source_mtime: Optional[float] = None,
+                 artifacts: Optional[Dict[Text, Any]] = None, catalog: Optional["NganhCatalog"] = None):
+        self.version = version
+        self.nganh_list = nganh_list
+        self.source_mtime = source_mtime
+        self.loaded_at = time.time()
+        self.key = next(_snapshot_keys)
+        self.tenant = catalog.tenant if catalog is not None else None
+        self.ten_truong = catalog.ten_truong if catalog is not None else TEN_TRUONG
+        self._catalog = weakref.ref(catalog) if catalog is not None else None
+        self._artifacts: Dict[Text, Any] = dict(artifacts or {})
+        self._lock = threading.Lock()
+        if catalog is not None:
+            _snapshots[id(nganh_list)] = self
+
+    @property
+    def catalog(self) -> Optional["NganhCatalog"]:
+        """Danh mục đã nạp snapshot này, None nếu là snapshot tạm"""
+        return self._catalog() if self._catalog is not None else None
+
+    def artifact(self, name: Text, builder: Callable[["CatalogSnapshot"], Any]) -> Any:
+        """
+        Lấy cấu trúc dẫn xuất theo tên, xây dựng một lần duy nhất cho snapshot này
+
+        Args:
+            name (str): Tên cấu trúc
+            builder (callable): Hàm nhận snapshot và trả về cấu trúc cần xây dựng
+
+        Returns:
+            Cấu trúc đã được xây dựng
+        """
+        try:
+            return self._artifacts[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._artifacts:
+                self._artifacts[name] = builder(self)
+            return self._artifacts[name]
+
+
+class NganhCatalog:
+    """
+    Danh mục ngành thường trú trong bộ nhớ, tự nạp lại khi file nguồn thay đổi.
+
+    File được đọc một lần; sau đó mỗi lần truy cập chỉ kiểm tra mtime của file
+    (tối đa một lần mỗi `check_interval` giây). Khi file đổi, dữ liệu mới được
+    kiểm tra rồi mới thay thế snapshot cũ. Nếu file mới bị lỗi, snapshot hợp lệ
+    gần nhất vẫn được giữ lại. Các ngành được lưu dưới dạng bản ghi Nganh gọn
+    (xem nganh_model), điểm chuẩn nằm trong một ma trận năm × ngành dùng chung.
+    File nguồn có thể là snapshot nhị phân (xem binary_snapshot), khi đó các
+    tiến trình dùng chung dữ liệu qua mmap. Khi chạy cho nhiều trường, mỗi
+    trường có một danh mục riêng (xem tenants).
+    """
+
+    def __init__(self, path: Text = NGANH_JSON_PATH, check_interval: float = RELOAD_CHECK_INTERVAL,
+                 tenant: Optional[Text] = None, ten_truong: Text = TEN_TRUONG):
+        self.path = path
+        self.check_interval = check_interval
+        self.tenant = tenant
+        self.ten_truong = ten_truong
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+        self._prebuilt: Dict[Text, Callable[[CatalogSnapshot], Any]] = {}
+        self._last_check = 0.0
+        self._last_stat = None
+        self._snapshot = CatalogSnapshot(0, [])
+        _catalogs.add(self)
+        self.last_error: Optional[Text] = None
+        self.last_reload_seconds: Optional[float] = None
+        self.reload(force=True)
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Snapshot hiện hành, có kiểm tra thay đổi của file nguồn"""
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.reload()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Số phiên bản của danh mục, tăng mỗi lần nạp lại thành công"""
+        return self.snapshot.version
+
+    @property
+    def nganh_list(self) -> List[Dict[Text, Any]]:
+        """Danh sách ngành của snapshot hiện hành"""
+        return self.snapshot.nganh_list
+
+    def add_reload_listener(self, listener: Callable[[CatalogSnapshot], None]) -> None:
+        """
+        Đăng ký hàm được gọi mỗi khi có snapshot mới
+
+        Args:
+            listener (callable): Hàm nhận snapshot mới
+        """
+        self._listeners.append(listener)
+
+    def prebuild_artifact(self, name: Text, builder: Callable[[CatalogSnapshot], Any]) -> None:
+        """
+        Xây cấu trúc dẫn xuất ngay cho snapshot hiện hành và cho mỗi snapshot mới,
+        thay vì đợi lượt hội thoại đầu tiên cần đến nó
+
+        Args:
+            name (str): Tên cấu trúc
+            builder (callable): Hàm nhận snapshot và trả về cấu trúc cần xây dựng
+        """
+        if name in self._prebuilt:
+            return
+        with self._lock:
+            if name in self._prebuilt:
+                return
+            self._prebuilt[name] = builder
+            self._listeners.append(lambda snapshot: snapshot.artifact(name, builder))
+        self._snapshot.artifact(name, builder)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        # File cấu trúc dựng sẵn được biên dịch lại cũng cần nạp lại
+        try:
+            compiled = os.stat(artifacts_path(self.path))
+            compiled_stat = (compiled.st_mtime_ns, compiled.st_size)
+        except OSError:
+            compiled_stat = None
+        return (st.st_mtime_ns, st.st_size, compiled_stat)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Nạp lại dữ liệu nếu file nguồn đã thay đổi
+
+        Args:
+            force (bool): Nạp lại kể cả khi file không đổi
+
+        Returns:
+            bool: True nếu đã thay snapshot mới
+        """
+        with self._lock:
+            self._last_check = time.monotonic()
+            stat = self._stat()
+            if not force and stat == self._last_stat:
+                return False
+            # Ghi nhận trạng thái file trước khi đọc, để file lỗi không bị đọc lại liên tục
+            self._last_stat = stat
+
+            start = time.perf_counter()
+            try:
+                nganh_list, artifacts = load_catalog(self.path)
+            except Exception as e:
+                self.last_error = str(e)
+                RELOAD_ERRORS.inc(tenant_label(self.tenant))
+                if self._snapshot.version:
+                    logger.error(f"Lỗi khi đọc file danh mục, tiếp tục dùng phiên bản {self._snapshot.version}: {e}")
+                else:
+                    logger.error(f"Lỗi khi đọc file danh mục: {e}")
+                return False
+
+            snapshot = CatalogSnapshot(self._snapshot.version + 1, nganh_list,
+                                       stat[0] / 1e9 if stat else None, artifacts, self)
+            self._snapshot = snapshot
+            self.last_error = None
+            self.last_reload_seconds = time.perf_counter() - start
+            RELOAD_SECONDS.observe(self.last_reload_seconds, tenant_label(self.tenant))
+            listeners = list(self._listeners)
+
+        logger.info(f"Đã nạp danh mục ngành phiên bản {snapshot.version} ({len(snapshot.nganh_list)} ngành)")
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.exception(f"Lỗi khi xử lý sự kiện nạp lại danh mục: {e}")
+        return True
+
+
+# Các danh mục đang sống trong tiến trình, để đọc số liệu
+_catalogs: "weakref.WeakSet[NganhCatalog]" = weakref.WeakSet()
+
+
+def live_snapshots() -> List[CatalogSnapshot]:
+    """Snapshot hiện hành của mọi danh mục đang sống, không kiểm tra file nguồn"""
+    return [catalog._snapshot for catalog in list(_catalogs)]
+
+
+def _collect_metrics():
+    versions, sizes = [], []
+    for snapshot in live_snapshots():
+        labels = {"tenant": tenant_label(snapshot.tenant)}
+        versions.append(("", labels, snapshot.version))
+        sizes.append(("", labels, len(snapshot.nganh_list)))
+    yield "catalog_version", "gauge", "Phiên bản hiện hành của danh mục", versions
+    yield "catalog_nganh", "gauge", "Số ngành trong phiên bản hiện hành của danh mục", sizes
+
+
+REGISTRY.add_collector(_collect_metrics)
+
+_catalog: Optional[NganhCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> NganhCatalog:
+    """
+    Lấy danh mục ngành dùng chung của tiến trình, khởi tạo ở lần gọi đầu tiên
+
+    Returns:
+        NganhCatalog: Danh mục ngành
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = NganhCatalog(os.environ.get("NGANH_JSON_PATH", NGANH_JSON_PATH))
+    return _catalog
+
+
+def set_catalog(catalog: NganhCatalog) -> None:
+    """
+    Thay danh mục dùng chung (dùng khi đo hiệu năng hoặc chạy với dữ liệu khác)
+
+    Args:
+        catalog (NganhCatalog): Danh mục mới
+    """
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
+
+
+def snapshot_of(nganh_list: List[Dict[Text, Any]]) -> Optional[CatalogSnapshot]:
+    """
+    Tìm snapshot của danh mục đã nạp danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        CatalogSnapshot: Snapshot chứa đúng danh sách này, None nếu danh sách
+        không do một NganhCatalog nạp hoặc snapshot đã bị thu hồi
+    """
+    snapshot = _snapshots.get(id(nganh_list))
+    # id có thể được dùng lại sau khi danh sách cũ bị thu hồi
+    if snapshot is None or snapshot.nganh_list is not nganh_list:
+        return None
+    return snapshot
+
+
+def get_artifact(nganh_list: List[Dict[Text, Any]], name: Text,
+                 builder: Callable[[CatalogSnapshot], Any]) -> Any:
+    """
+    Lấy cấu trúc dẫn xuất của một danh sách ngành
+
+    Danh sách do một danh mục nạp (danh mục dùng chung hoặc của một trường) dùng
+    lại cấu trúc đã xây cho snapshot của nó; danh sách khác được xây riêng mỗi
+    lần gọi.
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+        name (str): Tên cấu trúc
+        builder (callable): Hàm nhận snapshot và trả về cấu trúc cần xây dựng
+
+    Returns:
+        Cấu trúc đã được xây dựng
+    """
+    snapshot = snapshot_of(nganh_list)
+    if snapshot is None:
+        snapshot = CatalogSnapshot(0, nganh_list)
+    return snapshot.artifact(name, builder)
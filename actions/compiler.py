@@ -0,0 +1,387 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Text, Tuple
+
+from .catalog import NGANH_JSON_PATH, CatalogError, CatalogSnapshot, artifacts_path, validate_nganh_data
+from .khoi_thi import KHOI_THI_REGISTRY
+from .match_index import NganhMatchIndex, build_match_index
+from .nganh_model import compact_nganh_list
+from .nlu_generator import NLU_NGANH_PATH, render_nlu, write_nlu
+from .normalize import normalize_text
+from .render_cache import ResponseCache
+from .score_analytics import build_score_analytics
+from .score_index import build_khoi_index, build_score_index
+from .search_index import build_search_index
+from .so_thich import build_interest_engine
+from .viet_tat import build_abbreviation_expander
+
+logger = logging.getLogger(__name__)
+
+ACTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(ACTIONS_DIR)
+
+# Đánh dấu đầu file cấu trúc dựng sẵn và phiên bản định dạng
+MAGIC = b"NGANHART"
+FORMAT_VERSION = 1
+
+# Điểm chuẩn hợp lệ nằm trong khoảng này (tổng ba môn, có thể cộng điểm ưu tiên)
+DIEM_CHUAN_TOI_DA = 40.0
+
+
+def build_warm_response_cache(snapshot: CatalogSnapshot) -> ResponseCache:
+    """Bộ đệm câu trả lời đã dựng sẵn toàn bộ"""
+    cache = ResponseCache(snapshot)
+    cache.warm()
+    return cache
+
+
+# Các cấu trúc dẫn xuất được dựng sẵn, khóa là tên artifact trong CatalogSnapshot.
+# Hàm dựng phải ở mức module để kết quả pickle được.
+ARTIFACT_BUILDERS: Dict[Text, Callable[[CatalogSnapshot], Any]] = {
+    "match_index": build_match_index,
+    "abbreviation_expander": build_abbreviation_expander,
+    "score_index": build_score_index,
+    "khoi_index": build_khoi_index,
+    "score_analytics": build_score_analytics,
+    "interest_engine": build_interest_engine,
+    "search_index": build_search_index,
+    "response_cache": build_warm_response_cache,
+}
+
+
+def code_fingerprint() -> Text:
+    """
+    sha256 mã nguồn của package actions
+
+    Cấu trúc dựng sẵn là các đối tượng Python được pickle, nên chỉ dùng được với
+    đúng phiên bản mã đã dựng ra chúng.
+    """
+    digest = hashlib.sha256(f"{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    for path in sorted(glob.glob(os.path.join(ACTIONS_DIR, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class CompileReport:
+    """Các lỗi và cảnh báo tìm thấy khi kiểm tra dữ liệu"""
+
+    def __init__(self):
+        self.errors: List[Text] = []
+        self.warnings: List[Text] = []
+
+    def error(self, message: Text) -> None:
+        self.errors.append(message)
+
+    def warning(self, message: Text) -> None:
+        self.warnings.append(message)
+
+
+def check_catalog(data: List[Dict[Text, Any]], report: CompileReport) -> None:
+    """
+    Kiểm tra nội dung danh mục ngoài cấu trúc (đã được validate_nganh_data kiểm tra)
+
+    Args:
+        data (list): Danh sách ngành
+        report (CompileReport): Nơi ghi lỗi và cảnh báo
+    """
+    ten_da_gap: Dict[Text, int] = {}
+    ma_da_gap: Dict[Text, int] = {}
+    for i, nganh in enumerate(data):
+        ten = nganh["ten_nganh"]
+        for ma_khoi in nganh["khoi_xet_tuyen"]:
+            if ma_khoi not in KHOI_THI_REGISTRY:
+                report.error(f"Ngành '{ten}' có khối '{ma_khoi}' không có trong danh mục khối thi")
+        if not nganh["khoi_xet_tuyen"]:
+            report.warning(f"Ngành '{ten}' không có khối xét tuyển")
+        for nam, diem in nganh["diem_chuan"].items():
+            if diem is not None and not 0 <= diem <= DIEM_CHUAN_TOI_DA:
+                report.error(f"Điểm chuẩn năm {nam} của ngành '{ten}' ({diem}) nằm ngoài khoảng 0-{DIEM_CHUAN_TOI_DA:g}")
+        if nganh["ma_nganh"] != nganh["ma_nganh"].strip():
+            report.warning(f"Mã ngành '{nganh['ma_nganh']}' của ngành '{ten}' có khoảng trắng thừa")
+        if ten.lower() in ten_da_gap:
+            report.warning(f"Ngành thứ {i} trùng tên với ngành thứ {ten_da_gap[ten.lower()]} ('{ten}'), "
+                           "khi tìm theo tên chỉ ngành sau được dùng")
+        ten_da_gap.setdefault(ten.lower(), i)
+        ma = nganh["ma_nganh"].strip()
+        if ma in ma_da_gap:
+            report.warning(f"Ngành '{ten}' trùng mã ngành {ma} với ngành thứ {ma_da_gap[ma]}")
+        ma_da_gap.setdefault(ma, i)
+
+
+# Chú thích thực thể trong ví dụ NLU: [giá trị](thực_thể), [giá trị](thực_thể:từ_đồng_nghĩa)
+# hoặc [giá trị]{"entity": "thực_thể", "value": "từ_đồng_nghĩa"}
+_ENTITY_SHORT = re.compile(r"\[([^\]]+)\]\((\w+)(?::([^)]+))?\)")
+_ENTITY_JSON = re.compile(r"\[([^\]]+)\](\{[^}]*\})")
+
+
+def _examples(block: Dict[Text, Any]) -> List[Text]:
+    examples = block.get("examples") or ""
+    if isinstance(examples, list):
+        return [str(example) for example in examples]
+    return [line.strip()[2:].strip() for line in examples.splitlines() if line.strip().startswith("- ")]
+
+
+def _annotations(example: Text) -> Iterable[Tuple[Text, Text, Optional[Text]]]:
+    for text, entity, value in _ENTITY_SHORT.findall(example):
+        yield text, entity, value or None
+    for text, raw in _ENTITY_JSON.findall(example):
+        try:
+            annotation = json.loads(raw)
+        except ValueError:
+            continue
+        yield text, annotation.get("entity", ""), annotation.get("value")
+
+
+def check_training_data(nganh_list: List[Dict[Text, Any]], domain_path: Text, nlu_paths: List[Text],
+                        report: CompileReport) -> Dict[Text, int]:
+    """
+    Kiểm tra thực thể và từ đồng nghĩa trong domain.yml và dữ liệu NLU
+
+    Mọi giá trị ten_nganh (sau khi áp dụng từ đồng nghĩa), mọi từ đồng nghĩa
+    và bảng tra của ten_nganh phải tìm ra được một ngành bằng đúng cách các
+    action tìm ngành; mọi giá trị khoi_xet_tuyen phải là một khối thi đã biết.
+
+    Args:
+        nganh_list (list): Danh sách ngành
+        domain_path (str): Đường dẫn domain.yml
+        nlu_paths (list): Các file dữ liệu NLU
+        report (CompileReport): Nơi ghi lỗi và cảnh báo
+
+    Returns:
+        dict: Số giá trị ten_nganh được tìm ra theo từng bước của chỉ mục
+    """
+    import yaml  # chỉ cần khi biên dịch, action server không phải cài PyYAML
+
+    with open(domain_path, 'r', encoding='utf-8') as file:
+        domain = yaml.safe_load(file) or {}
+    entities = set()
+    for entity in domain.get("entities") or []:
+        entities.add(entity if isinstance(entity, str) else next(iter(entity)))
+    for required in ("ten_nganh", "khoi_xet_tuyen"):
+        if required not in entities:
+            report.error(f"domain.yml không khai báo thực thể '{required}'")
+    slots = domain.get("slots") or {}
+    for required in ("ten_nganh", "ma_nganh"):
+        if required not in slots:
+            report.error(f"domain.yml không khai báo slot '{required}' mà các action tìm ngành đặt giá trị")
+    for slot, definition in slots.items():
+        for mapping in (definition or {}).get("mappings") or []:
+            entity = mapping.get("entity")
+            if mapping.get("type") == "from_entity" and entity not in entities:
+                report.error(f"Slot '{slot}' lấy giá trị từ thực thể '{entity}' chưa được khai báo trong domain.yml")
+
+    synonyms: Dict[Text, Text] = {}
+    lookups: Dict[Text, List[Text]] = {}
+    annotations: List[Tuple[Text, Text, Optional[Text], Text]] = []
+    for path in nlu_paths:
+        with open(path, 'r', encoding='utf-8') as file:
+            nlu = (yaml.safe_load(file) or {}).get("nlu") or []
+        for block in nlu:
+            if "synonym" in block:
+                for example in _examples(block):
+                    synonyms[example.lower()] = str(block["synonym"])
+            elif "lookup" in block:
+                lookups.setdefault(str(block["lookup"]), []).extend(_examples(block))
+            elif "intent" in block:
+                for example in _examples(block):
+                    for text, entity, value in _annotations(example):
+                        annotations.append((text, entity, value, path))
+                        if entity not in entities:
+                            report.error(f"Thực thể '{entity}' trong ví dụ '{example}' ({path}) "
+                                         "chưa được khai báo trong domain.yml")
+
+    index = NganhMatchIndex(nganh_list)
+    expander = build_abbreviation_expander()
+    stages: Dict[Text, int] = {}
+    checked = set()
+
+    def resolve(value: Text, source: Text) -> None:
+        if value in checked:
+            return
+        checked.add(value)
+        nganh, stage = index.resolve(expander.expand(normalize_text(value)), 60)
+        stages[stage] = stages.get(stage, 0) + 1
+        if nganh is None:
+            report.error(f"Không tìm được ngành cho '{value}' ({source})")
+
+    other_entities = set()
+    for text, entity, value, path in annotations:
+        value = value or synonyms.get(text.lower(), text)
+        if entity == "ten_nganh":
+            resolve(value, f"thực thể ten_nganh trong {path}")
+        elif entity == "khoi_xet_tuyen":
+            if value.upper() not in KHOI_THI_REGISTRY:
+                report.error(f"Khối '{value}' trong {path} không có trong danh mục khối thi")
+        else:
+            other_entities.update((text.lower(), value.lower()))
+    # Từ đồng nghĩa của thực thể khác (ví dụ tên môn) không phải là tên ngành
+    for example, canonical in synonyms.items():
+        if example not in other_entities and canonical.lower() not in other_entities:
+            resolve(canonical, f"từ đồng nghĩa của '{example}'")
+    for value in lookups.get("ten_nganh", []):
+        resolve(value, "bảng tra ten_nganh")
+    return stages
+
+
+def compile_artifacts(nganh_list: List[Dict[Text, Any]],
+                      builders: Dict[Text, Callable[[CatalogSnapshot], Any]] = ARTIFACT_BUILDERS
+                      ) -> Tuple[CatalogSnapshot, Dict[Text, float]]:
+    """
+    Dựng toàn bộ cấu trúc dẫn xuất cho một danh sách ngành
+
+    Returns:
+        tuple: (snapshot chứa các cấu trúc, thời gian dựng từng cấu trúc tính bằng giây)
+    """
+    snapshot = CatalogSnapshot(0, nganh_list)
+    timings = {}
+    for name, builder in builders.items():
+        start = time.perf_counter()
+        snapshot.artifact(name, builder)
+        timings[name] = time.perf_counter() - start
+    return snapshot, timings
+
+
+def write_artifacts(path: Text, snapshot: CatalogSnapshot, source_sha256: Text) -> int:
+    """
+    Ghi danh sách ngành và các cấu trúc dẫn xuất ra file (ghi file tạm rồi đổi tên)
+
+    Returns:
+        int: Kích thước file (byte)
+    """
+    header = {
+        "format": FORMAT_VERSION,
+        "source_sha256": source_sha256,
+        "code_sha256": code_fingerprint(),
+        "artifacts": sorted(snapshot._artifacts),
+        "built_at": time.time(),
+    }
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(MAGIC)
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump((snapshot.nganh_list, dict(snapshot._artifacts)), file, protocol=pickle.HIGHEST_PROTOCOL)
+        # mkstemp tạo file chỉ chủ sở hữu đọc được, các tiến trình khác cũng cần đọc
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return os.path.getsize(path)
+
+
+def load_compiled(source: Text) -> Optional[Tuple[List[Dict[Text, Any]], Dict[Text, Any]]]:
+    """
+    Nạp danh sách ngành và các cấu trúc dựng sẵn của một file nganh.json
+
+    File dựng sẵn chỉ được dùng khi nó được dựng từ đúng nội dung hiện tại của
+    file nguồn và đúng phiên bản mã nguồn; ngược lại trả về None để danh mục
+    đọc lại nganh.json và dựng các cấu trúc khi cần. File này được unpickle nên
+    chỉ dùng file do chính `python -m actions.compiler` tạo ra.
+
+    Args:
+        source (str): Đường dẫn nganh.json
+
+    Returns:
+        tuple: (danh sách ngành, {tên cấu trúc: cấu trúc}), hoặc None
+    """
+    path = artifacts_path(source)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(source, 'rb') as file:
+            source_sha256 = hashlib.sha256(file.read()).hexdigest()
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                logger.warning(f"Bỏ qua '{path}': không phải file cấu trúc dựng sẵn")
+                return None
+            header = pickle.load(file)
+            if header.get("format") != FORMAT_VERSION or header.get("source_sha256") != source_sha256:
+                logger.warning(f"Bỏ qua '{path}': được dựng từ nội dung khác của {source}, "
+                               "hãy chạy lại python -m actions.compiler")
+                return None
+            if header.get("code_sha256") != code_fingerprint():
+                logger.warning(f"Bỏ qua '{path}': được dựng bằng phiên bản mã khác, "
+                               "hãy chạy lại python -m actions.compiler")
+                return None
+            nganh_list, artifacts = pickle.load(file)
+    except Exception as e:
+        logger.warning(f"Không đọc được file cấu trúc dựng sẵn '{path}': {e}")
+        return None
+    logger.info(f"Đã nạp {len(artifacts)} cấu trúc dựng sẵn từ {path}")
+    return nganh_list, artifacts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Kiểm tra nganh.json cùng domain.yml và dữ liệu NLU, sinh bảng tra và từ đồng nghĩa "
+                    "ten_nganh cho NLU, rồi dựng sẵn các cấu trúc tra cứu để action server nạp ngay khi khởi động")
+    parser.add_argument("--source", default=NGANH_JSON_PATH, help="file nganh.json")
+    parser.add_argument("--domain", default=os.path.join(PROJECT_DIR, "domain.yml"))
+    parser.add_argument("--nlu", nargs="+", default=[os.path.join(PROJECT_DIR, "data", "nlu.yml")])
+    parser.add_argument("--nlu-output", default=NLU_NGANH_PATH,
+                        help="file NLU sinh từ danh mục, được kiểm tra cùng các file --nlu")
+    parser.add_argument("--output", help="file cấu trúc dựng sẵn, mặc định cạnh file nguồn với đuôi .artifacts")
+    parser.add_argument("--check", action="store_true", help="chỉ kiểm tra, không ghi file")
+    args = parser.parse_args()
+
+    report = CompileReport()
+    with open(args.source, 'rb') as file:
+        raw = file.read()
+    try:
+        data = validate_nganh_data(json.loads(raw.decode("utf-8")))
+    except (ValueError, CatalogError) as e:
+        print(f"LỖI: {args.source}: {e}")
+        return 1
+    check_catalog(data, report)
+    nganh_list = compact_nganh_list(data)
+    # Bảng tra và từ đồng nghĩa ten_nganh đi theo danh mục: sinh lại mỗi lần biên dịch
+    nlu_content = render_nlu(nganh_list)
+    if args.check:
+        current = None
+        if os.path.exists(args.nlu_output):
+            with open(args.nlu_output, 'r', encoding='utf-8') as file:
+                current = file.read()
+        if current != nlu_content:
+            report.error(f"{args.nlu_output} chưa được sinh lại từ danh mục hiện tại, "
+                         "hãy chạy python -m actions.compiler")
+    elif not report.errors and write_nlu(args.nlu_output, nlu_content):
+        print(f"Đã sinh lại {args.nlu_output}")
+    nlu_paths = list(args.nlu)
+    if os.path.exists(args.nlu_output) and args.nlu_output not in nlu_paths:
+        nlu_paths.append(args.nlu_output)
+    stages = check_training_data(nganh_list, args.domain, nlu_paths, report)
+
+    for message in report.warnings:
+        print(f"CẢNH BÁO: {message}")
+    for message in report.errors:
+        print(f"LỖI: {message}")
+    print(f"{len(nganh_list)} ngành; giá trị ten_nganh trong dữ liệu NLU được tìm ra theo bước: "
+          + ", ".join(f"{stage} {count}" for stage, count in sorted(stages.items())))
+    if report.errors:
+        print(f"{len(report.errors)} lỗi, không ghi file cấu trúc dựng sẵn")
+        return 1
+    if args.check:
+        return 0
+
+    snapshot, timings = compile_artifacts(nganh_list)
+    output = args.output or artifacts_path(args.source)
+    size = write_artifacts(output, snapshot, hashlib.sha256(raw).hexdigest())
+    print(", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()))
+    print(f"Đã ghi {output} ({size / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
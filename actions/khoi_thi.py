@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, List, NamedTuple, Text, Tuple
+
+# Các môn thi, thứ tự trong danh sách là vị trí bit của môn trong mặt nạ
+MON_THI = ["toán", "lý", "hóa", "sinh", "văn", "sử", "địa", "anh", "gdcd", "khtn", "khxh"]
+
+# Tên môn dùng khi hiển thị cho người dùng
+TEN_MON = {
+    "toán": "Toán",
+    "lý": "Lý",
+    "hóa": "Hóa",
+    "sinh": "Sinh",
+    "văn": "Văn",
+    "sử": "Sử",
+    "địa": "Địa",
+    "anh": "Anh",
+    "gdcd": "GDCD",
+    "khtn": "KHTN",
+    "khxh": "KHXH",
+}
+
+MON_BIT = {mon: 1 << i for i, mon in enumerate(MON_THI)}
+
+# Danh mục khối thi duy nhất của bot, theo tổ hợp môn chính thức của Bộ GD&ĐT
+KHOI_THI = {
+    "A00": ["toán", "lý", "hóa"],
+    "A01": ["toán", "lý", "anh"],
+    "A02": ["toán", "lý", "sinh"],
+    "B00": ["toán", "hóa", "sinh"],
+    "C00": ["văn", "sử", "địa"],
+    "C01": ["toán", "văn", "lý"],
+    "C02": ["văn", "toán", "hóa"],
+    "C08": ["văn", "hóa", "sinh"],
+    "C19": ["văn", "sử", "gdcd"],
+    "C20": ["văn", "địa", "gdcd"],
+    "D01": ["toán", "văn", "anh"],
+    "D07": ["toán", "hóa", "anh"],
+    "D08": ["toán", "sinh", "anh"],
+    "D09": ["toán", "sử", "anh"],
+    "D10": ["toán", "địa", "anh"],
+    "D14": ["văn", "sử", "anh"],
+    "D15": ["văn", "địa", "anh"],
+    "D90": ["toán", "anh", "khtn"],
+    "D96": ["toán", "anh", "khxh"],
+}
+
+
+class KhoiThi(NamedTuple):
+    """Một khối thi: mã khối, các môn và mặt nạ bit của các môn"""
+    ma_khoi: Text
+    mon: Tuple[Text, ...]
+    mask: int
+
+
+def mask_of(subjects: Iterable[Text]) -> int:
+    """
+    Mặt nạ bit của một tập môn, bỏ qua các môn không có trong MON_THI
+
+    Args:
+        subjects (iterable): Các môn, ví dụ các khóa của kết quả extract_subject_scores
+
+    Returns:
+        int: Mặt nạ bit
+    """
+    mask = 0
+    for mon in subjects:
+        mask |= MON_BIT.get(mon, 0)
+    return mask
+
+
+class KhoiThiRegistry:
+    """
+    Danh mục khối thi với bảng tra tập môn -> các khối thi đủ môn.
+
+    Mỗi tập môn được mã hóa thành mặt nạ bit. Vì chỉ có 2^len(MON_THI) tập môn
+    khác nhau, danh sách khối đủ môn của mọi tập được tính sẵn một lần, nên việc
+    xác định khối từ các môn thí sinh nhập chỉ là một lần tra bảng.
+    """
+
+    def __init__(self, definitions: Dict[Text, List[Text]] = KHOI_THI):
+        self.blocks: Dict[Text, KhoiThi] = {
+            ma_khoi: KhoiThi(ma_khoi, tuple(mon), mask_of(mon)) for ma_khoi, mon in definitions.items()
+        }
+        full = (1 << len(MON_THI)) - 1
+        self._satisfiable: List[Tuple[KhoiThi, ...]] = [
+            tuple(khoi for khoi in self.blocks.values() if khoi.mask & ~mask & full == 0)
+            for mask in range(full + 1)
+        ]
+
+    def __contains__(self, ma_khoi: Text) -> bool:
+        return ma_khoi in self.blocks
+
+    def __getitem__(self, ma_khoi: Text) -> KhoiThi:
+        return self.blocks[ma_khoi]
+
+    def codes(self) -> List[Text]:
+        """Các mã khối theo thứ tự trong danh mục"""
+        return list(self.blocks)
+
+    def satisfiable(self, mask: int) -> Tuple[KhoiThi, ...]:
+        """
+        Các khối thi mà tập môn có đủ môn, theo thứ tự trong danh mục
+
+        Args:
+            mask (int): Mặt nạ bit của tập môn (xem mask_of)
+
+        Returns:
+            tuple: Các KhoiThi
+        """
+        return self._satisfiable[mask]
+
+    def ten_mon(self, ma_khoi: Text) -> List[Text]:
+        """Tên các môn của khối để hiển thị, ví dụ ["Toán", "Lý", "Hóa"]"""
+        return [TEN_MON[mon] for mon in self.blocks[ma_khoi].mon]
+
+
+KHOI_THI_REGISTRY = KhoiThiRegistry()
+
+# Khối xét tuyển và tên môn hiển thị, dùng khi trả lời câu hỏi "khối X gồm môn gì"
+KHOI_XET_TUYEN_DATA = {ma_khoi: KHOI_THI_REGISTRY.ten_mon(ma_khoi) for ma_khoi in KHOI_THI_REGISTRY.codes()}
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Text
+
+# Giá trị đánh dấu không tìm thấy khóa trong bộ đệm
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Bộ đệm LRU có giới hạn kích thước, an toàn khi dùng từ nhiều luồng.
+
+    Giá trị None cũng được lưu như mọi giá trị khác, nên có thể dùng để ghi nhớ
+    cả các kết quả "không tìm thấy".
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Lấy giá trị theo khóa và đánh dấu là vừa được dùng
+
+        Returns:
+            Giá trị đã lưu, hoặc `default` nếu không có
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Lưu giá trị, loại bỏ khóa ít được dùng nhất khi vượt kích thước"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Xóa toàn bộ giá trị, giữ nguyên các bộ đếm"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[Text, Any]:
+        """
+        Thống kê sử dụng bộ đệm
+
+        Returns:
+            dict: Kích thước, số lần trúng/trượt, tỷ lệ trúng và số khóa bị loại
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
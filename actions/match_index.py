@@ -0,0 +1,323 @@
+import heapq
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from fuzzywuzzy import fuzz, utils
+
+from .catalog import CatalogSnapshot, get_artifact, live_snapshots, snapshot_of
+from .lru_cache import MISSING, LRUCache
+from .metrics import REGISTRY, tenant_label
+from .normalize import fold_diacritics, normalize_text, repair_typing
+from .viet_tat import expand_abbreviations
+
+# Độ dài tối đa của các n-gram ký tự được đưa vào chỉ mục
+GRAM_SIZE = 3
+
+# Danh mục nhỏ hơn ngưỡng này được so khớp mờ với toàn bộ tên ngành
+FUZZY_FULL_SCAN_LIMIT = 256
+
+# Số ứng viên tối đa được giữ lại sau bước lọc bằng n-gram
+FUZZY_CANDIDATES = 32
+
+# N-gram xuất hiện trong quá tỷ lệ này của danh mục không dùng để lọc ứng viên
+FUZZY_COMMON_GRAM_RATIO = 0.125
+
+# Số từ khóa tối đa được ghi nhớ kết quả tra cứu
+KEYWORD_CACHE_SIZE = 4096
+
+# Số kết quả tìm ngành được ghi nhớ cho mỗi snapshot danh mục
+RESOLUTION_CACHE_SIZE = int(os.environ.get("NGANH_RESOLUTION_CACHE_SIZE", "2048"))
+
+MATCH_STAGES = REGISTRY.counter(
+    "nganh_match_stage_total",
+    "Số lần tìm ngành theo bước cho kết quả (id, canonical, exact, folded, substring, keyword, fuzzy, "
+    "none là không tìm thấy)",
+    ["tenant", "stage"])
+MATCH_SECONDS = REGISTRY.histogram(
+    "nganh_match_seconds", "Thời gian tra chỉ mục khi kết quả chưa có trong bộ đệm, theo bước cho kết quả", ["stage"])
+
+
+def _process_and_sort(text: Text) -> Text:
+    """Chuẩn hóa chuỗi theo đúng cách fuzz.token_sort_ratio xử lý trước khi so sánh"""
+    return " ".join(sorted(utils.full_process(text, force_ascii=True).split())).strip()
+
+
+def _folded_key(text: Text) -> Text:
+    key = fold_diacritics(" ".join(text.split()))
+    return key[len("nganh "):] if key.startswith("nganh ") else key
+
+
+class NganhMatchIndex:
+    """
+    Chỉ mục tìm ngành, xây dựng một lần cho mỗi phiên bản danh mục.
+
+    Chỉ mục giữ tên ngành đã chuẩn hóa theo đúng thứ tự của danh mục và một chỉ
+    mục ngược từ n-gram ký tự (độ dài 1..GRAM_SIZE) đến vị trí các tên chứa nó.
+    Các bước tìm kiếm cho kết quả giống hệt bốn lượt duyệt tuyến tính trước đây:
+    trùng khớp, chứa nhau, đếm từ khóa và so khớp mờ, nhưng chỉ kiểm tra những
+    ứng viên còn lại sau khi lọc bằng n-gram. Giữa bước trùng khớp và bước chứa
+    nhau có thêm bước trùng khớp khi bỏ dấu, nhận cả tên gõ không dấu, sai dấu
+    hoặc gõ kiểu Telex/VNI.
+    """
+
+    def __init__(self, nganh_list: List[Dict[Text, Any]]):
+        # Giữ nguyên ngữ nghĩa của dict cũ: tên trùng thì ngành sau ghi đè ngành trước
+        mapping = {nganh["ten_nganh"].lower(): nganh for nganh in nganh_list}
+        self.names: List[Text] = list(mapping.keys())
+        self.records: List[Dict[Text, Any]] = list(mapping.values())
+        self.positions: Dict[Text, int] = {name: i for i, name in enumerate(self.names)}
+        self.name_lengths = sorted({len(name) for name in self.names})
+        # Tên đã bỏ dấu và tiền tố "ngành", tên trùng khi bỏ dấu thì lấy ngành đứng trước
+        self.folded_positions: Dict[Text, int] = {}
+        for i, name in enumerate(self.names):
+            self.folded_positions.setdefault(_folded_key(name), i)
+        self.vocabulary = {word for name in self.folded_positions for word in name.split()}
+        # Mã ngành -> bản ghi, gồm cả các ngành bị ngành sau trùng tên ghi đè trong `records`
+        self.codes: Dict[Text, Dict[Text, Any]] = {}
+        for nganh in nganh_list:
+            self.codes.setdefault(str(nganh["ma_nganh"]).strip(), nganh)
+
+        postings: Dict[Text, List[int]] = {}
+        for i, name in enumerate(self.names):
+            grams = set()
+            for n in range(1, GRAM_SIZE + 1):
+                for start in range(len(name) - n + 1):
+                    grams.add(name[start:start + n])
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = postings
+        # Dạng đã chuẩn hóa và sắp xếp từ của tên ngành, giống hệt token_sort_ratio tự tính
+        self.sorted_names: List[Text] = [_process_and_sort(name) for name in self.names]
+        self._keyword_cache: Dict[Text, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _grams(self, text: Text) -> List[Text]:
+        return list({text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)})
+
+    def _containing(self, text: Text) -> List[int]:
+        """
+        Vị trí (tăng dần) của các tên ngành chứa chuỗi `text`
+        """
+        if len(text) <= GRAM_SIZE:
+            return self.postings.get(text, [])
+        # Chỉ cần duyệt danh sách ngắn nhất trong các n-gram của chuỗi rồi kiểm tra lại
+        candidates = min((self.postings.get(gram, []) for gram in self._grams(text)), key=len)
+        return [i for i in candidates if text in self.names[i]]
+
+    def _keyword_positions(self, keyword: Text) -> List[int]:
+        positions = self._keyword_cache.get(keyword)
+        if positions is None:
+            if len(self._keyword_cache) >= KEYWORD_CACHE_SIZE:
+                self._keyword_cache.clear()
+            positions = self._containing(keyword)
+            self._keyword_cache[keyword] = positions
+        return positions
+
+    def exact(self, query: Text) -> Optional[int]:
+        """Vị trí tên ngành trùng khớp hoàn toàn với truy vấn"""
+        return self.positions.get(query)
+
+    def folded(self, query: Text) -> Optional[int]:
+        """Vị trí tên ngành trùng với truy vấn khi bỏ dấu, kể cả truy vấn gõ kiểu Telex/VNI"""
+        pos = self.folded_positions.get(_folded_key(query))
+        if pos is None:
+            pos = self.folded_positions.get(_folded_key(repair_typing(query, self.vocabulary)))
+        return pos
+
+    def substring(self, query: Text) -> Optional[int]:
+        """Vị trí đầu tiên mà truy vấn nằm trong tên ngành hoặc tên ngành nằm trong truy vấn"""
+        if not query:
+            # Chuỗi rỗng nằm trong mọi tên ngành
+            return 0 if self.names else None
+        best = None
+        found = self._containing(query)
+        if found:
+            best = found[0]
+        # Tên ngành nằm trong truy vấn: tra các chuỗi con của truy vấn có độ dài bằng một tên ngành
+        for length in self.name_lengths:
+            if length > len(query):
+                break
+            for start in range(len(query) - length + 1):
+                pos = self.positions.get(query[start:start + length])
+                if pos is not None and (best is None or pos < best):
+                    best = pos
+        return best
+
+    def keywords(self, query: Text) -> Optional[int]:
+        """Vị trí đầu tiên của tên ngành chứa ít nhất 2 từ khóa của truy vấn"""
+        keywords = query.split()
+        if len(keywords) < 2:
+            return None
+        lists = [self._keyword_positions(keyword) for keyword in keywords]
+        previous = None
+        # Các danh sách đã sắp tăng dần nên vị trí lặp lại đầu tiên là vị trí nhỏ nhất đủ 2 lần
+        for pos in heapq.merge(*lists):
+            if pos == previous:
+                return pos
+            previous = pos
+        return None
+
+    def fuzzy_candidates(self, query: Text) -> List[int]:
+        """Các vị trí được đưa vào bước so khớp mờ, theo thứ tự danh mục"""
+        if len(self.names) <= FUZZY_FULL_SCAN_LIMIT:
+            return list(range(len(self.names)))
+        lists = [self.postings.get(gram, ()) for gram in self._grams(query) or [query]]
+        limit = max(FUZZY_CANDIDATES, int(len(self.names) * FUZZY_COMMON_GRAM_RATIO))
+        informative = [postings for postings in lists if len(postings) <= limit]
+        overlap = Counter()
+        for postings in informative or lists:
+            overlap.update(postings)
+        return sorted(pos for pos, _ in overlap.most_common(FUZZY_CANDIDATES))
+
+    def score_batch(self, query: Text, positions: List[int]) -> Tuple[Optional[int], int]:
+        """
+        Chấm điểm tương đồng cho một lô ứng viên
+
+        Returns:
+            tuple: (vị trí có điểm cao nhất, điểm), vị trí đứng trước được ưu tiên khi bằng điểm
+        """
+        best_score = 0
+        best_pos = None
+        names = self.names
+        sorted_names = self.sorted_names
+        sorted_query = _process_and_sort(query)
+        for pos in positions:
+            # max(token_sort_ratio, partial_ratio) như trước, với phần tiền xử lý tên ngành đã tính sẵn
+            final_score = max(fuzz.ratio(sorted_query, sorted_names[pos]), fuzz.partial_ratio(query, names[pos]))
+            if final_score > best_score:
+                best_score = final_score
+                best_pos = pos
+        return best_pos, best_score
+
+    def resolve(self, query: Text, threshold: int = 60) -> Tuple[Optional[Dict[Text, Any]], Text]:
+        """
+        Tìm ngành tương ứng với truy vấn đã chuẩn hóa
+
+        Args:
+            query (str): Tên ngành cần tìm (đã viết thường và mở rộng viết tắt)
+            threshold (int): Ngưỡng điểm tương đồng của bước so khớp mờ
+
+        Returns:
+            tuple: (ngành tìm được hoặc None, tên bước đã cho kết quả)
+        """
+        for stage, finder in (("exact", self.exact), ("folded", self.folded), ("substring", self.substring),
+                              ("keyword", self.keywords)):
+            pos = finder(query)
+            if pos is not None:
+                return self.records[pos], stage
+
+        pos, score = self.score_batch(query, self.fuzzy_candidates(query))
+        if pos is not None and score >= threshold:
+            return self.records[pos], "fuzzy"
+        return None, "none"
+
+
+def build_match_index(snapshot: CatalogSnapshot) -> NganhMatchIndex:
+    """Xây dựng chỉ mục tìm ngành cho một snapshot"""
+    return NganhMatchIndex(snapshot.nganh_list)
+
+
+def get_match_index(nganh_list: List[Dict[Text, Any]]) -> NganhMatchIndex:
+    """
+    Lấy chỉ mục tìm ngành cho danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        NganhMatchIndex: Chỉ mục tìm ngành
+    """
+    return get_artifact(nganh_list, "match_index", build_match_index)
+
+
+def build_resolution_cache(snapshot: CatalogSnapshot) -> LRUCache:
+    """Bộ đệm kết quả tìm ngành của một snapshot, khóa theo truy vấn đã chuẩn hóa và ngưỡng"""
+    return LRUCache(RESOLUTION_CACHE_SIZE)
+
+
+def resolve_nganh(nganh_name: Text, nganh_list: List[Dict[Text, Any]], threshold: int = 60,
+                  ma_nganh: Optional[Text] = None) -> Tuple[Optional[Dict[Text, Any]], Text]:
+    """
+    Tìm ngành theo tên người dùng nhập, có ghi nhớ kết quả
+
+    Nếu lượt trước đã tìm ra ngành (slot ma_nganh) và tên vẫn là tên chuẩn của
+    ngành đó trong danh mục hiện hành, ngành được lấy thẳng theo mã. Tên đã
+    đúng tên chuẩn (ví dụ slot ten_nganh do lượt trước đặt) được trả về ngay.
+    Các truy vấn khác được mở rộng viết tắt rồi tra trên chỉ mục; kết quả, kể
+    cả khi không tìm thấy, được lưu trong bộ đệm của snapshot danh mục nên tự
+    bị bỏ khi danh mục nạp lại và không dùng chung giữa các trường.
+
+    Args:
+        nganh_name (str): Tên ngành cần tìm
+        nganh_list (list): Danh sách các ngành
+        threshold (int): Ngưỡng điểm tương đồng
+        ma_nganh (str): Mã ngành đã tìm ra ở lượt trước, nếu có
+
+    Returns:
+        tuple: (ngành tìm được hoặc None, tên bước đã cho kết quả)
+    """
+    if not nganh_name or not nganh_list:
+        return None, "none"
+
+    snapshot = snapshot_of(nganh_list)
+    tenant = tenant_label(snapshot.tenant if snapshot is not None else None)
+    if snapshot is not None:
+        index = snapshot.artifact("match_index", build_match_index)
+    else:
+        index = NganhMatchIndex(nganh_list)
+    if ma_nganh:
+        # Người dùng nhắc tên ngành mới thì slot ten_nganh không còn là tên chuẩn của mã đã lưu
+        nganh = index.codes.get(ma_nganh)
+        if nganh is not None and nganh["ten_nganh"] == nganh_name:
+            MATCH_STAGES.inc(tenant, "id")
+            return nganh, "id"
+
+    query = normalize_text(nganh_name)
+    if snapshot is None:
+        result = _timed_resolve(index, query, threshold)
+        MATCH_STAGES.inc(tenant, result[1])
+        return result
+
+    pos = index.exact(query)
+    if pos is not None:
+        MATCH_STAGES.inc(tenant, "canonical")
+        return index.records[pos], "canonical"
+
+    cache = snapshot.artifact("resolution_cache", build_resolution_cache)
+    key = (query, threshold)
+    result = cache.get(key)
+    if result is MISSING:
+        result = _timed_resolve(index, query, threshold)
+        cache.put(key, result)
+    MATCH_STAGES.inc(tenant, result[1])
+    return result
+
+
+def _timed_resolve(index: NganhMatchIndex, query: Text, threshold: int) -> Tuple[Optional[Dict[Text, Any]], Text]:
+    start = time.perf_counter()
+    result = index.resolve(expand_abbreviations(query), threshold)
+    MATCH_SECONDS.observe(time.perf_counter() - start, result[1])
+    return result
+
+
+def _collect_metrics():
+    totals: Dict[Text, Dict[Text, int]] = {}
+    for snapshot in live_snapshots():
+        cache = snapshot._artifacts.get("resolution_cache")
+        if cache is not None:
+            total = totals.setdefault(tenant_label(snapshot.tenant), {"hits": 0, "misses": 0, "size": 0})
+            total["hits"] += cache.hits
+            total["misses"] += cache.misses
+            total["size"] += len(cache)
+    for name, kind, key, documentation in (
+            ("nganh_resolution_cache_hits_total", "counter", "hits", "Số lần tìm ngành lấy kết quả từ bộ đệm"),
+            ("nganh_resolution_cache_misses_total", "counter", "misses", "Số lần tìm ngành phải tra chỉ mục"),
+            ("nganh_resolution_cache_entries", "gauge", "size", "Số kết quả tìm ngành đang được ghi nhớ")):
+        yield name, kind, documentation, [("", {"tenant": tenant}, total[key]) for tenant, total in totals.items()]
+
+
+REGISTRY.add_collector(_collect_metrics)
@@ -0,0 +1,195 @@
+import bisect
+import logging
+import math
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tắt hẳn việc đo đạc (không ghi nhận, không mở /metrics) bằng ACTION_METRICS=0
+METRICS_ENABLED = os.environ.get("ACTION_METRICS", "1").lower() not in ("0", "false", "no")
+
+# Các mốc (giây) của histogram độ trễ
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Một mẫu số liệu: (hậu tố tên, {nhãn: giá trị}, giá trị)
+Sample = Tuple[Text, Dict[Text, Text], float]
+
+# Một nhóm số liệu do collector trả về khi được đọc: (tên, loại, mô tả, các mẫu)
+MetricFamily = Tuple[Text, Text, Text, List[Sample]]
+
+
+def _escape(value: Text, quote: bool = False) -> Text:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def _format_value(value: float) -> Text:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[Text, Text]) -> Text:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value), quote=True)}"' for name, value in labels.items()) + "}"
+
+
+def tenant_label(tenant: Optional[Text]) -> Text:
+    """Giá trị nhãn `tenant`, danh mục dùng chung có nhãn default"""
+    return tenant or "default"
+
+
+class Counter:
+    """
+    Bộ đếm chỉ tăng, theo từng bộ giá trị nhãn.
+
+    Giá trị nhãn được truyền theo thứ tự của `labelnames`.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", name: Text, documentation: Text,
+                 labelnames: Sequence[Text] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[Text, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: Text, amount: float = 1.0) -> None:
+        """Tăng bộ đếm của bộ nhãn `labels`"""
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = list(self._values.items())
+        return (self.name, "counter", self.documentation,
+                [("", dict(zip(self.labelnames, labels)), value) for labels, value in values])
+
+
+class Histogram:
+    """
+    Histogram với các mốc cố định, theo từng bộ giá trị nhãn.
+
+    Mỗi lần ghi nhận chỉ tìm mốc bằng bisect và tăng một ô, phần cộng dồn theo
+    định dạng Prometheus được tính khi đọc.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", name: Text, documentation: Text,
+                 labelnames: Sequence[Text] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # nhãn -> [số lần theo từng mốc..., số lần vượt mốc cuối, tổng giá trị]
+        self._values: Dict[Tuple[Text, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: Text) -> None:
+        """Ghi nhận một giá trị cho bộ nhãn `labels`"""
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = [(labels, list(row)) for labels, row in self._values.items()]
+        samples: List[Sample] = []
+        for labels, row in values:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), row):
+                cumulative += count
+                samples.append(("_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            samples.append(("_count", base, cumulative))
+            samples.append(("_sum", base, row[-1]))
+        return self.name, "histogram", self.documentation, samples
+
+
+class MetricsRegistry:
+    """
+    Tập các số liệu của tiến trình action server.
+
+    Bộ đếm và histogram được ghi nhận ngay trên đường xử lý. Các số liệu vốn đã
+    được đếm ở nơi khác (bộ đệm, hàng đợi, danh mục) được đọc bằng collector chỉ
+    khi /metrics được gọi, nên không tốn gì trên đường xử lý.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: Text, documentation: Text, labelnames: Sequence[Text] = ()) -> Counter:
+        """Tạo và đăng ký một bộ đếm"""
+        metric = Counter(self, name, documentation, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: Text, documentation: Text, labelnames: Sequence[Text] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Tạo và đăng ký một histogram"""
+        metric = Histogram(self, name, documentation, labelnames, buckets)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """
+        Đăng ký hàm trả về các nhóm số liệu, được gọi mỗi lần đọc
+
+        Args:
+            collector (callable): Hàm không tham số trả về các MetricFamily
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        """Đọc toàn bộ số liệu hiện tại"""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.exception(f"Lỗi khi đọc số liệu: {e}")
+        return families
+
+    def render(self) -> Text:
+        """
+        Xuất toàn bộ số liệu theo định dạng văn bản của Prometheus
+
+        Returns:
+            str: Nội dung trả về cho /metrics
+        """
+        lines = []
+        for name, kind, documentation, samples in self.collect():
+            lines.append(f"# HELP {name} {_escape(documentation)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Số liệu dùng chung của tiến trình
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,216 @@
+import re
+from typing import Dict, List, Optional, Text, Tuple
+
+from .normalize import fold_diacritics, fold_typed, normalize_text, strip_tones
+
+# Các cách gọi của từng môn học, viết có dấu; cách viết không dấu được nhận tự động
+MON_HOC_ALIASES = {
+    "toán": ["toán", "đại số", "hình học", "math"],
+    "lý": ["lý", "lí", "vật lý", "vật lí", "physics"],
+    "hóa": ["hóa", "hóa học", "chemistry"],
+    "sinh": ["sinh", "sinh học", "biology"],
+    "văn": ["văn", "ngữ văn", "literature"],
+    "sử": ["sử", "lịch sử", "history"],
+    "địa": ["địa", "địa lý", "địa lí", "geography"],
+    "anh": ["anh", "tiếng anh", "english"],
+    "gdcd": ["gdcd", "giáo dục công dân", "công dân"],
+    "khtn": ["khtn", "khoa học tự nhiên"],
+    "khxh": ["khxh", "khoa học xã hội"],
+}
+
+# Các cụm từ chứa tên môn nhưng không nói về môn học
+CUM_TU_BO_QUA = ["học sinh", "thí sinh", "sinh viên", "anh chị", "anh ơi", "năm sinh", "ngày sinh"]
+
+# Điểm một môn hợp lệ nằm trong khoảng này
+DIEM_MON_TOI_DA = 10.0
+
+# Từ (chữ) hoặc số, số thập phân có thể dùng dấu chấm hoặc dấu phẩy ("7.5", "7,5");
+# từ gõ kiểu VNI có chữ số xen giữa các chữ cái ("to1an") được giữ nguyên một từ
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)?|[a-z]+(?:\d+[a-z]+)+\d*|[^\W\d_]+")
+
+# Từ gõ kiểu VNI có chữ số xen giữa các chữ cái ("to1an"): tin nhắn đang gõ VNI
+_VNI_GIUA = re.compile(r"(?<!\w)[a-z]+[1-9][a-z]")
+
+# Phím dấu VNI ở cuối từ ("ly1", "hoa1"), không tính phần thập phân dính sau ("toan8,5");
+# bản thứ hai chỉ nhận khi ngay sau từ là một con số riêng ("ly1 7")
+_VNI_CUOI = re.compile(r"(?<!\w)([a-z]+(?:[1-9][a-z]+)*)[1-9](?!\w|[.,]\d)")
+_VNI_CUOI_TRUOC_SO = re.compile(r"(?<!\w)([a-z]+(?:[1-9][a-z]+)*)[1-9](?=[^\w\s]*\s+[^\w\s]*\d)")
+
+# Số cách viết của một từ được ghi nhớ tối đa trước khi làm mới bộ nhớ đệm
+_WORD_CACHE_SIZE = 8192
+
+
+class SubjectScoreExtractor:
+    """
+    Trích xuất điểm từng môn từ tin nhắn trong một lượt duyệt.
+
+    Tin nhắn được tách thành các từ và số một lần. Tên môn (một hoặc nhiều từ,
+    có dấu hoặc không dấu) được nhận dạng bằng bảng tra theo từ, sau đó mỗi môn
+    được ghép với con số gần nhất (theo chiều viết của tin nhắn) chưa được môn
+    khác dùng. Dạng không dấu của từng từ được ghi nhớ nên các từ lặp lại giữa
+    các tin nhắn không phải chuẩn hóa Unicode lại. Từ gõ kiểu Telex/VNI khi
+    bộ gõ không bật ("toans 8", "ho1a 7") được đọc như từ không dấu nếu khớp
+    với một từ trong các cách gọi.
+    """
+
+    def __init__(self, aliases: Dict[Text, List[Text]] = MON_HOC_ALIASES,
+                 ignored: List[Text] = CUM_TU_BO_QUA):
+        # Khóa là từ đầu tiên (không dấu), giá trị là các cách gọi bắt đầu bằng từ đó,
+        # cách gọi dài hơn đứng trước; môn None là cụm từ bỏ qua
+        self.table: Dict[Text, List[Tuple[Optional[Text], Tuple[Text, ...], Tuple[Text, ...]]]] = {}
+        self.vocabulary = set()
+        entries = [(mon, alias) for mon, ten_goi in aliases.items() for alias in ten_goi]
+        entries += [(None, cum_tu) for cum_tu in ignored]
+        for mon, alias in entries:
+            words = alias.lower().split()
+            folded = tuple(fold_diacritics(word) for word in words)
+            stripped = tuple(strip_tones(word) for word in words)
+            self.table.setdefault(folded[0], []).append((mon, folded, stripped))
+            self.vocabulary.update(folded)
+        for candidates in self.table.values():
+            candidates.sort(key=lambda candidate: -len(candidate[1]))
+        self._forms: Dict[Text, Tuple[Text, Optional[Text]]] = {}
+
+    def _form(self, word: Text) -> Tuple[Text, Optional[Text]]:
+        # (dạng không dấu, dạng bỏ dấu thanh) của một từ, có ghi nhớ; từ gõ kiểu Telex/VNI
+        # có dạng bỏ dấu thanh None vì được coi như gõ không dấu
+        form = self._forms.get(word)
+        if form is None:
+            if len(self._forms) >= _WORD_CACHE_SIZE:
+                self._forms.clear()
+            folded = fold_diacritics(word)
+            typed = fold_typed(word) if folded not in self.vocabulary and word.isascii() else None
+            if typed in self.vocabulary:
+                form = (typed, None)
+            else:
+                form = (folded, strip_tones(word))
+            self._forms[word] = form
+        return form
+
+    @staticmethod
+    def _strip_vni_tones(message: Text) -> Text:
+        # Chữ số dính cuối một từ không dấu thường là điểm ("toan8 ly7"), nhưng là phím dấu VNI
+        # khi sau từ đã có một con số riêng ("ly1 7") hoặc tin nhắn đang gõ VNI ("to1an 8 ly1 hoa 9");
+        # đọc nhầm phím dấu thành điểm cho ra điểm sai, tệ hơn là không nhận được điểm
+        if _VNI_GIUA.search(message):
+            return _VNI_CUOI.sub(r"\1", message)
+        return _VNI_CUOI_TRUOC_SO.sub(r"\1", message)
+
+    @staticmethod
+    def _split(message: Text) -> List[Text]:
+        # Phần lớn các đoạn giữa hai khoảng trắng đã là một từ hoặc một số trọn vẹn,
+        # chỉ các đoạn dính dấu câu ("8,", "toán:") mới cần tách bằng biểu thức chính quy.
+        # isdecimal thay vì isdigit: số mũ, số trong vòng tròn ("8²", "①") không đọc được bằng float
+        words = []
+        for chunk in message.split():
+            if chunk.isalpha() or chunk.isdecimal():
+                words.append(chunk)
+            else:
+                words.extend(_TOKEN.findall(chunk))
+        return words
+
+    def tokenize(self, message: Text) -> Tuple[List[Tuple[int, int, Text]], List[Tuple[int, int, float]]]:
+        """
+        Tách tin nhắn thành các lần nhắc tên môn và các con số
+
+        Returns:
+            tuple: ([(vị trí từ đầu, vị trí từ cuối, môn)], [(vị trí từ đầu, vị trí từ cuối, điểm)])
+        """
+        words = self._split(self._strip_vni_tones(normalize_text(message)))
+        table = self.table
+        # Mỗi từ khác nhau chỉ chuẩn hóa một lần; chỉ số và các từ có thể mở đầu tên môn mới cần xét
+        forms = {word: self._form(word) for word in set(words)}
+        folded = [forms[word][0] for word in words]
+        subjects = []
+        numbers = []
+        next_pos = 0
+        for pos in [i for i, word in enumerate(folded) if word in table or word[0].isdecimal()]:
+            if pos < next_pos:
+                continue
+            word = words[pos]
+            if word[0].isdecimal():
+                diem = float(word.replace(",", "."))
+                if 0 <= diem <= DIEM_MON_TOI_DA:
+                    numbers.append((pos, pos, diem))
+                continue
+            for mon, alias_folded, alias_stripped in table[folded[pos]]:
+                n = len(alias_folded)
+                if n > 1 and tuple(folded[pos:pos + n]) != alias_folded:
+                    continue
+                if all(words[k] == folded[k] or forms[words[k]][1] in (None, alias_stripped[k - pos])
+                       for k in range(pos, pos + n)):
+                    if mon is not None:
+                        subjects.append((pos, pos + n - 1, mon))
+                    next_pos = pos + n
+                    break
+        return subjects, numbers
+
+    def extract(self, message: Text) -> Dict[Text, float]:
+        """
+        Trích xuất điểm từng môn trong tin nhắn
+
+        Args:
+            message (str): Tin nhắn của người dùng, ví dụ "Toán 8, Lý 7.5, Hóa 8.5"
+
+        Returns:
+            dict: Ánh xạ môn -> điểm, theo thứ tự môn được nhắc đến
+        """
+        subjects, numbers = self.tokenize(message)
+        if not subjects or not numbers:
+            return {}
+
+        # Mỗi môn chỉ lấy lần nhắc đầu tiên
+        seen = set()
+        subjects = [subject for subject in subjects if not (subject[2] in seen or seen.add(subject[2]))]
+
+        pairs = self._pair_grouped(subjects, numbers)
+        if pairs is None:
+            pairs = self._pair_nearest(subjects, numbers)
+        return {mon: pairs[mon] for _, _, mon in subjects if mon in pairs}
+
+    def _pair_grouped(self, subjects, numbers) -> Optional[Dict[Text, float]]:
+        # Dạng liệt kê "toán, lý, hóa được 8, 7, 9": các môn liền nhau rồi các số liền nhau
+        if len(subjects) != len(numbers):
+            return None
+        if subjects[-1][1] < numbers[0][0] or numbers[-1][1] < subjects[0][0]:
+            if len(subjects) > 1:
+                return {mon: diem for (_, _, mon), (_, _, diem) in zip(subjects, numbers)}
+        return None
+
+    def _pair_nearest(self, subjects, numbers) -> Dict[Text, float]:
+        # Nếu số đầu tiên đứng trước môn đầu tiên ("8 toán, 7 lý") thì ưu tiên số đứng trước môn,
+        # ngược lại ưu tiên số đứng sau; trong cùng một phía thì lấy số gần nhất
+        prefer_before = numbers[0][0] < subjects[0][0]
+        candidates = []
+        for s_index, (s_start, s_end, _) in enumerate(subjects):
+            for n_index, (n_start, n_end, _) in enumerate(numbers):
+                before = n_end < s_start
+                distance = s_start - n_end if before else n_start - s_end
+                candidates.append((before != prefer_before, distance, s_index, n_index))
+        candidates.sort()
+
+        pairs: Dict[Text, float] = {}
+        used_numbers = set()
+        for _, _, s_index, n_index in candidates:
+            mon = subjects[s_index][2]
+            if mon in pairs or n_index in used_numbers:
+                continue
+            pairs[mon] = numbers[n_index][2]
+            used_numbers.add(n_index)
+        return pairs
+
+
+_extractor = SubjectScoreExtractor()
+
+
+def extract_subject_scores(message: Text) -> Dict[Text, float]:
+    """
+    Trích xuất điểm từng môn trong tin nhắn
+
+    Args:
+        message (str): Tin nhắn của người dùng
+
+    Returns:
+        dict: Ánh xạ môn -> điểm
+    """
+    return _extractor.extract(message)
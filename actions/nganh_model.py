@@ -0,0 +1,259 @@
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import ItemsView, Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Text
+
+# Các trường của một ngành, theo thứ tự trong nganh.json
+FIELDS = ("ma_nganh", "ten_nganh", "gioi_thieu_chung", "co_hoi_viec_lam", "khoi_xet_tuyen", "diem_chuan")
+
+_FIELD_SET = frozenset(FIELDS)
+
+_NAN = float("nan")
+
+
+class DiemChuanMatrix:
+    """
+    Điểm chuẩn của cả danh mục trong một ma trận năm × ngành dạng array('d').
+
+    Mỗi năm là một cột, các ngành của cùng một năm nằm liền nhau, ô không có
+    điểm là NaN. Các năm được sắp tăng dần nên tra một năm hay tìm năm gần
+    nhất chỉ là phép tính chỉ số, không phải đổi chuỗi sang số ở mỗi lượt.
+    """
+
+    def __init__(self, years: List[Text], size: int, values: Optional[Sequence[float]] = None):
+        self.years = [sys.intern(nam) for nam in sorted(years, key=int)]
+        self.year_numbers = [int(nam) for nam in self.years]
+        self.year_index = {nam: i for i, nam in enumerate(self.years)}
+        self.size = size
+        # values có thể là một memoryview chỉ đọc trỏ vào file snapshot (xem binary_snapshot)
+        self.values = array('d', [_NAN]) * (len(self.years) * size) if values is None else values
+
+    def get(self, col: int, row: int) -> float:
+        """Điểm của ngành thứ `row` ở cột năm `col`, NaN nếu không có"""
+        return self.values[col * self.size + row]
+
+    def set(self, col: int, row: int, value: float) -> None:
+        self.values[col * self.size + row] = value
+
+    def nearest_column(self, nam: int, mask: int) -> Optional[int]:
+        """
+        Cột của năm gần `nam` nhất trong các cột có bit bật trong `mask`
+
+        Hai năm cách đều thì lấy năm nhỏ hơn.
+
+        Args:
+            nam (int): Năm cần tìm
+            mask (int): Mặt nạ bit các cột được xét
+
+        Returns:
+            int: Chỉ số cột, None nếu mặt nạ rỗng
+        """
+        years = self.year_numbers
+        hi = bisect_left(years, nam)
+        lo = hi - 1
+        while lo >= 0 and not mask >> lo & 1:
+            lo -= 1
+        while hi < len(years) and not mask >> hi & 1:
+            hi += 1
+        if hi >= len(years):
+            return lo if lo >= 0 else None
+        if lo >= 0 and nam - years[lo] <= years[hi] - nam:
+            return lo
+        return hi
+
+
+class DiemChuanView(Mapping):
+    """Điểm chuẩn theo năm của một ngành, đọc trực tiếp từ DiemChuanMatrix"""
+
+    __slots__ = ("_nganh",)
+
+    def __init__(self, nganh: "NganhBase"):
+        self._nganh = nganh
+
+    def _value(self, col: int) -> Optional[float]:
+        nganh = self._nganh
+        diem = nganh._matrix.get(col, nganh._row)
+        if diem != diem:
+            return None
+        return int(diem) if nganh._integral >> col & 1 else diem
+
+    def __getitem__(self, nam: Text) -> Optional[float]:
+        col = self._nganh._matrix.year_index.get(nam)
+        if col is None or not self._nganh._present >> col & 1:
+            raise KeyError(nam)
+        return self._value(col)
+
+    def __contains__(self, nam: object) -> bool:
+        col = self._nganh._matrix.year_index.get(nam)
+        return col is not None and bool(self._nganh._present >> col & 1)
+
+    def __iter__(self) -> Iterator[Text]:
+        present = self._nganh._present
+        return (nam for col, nam in enumerate(self._nganh._matrix.years) if present >> col & 1)
+
+    def __reversed__(self) -> Iterator[Text]:
+        present = self._nganh._present
+        years = self._nganh._matrix.years
+        return (years[col] for col in range(len(years) - 1, -1, -1) if present >> col & 1)
+
+    def __len__(self) -> int:
+        return bin(self._nganh._present).count("1")
+
+    def items(self) -> "_DiemChuanItems":
+        return _DiemChuanItems(self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class _DiemChuanItems(ItemsView):
+    # Duyệt thẳng các cột có mặt thay vì tra lại từng năm qua __getitem__
+    def __iter__(self):
+        nganh = self._mapping._nganh
+        matrix = nganh._matrix
+        values, size, row = matrix.values, matrix.size, nganh._row
+        present, integral = nganh._present, nganh._integral
+        for col, nam in enumerate(matrix.years):
+            if present >> col & 1:
+                diem = values[col * size + row]
+                if diem != diem:
+                    yield nam, None
+                else:
+                    yield nam, int(diem) if integral >> col & 1 else diem
+
+
+class NganhBase(Mapping):
+    """
+    Phần chung của các bản ghi ngành đọc được như dict (nganh["ten_nganh"]).
+
+    Lớp con cung cấp các trường trong FIELDS (trừ diem_chuan) dưới dạng thuộc
+    tính, cùng `_matrix`, `_row`, `_present`, `_integral` và `_extra`. Điểm
+    chuẩn không nằm trong bản ghi mà trong ma trận dùng chung của danh mục, bản
+    ghi chỉ giữ số hàng và mặt nạ bit các năm có mặt (năm có giá trị null vẫn
+    được tính là có mặt như trong nganh.json).
+    """
+
+    __slots__ = ()
+
+    @property
+    def diem_chuan(self) -> DiemChuanView:
+        return DiemChuanView(self)
+
+    def __getitem__(self, key: Text) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[Text]:
+        yield from FIELDS
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(FIELDS) + len(self._extra or ())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(ma_nganh={self.ma_nganh!r}, ten_nganh={self.ten_nganh!r})"
+
+    def diem_chuan_nam(self, nam: Text) -> Optional[float]:
+        """
+        Điểm chuẩn của một năm
+
+        Args:
+            nam (str): Năm, ví dụ "2023"
+
+        Returns:
+            float: Điểm chuẩn, None nếu năm không có hoặc chưa có điểm
+        """
+        col = self._matrix.year_index.get(nam)
+        if col is None or not self._present >> col & 1:
+            return None
+        return DiemChuanView(self)._value(col)
+
+    def nam_gan_nhat(self, nam: Text) -> Optional[Text]:
+        """
+        Năm gần nhất với `nam` trong các năm của ngành (kể cả năm chưa có điểm)
+
+        Args:
+            nam (str): Năm cần tìm
+
+        Returns:
+            str: Năm gần nhất, None nếu ngành không có năm nào hoặc `nam` không phải số
+        """
+        try:
+            target = int(nam)
+        except (ValueError, TypeError):
+            return None
+        col = self._matrix.nearest_column(target, self._present)
+        return None if col is None else self._matrix.years[col]
+
+    def to_dict(self) -> Dict[Text, Any]:
+        """Bản ghi dạng dict như trong nganh.json"""
+        data = {
+            "ma_nganh": self.ma_nganh,
+            "ten_nganh": self.ten_nganh,
+            "gioi_thieu_chung": self.gioi_thieu_chung,
+            "co_hoi_viec_lam": list(self.co_hoi_viec_lam),
+            "khoi_xet_tuyen": list(self.khoi_xet_tuyen),
+            "diem_chuan": dict(self.diem_chuan.items()),
+        }
+        if self._extra is not None:
+            data.update(self._extra)
+        return data
+
+
+class Nganh(NganhBase):
+    """
+    Bản ghi một ngành, gọn hơn dict nhưng vẫn đọc được như dict.
+
+    Mã ngành, tên ngành và mã khối được intern; các đoạn giới thiệu và cơ hội
+    việc làm giống nhau (ví dụ cùng một ngành ở nhiều cơ sở) được dùng chung
+    một chuỗi trong danh mục; danh sách được lưu thành tuple.
+    """
+
+    __slots__ = ("ma_nganh", "ten_nganh", "gioi_thieu_chung", "co_hoi_viec_lam", "khoi_xet_tuyen",
+                 "_matrix", "_row", "_present", "_integral", "_extra")
+
+    def __init__(self, data: Dict[Text, Any], matrix: DiemChuanMatrix, row: int,
+                 texts: Optional[Dict[Text, Text]] = None):
+        if texts is None:
+            texts = {}
+        self.ma_nganh = sys.intern(data["ma_nganh"])
+        self.ten_nganh = sys.intern(data["ten_nganh"])
+        self.gioi_thieu_chung = texts.setdefault(data["gioi_thieu_chung"], data["gioi_thieu_chung"])
+        self.co_hoi_viec_lam = tuple(texts.setdefault(co_hoi, co_hoi) for co_hoi in data["co_hoi_viec_lam"])
+        self.khoi_xet_tuyen = tuple(sys.intern(ma_khoi) for ma_khoi in data["khoi_xet_tuyen"])
+        self._matrix = matrix
+        self._row = row
+        self._present = 0
+        self._integral = 0
+        for nam, diem in data["diem_chuan"].items():
+            col = matrix.year_index[nam]
+            self._present |= 1 << col
+            if diem is not None:
+                matrix.set(col, row, diem)
+                if isinstance(diem, int):
+                    self._integral |= 1 << col
+        extra = {key: value for key, value in data.items() if key not in _FIELD_SET}
+        self._extra = extra or None
+
+
+def compact_nganh_list(data: List[Dict[Text, Any]]) -> List[Nganh]:
+    """
+    Chuyển danh sách ngành dạng dict (đã kiểm tra) sang các bản ghi Nganh dùng chung một ma trận điểm chuẩn
+
+    Args:
+        data (list): Danh sách ngành đọc từ nganh.json
+
+    Returns:
+        list: Danh sách Nganh theo đúng thứ tự
+    """
+    years = {nam for nganh in data for nam in nganh["diem_chuan"]}
+    matrix = DiemChuanMatrix(list(years), len(data))
+    # Các đoạn văn dài giống nhau chỉ giữ một bản; không intern để chúng được giải phóng cùng danh mục
+    texts: Dict[Text, Text] = {}
+    return [Nganh(nganh, matrix, row, texts) for row, nganh in enumerate(data)]
+
@@ -0,0 +1,131 @@
+import os
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from .match_index import NganhMatchIndex
+from .normalize import fold_diacritics, normalize_text
+from .viet_tat import VIET_TAT_MAPPING, build_abbreviation_expander
+
+ACTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# File dữ liệu NLU được sinh từ danh mục, Rasa đọc cùng các file khác trong data/
+NLU_NGANH_PATH = os.path.join(os.path.dirname(ACTIONS_DIR), "data", "nlu_nganh.yml")
+
+# Bước tìm ngành đủ chắc chắn để một viết tắt hoặc tên gọi ngắn thành từ đồng nghĩa của ngành
+_STAGES_CHAC_CHAN = ("exact", "folded")
+
+_HEADER = """\
+# File được sinh tự động từ actions/data/nganh.json và bảng viết tắt (actions/viet_tat.py)
+# bằng python -m actions.compiler, không sửa tay: mọi thay đổi sẽ bị ghi đè khi danh mục đổi.
+version: "3.1"
+
+nlu:
+"""
+
+
+def _ten_goi(name: Text) -> List[Text]:
+    """Tên viết thường có và không có tiền tố "ngành", kèm dạng bỏ dấu"""
+    name = normalize_text(name)
+    ten = name[len("ngành "):] if name.startswith("ngành ") else name
+    forms = [name, ten, f"ngành {ten}"]
+    forms.extend([fold_diacritics(form) for form in forms])
+    return list(dict.fromkeys(forms))
+
+
+def nganh_aliases(nganh_list: List[Dict[Text, Any]],
+                  mapping: Dict[Text, Text] = VIET_TAT_MAPPING) -> Tuple[Dict[Text, List[Text]], List[Text]]:
+    """
+    Các cách gọi của từng ngành: tên viết thường, có hoặc không có tiền tố
+    "ngành", không dấu, các viết tắt và tên gọi ngắn trong bảng viết tắt
+
+    Viết tắt chỉ được nhận khi tên đầy đủ của nó tìm ra ngành ở bước trùng khớp
+    (có hoặc không dấu), giống cách action tìm ngành; cách gọi thuộc về hai
+    ngành khác nhau bị bỏ vì không biết nên đổi thành ngành nào.
+
+    Args:
+        nganh_list (list): Danh sách ngành
+        mapping (dict): Bảng viết tắt
+
+    Returns:
+        tuple: ({tên chuẩn của ngành: các cách gọi}, các cách gọi bị bỏ vì trùng)
+    """
+    index = NganhMatchIndex(nganh_list)
+    expander = build_abbreviation_expander()
+    owner: Dict[Text, Optional[int]] = {}
+
+    def claim(alias: Text, pos: int) -> None:
+        if alias in owner and owner[alias] != pos:
+            owner[alias] = None
+        else:
+            owner[alias] = pos
+
+    for pos, name in enumerate(index.names):
+        for alias in _ten_goi(name):
+            claim(alias, pos)
+    for viet_tat, ten_day_du in mapping.items():
+        nganh, stage = index.resolve(expander.expand(normalize_text(ten_day_du)))
+        if nganh is None or stage not in _STAGES_CHAC_CHAN:
+            continue
+        pos = index.positions[nganh["ten_nganh"].lower()]
+        viet_tat = normalize_text(viet_tat)
+        for alias in dict.fromkeys((viet_tat, fold_diacritics(viet_tat))):
+            claim(alias, pos)
+
+    aliases: Dict[Text, List[Text]] = {index.records[pos]["ten_nganh"]: [] for pos in range(len(index))}
+    for alias, pos in owner.items():
+        if pos is not None:
+            aliases[index.records[pos]["ten_nganh"]].append(alias)
+    return aliases, sorted(alias for alias, pos in owner.items() if pos is None)
+
+
+def _quote(value: Text) -> Text:
+    # Giá trị có dấu phẩy, hai chấm... vẫn là chuỗi YAML hợp lệ khi đặt trong nháy kép
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def render_nlu(nganh_list: List[Dict[Text, Any]], mapping: Dict[Text, Text] = VIET_TAT_MAPPING) -> Text:
+    """
+    Sinh nội dung file NLU gồm bảng tra ten_nganh cho RegexFeaturizer và từ
+    đồng nghĩa cho EntitySynonymMapper
+
+    Từ đồng nghĩa đổi mọi cách gọi về đúng tên ngành trong danh mục, nên slot
+    ten_nganh đến action ở dạng chuẩn và được tìm ra ngay, không qua bước so
+    khớp mờ. Bảng tra gồm tên chuẩn và mọi cách gọi; RegexFeaturizer phân biệt
+    hoa thường nên giữ cả hai dạng.
+
+    Args:
+        nganh_list (list): Danh sách ngành
+        mapping (dict): Bảng viết tắt
+
+    Returns:
+        str: Nội dung file YAML, giống hệt nhau nếu danh mục và bảng viết tắt không đổi
+    """
+    aliases, _ = nganh_aliases(nganh_list, mapping)
+    lines = [_HEADER, "- lookup: ten_nganh\n", "  examples: |\n"]
+    lookup = dict.fromkeys(aliases)
+    for forms in aliases.values():
+        lookup.update(dict.fromkeys(forms))
+    lines.extend(f"    - {value}\n" for value in lookup)
+    for name, forms in aliases.items():
+        examples = [form for form in forms if form != name]
+        if not examples:
+            continue
+        lines.append(f"\n- synonym: {_quote(name)}\n")
+        lines.append("  examples: |\n")
+        lines.extend(f"    - {form}\n" for form in examples)
+    return "".join(lines)
+
+
+def write_nlu(path: Text, content: Text) -> bool:
+    """
+    Ghi file NLU đã sinh nếu nội dung khác file hiện có
+
+    Returns:
+        bool: True nếu file được ghi lại
+    """
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            if file.read() == content:
+                return False
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(content)
+    return True
@@ -0,0 +1,204 @@
+import re
+import unicodedata
+from typing import Collection, Dict, List, Optional, Text, Union
+
+# Các dấu thanh tiếng Việt (huyền, sắc, ngã, hỏi, nặng) ở dạng tổ hợp Unicode
+_TONE_MARKS = {"\u0300", "\u0301", "\u0303", "\u0309", "\u0323"}
+
+# Các khối Unicode chứa chữ Latin có dấu (Latin-1 đến Latin Extended Additional)
+_LATIN_RANGE = range(0x00C0, 0x2000)
+
+# Số chuỗi được ghi nhớ tối đa cho mỗi hàm chuẩn hóa trước khi làm mới bộ nhớ đệm
+_CACHE_SIZE = 16384
+
+# Phím bỏ dấu của kiểu gõ Telex (thanh, dấu mũ/trăng/móc), không bao giờ đứng sau nguyên âm
+# trong một âm tiết tiếng Việt nên có thể bỏ đi mà không đổi chữ
+_TELEX_KEYS = str.maketrans("", "", "sfrxjzw")
+_TELEX_VOWELS = "aeiouy"
+
+# Từ chỉ gồm chữ cái và chữ số không dấu, ứng viên của kiểu gõ Telex/VNI
+_ASCII_WORD = re.compile(r"(?<!\w)[a-z][a-z0-9]*(?!\w)")
+
+
+def _build_tables():
+    # Bảng là danh sách theo mã ký tự thay vì dict: str.translate tra danh sách nhanh hơn
+    # khoảng ba lần, ký tự nằm ngoài danh sách được giữ nguyên
+    fold: List[Union[int, Text, None]] = list(range(_LATIN_RANGE.stop))
+    tones: List[Union[int, Text, None]] = list(range(_LATIN_RANGE.stop))
+    for code in _LATIN_RANGE:
+        char = chr(code)
+        decomposed = unicodedata.normalize("NFD", char)
+        if len(decomposed) == 1:
+            continue
+        base = "".join(c for c in decomposed if not unicodedata.combining(c))
+        fold[code] = base
+        toneless = unicodedata.normalize("NFC", "".join(c for c in decomposed if c not in _TONE_MARKS))
+        if toneless != char:
+            tones[code] = toneless
+    fold[ord("đ")] = "d"
+    fold[ord("Đ")] = "D"
+    # Dấu tổ hợp còn sót lại (trên chữ không có dạng dựng sẵn) bị bỏ
+    for code in range(0x0300, 0x0370):
+        fold[code] = None
+    for mark in _TONE_MARKS:
+        tones[ord(mark)] = None
+    return fold, tones
+
+
+_FOLD_TABLE, _TONE_TABLE = _build_tables()
+
+# Chữ cái được giữ trong tên người: chữ Latin không dấu và mọi chữ có dấu tiếng Việt
+_NAME_LETTERS = frozenset(
+    [chr(c) for c in range(ord("a"), ord("z") + 1)] + [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+    + [chr(code) for code, base in enumerate(_FOLD_TABLE)
+       if isinstance(base, str) and base.isascii() and base.isalpha()])
+
+# Bảng xóa các ký tự khác chữ cái và khoảng trắng trong tên người, với các mã trong _LATIN_RANGE
+_NAME_TABLE = [code if chr(code) in _NAME_LETTERS or chr(code).isspace() else None
+               for code in range(_LATIN_RANGE.stop)]
+_NAME_TABLE_END = chr(_LATIN_RANGE.stop)
+
+_normalized: Dict[Text, Text] = {}
+_typed: Dict[Text, Optional[Text]] = {}
+_names: Dict[Text, Text] = {}
+
+
+def _remember(cache: Dict, key: Text, value):
+    if len(cache) >= _CACHE_SIZE:
+        cache.clear()
+    cache[key] = value
+    return value
+
+
+def strip_tones(text: Text) -> Text:
+    """
+    Bỏ dấu thanh nhưng giữ dấu mũ, dấu trăng, dấu móc ("vận" -> "vân", "hoá" -> "hoa")
+
+    Args:
+        text (str): Chuỗi cần xử lý
+
+    Returns:
+        str: Chuỗi đã bỏ dấu thanh, ở dạng NFC
+    """
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFC", text).translate(_TONE_TABLE)
+
+
+def fold_diacritics(text: Text) -> Text:
+    """
+    Bỏ toàn bộ dấu tiếng Việt ("Địa lý" -> "Dia ly")
+
+    Chuỗi ở dạng NFC giữ nguyên độ dài, nên vị trí trên chuỗi đã bỏ dấu dùng
+    được cho chuỗi gốc.
+
+    Args:
+        text (str): Chuỗi cần xử lý
+
+    Returns:
+        str: Chuỗi không dấu
+    """
+    if text.isascii():
+        return text
+    return text.translate(_FOLD_TABLE)
+
+
+def normalize_text(text: Text) -> Text:
+    """
+    Dạng chuẩn của văn bản người dùng nhập: NFC, viết thường, gộp khoảng trắng
+
+    Kết quả được ghi nhớ vì cùng một câu hỏi, tên ngành hay giá trị slot được
+    gửi lại rất nhiều lần.
+
+    Args:
+        text (str): Chuỗi cần chuẩn hóa
+
+    Returns:
+        str: Chuỗi đã chuẩn hóa
+    """
+    normalized = _normalized.get(text)
+    if normalized is None:
+        value = text if text.isascii() else unicodedata.normalize("NFC", text)
+        normalized = _remember(_normalized, text, " ".join(value.lower().split()))
+    return normalized
+
+
+def fold_typed(word: Text) -> Optional[Text]:
+    """
+    Dạng không dấu của một từ gõ kiểu Telex hoặc VNI khi bộ gõ không bật
+
+    Telex: "toans" -> "toan", "ddiaj" -> "dia", "vaatj" -> "vat". VNI: "to1an"
+    -> "toan", "d9ia5" -> "dia"; chữ số chỉ được coi là phím dấu khi có chữ cái
+    đứng sau, vì "toan8" thường là môn và điểm viết liền. Phím dấu ở cuối từ
+    ("ly1 7") được mon_hoc bỏ trước khi tách từ, theo ngữ cảnh của cả tin nhắn.
+
+    Args:
+        word (str): Một từ viết thường, không dấu
+
+    Returns:
+        str: Từ đã bỏ phím dấu, None nếu từ không có dấu hiệu gõ Telex/VNI
+    """
+    if word in _typed:
+        return _typed[word]
+    folded = None
+    if not word.isalpha():
+        # VNI: chữ số xen giữa các chữ cái
+        letters = word.rstrip("0123456789")
+        if letters.isalnum() and not letters.isalpha() and letters[0].isalpha():
+            folded = "".join(c for c in word if c.isalpha())
+    else:
+        head = word[2:] if word.startswith("dd") else word
+        vowel = next((i for i, c in enumerate(head) if c in _TELEX_VOWELS), None)
+        if vowel is not None:
+            tail = head[vowel:].translate(_TELEX_KEYS)
+            for double in ("aa", "ee", "oo"):
+                tail = tail.replace(double, double[0])
+            folded = ("d" if word.startswith("dd") else "") + head[:vowel] + tail
+            if folded == word or not folded:
+                folded = None
+    return _remember(_typed, word, folded)
+
+
+def repair_typing(text: Text, vocabulary: Collection[Text]) -> Text:
+    """
+    Thay các từ gõ kiểu Telex/VNI bằng dạng không dấu nếu dạng đó là một từ đã biết
+
+    Chỉ thay khi dạng không dấu có trong `vocabulary`, nên các từ tiếng Anh như
+    "english", "physics" không bị đổi.
+
+    Args:
+        text (str): Chuỗi đã chuẩn hóa bằng normalize_text
+        vocabulary (Collection[str]): Các từ không dấu được nhận
+
+    Returns:
+        str: Chuỗi sau khi thay
+    """
+    def replace(match):
+        word = match.group()
+        if word in vocabulary:
+            return word
+        folded = fold_typed(word)
+        return folded if folded in vocabulary else word
+
+    return _ASCII_WORD.sub(replace, text)
+
+
+def clean_name(name: Text) -> Text:
+    """
+    Chỉ giữ chữ cái tiếng Việt và khoảng trắng trong tên người, gộp khoảng trắng
+
+    Args:
+        name (str): Tên người dùng nhập
+
+    Returns:
+        str: Tên đã bỏ chữ số, ký tự đặc biệt
+    """
+    cleaned = _names.get(name)
+    if cleaned is None:
+        value = name if name.isascii() else unicodedata.normalize("NFC", name)
+        value = value.translate(_NAME_TABLE)
+        if value and max(value) >= _NAME_TABLE_END:
+            # Ký tự nằm ngoài bảng (chữ Hán, biểu tượng cảm xúc...) không được bảng xóa
+            value = "".join(c for c in value if c in _NAME_LETTERS or c.isspace())
+        cleaned = _remember(_names, name, " ".join(value.split()))
+    return cleaned
@@ -0,0 +1,110 @@
+import re
+from typing import Any, Dict, Iterable, Iterator, Optional, Pattern, Text, Tuple
+
+# Vị trí bắt đầu của mỗi từ (chữ hoặc số đứng sau một ký tự không phải chữ, số),
+# phần {} được thay bằng tập ký tự mở đầu các cụm từ
+_WORD_START = r"(?<![^\W_])(?=[^\W_])[{}]"
+
+# Khóa đánh dấu nút kết thúc một cụm từ trong cây trie
+_END = ""
+
+
+def is_boundary(text: Text, pos: int) -> bool:
+    """
+    Kiểm tra vị trí `pos` có phải là ranh giới từ hay không
+
+    Args:
+        text (str): Chuỗi cần kiểm tra
+        pos (int): Vị trí giữa hai ký tự
+
+    Returns:
+        bool: True nếu một trong hai ký tự hai bên không phải chữ hoặc số
+    """
+    return pos <= 0 or pos >= len(text) or not (text[pos - 1].isalnum() and text[pos].isalnum())
+
+
+class PhraseMatcher:
+    """
+    Bộ so khớp nhiều cụm từ cùng lúc dựa trên cây trie ký tự.
+
+    Chuỗi đầu vào được duyệt một lần từ trái sang phải. Tại mỗi đầu từ, bộ so
+    khớp đi theo cây trie và chọn cụm dài nhất kết thúc đúng ở ranh giới từ, nên
+    "it" không bao giờ khớp bên trong một từ dài hơn.
+    """
+
+    def __init__(self, phrases: Optional[Iterable[Tuple[Text, Any]]] = None):
+        self._root: Dict[Text, Any] = {}
+        self._starts: Optional[Pattern] = None
+        self.size = 0
+        self.max_length = 0
+        for phrase, value in phrases or ():
+            self.add(phrase, value)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, phrase: Text, value: Any) -> None:
+        """
+        Thêm một cụm từ vào bộ so khớp, cụm trùng sẽ được ghi đè giá trị
+
+        Args:
+            phrase (str): Cụm từ cần nhận dạng
+            value: Giá trị trả về khi cụm từ được tìm thấy
+        """
+        if not phrase:
+            return
+        node = self._root
+        self._starts = None
+        for char in phrase:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = value
+        self.max_length = max(self.max_length, len(phrase))
+
+    def match_at(self, text: Text, start: int) -> Optional[Tuple[int, Any]]:
+        """
+        Tìm cụm từ dài nhất bắt đầu tại `start` và kết thúc ở ranh giới từ
+
+        Returns:
+            tuple: (vị trí kết thúc, giá trị) hoặc None nếu không có cụm nào
+        """
+        node = self._root
+        best = None
+        pos = start
+        length = len(text)
+        while pos < length:
+            node = node.get(text[pos])
+            if node is None:
+                break
+            pos += 1
+            # Giống is_boundary, viết trực tiếp vì đây là vòng lặp nóng
+            if _END in node and (pos >= length or not (text[pos - 1].isalnum() and text[pos].isalnum())):
+                best = (pos, node[_END])
+        return best
+
+    def finditer(self, text: Text) -> Iterator[Tuple[int, int, Any]]:
+        """
+        Duyệt chuỗi một lần và trả về các cụm từ không chồng lấn nhau
+
+        Args:
+            text (str): Chuỗi cần tìm
+
+        Yields:
+            tuple: (vị trí bắt đầu, vị trí kết thúc, giá trị)
+        """
+        if self._starts is None:
+            # Chỉ dừng ở các đầu từ có ký tự đầu mở đầu được một cụm nào đó
+            chars = "".join(re.escape(char) for char in sorted(self._root))
+            self._starts = re.compile(_WORD_START.format(chars) if chars else r"(?!)")
+        pos = 0
+        for word in self._starts.finditer(text):
+            start = word.start()
+            # Bỏ qua các từ nằm trong cụm vừa khớp
+            if start < pos:
+                continue
+            found = self.match_at(text, start)
+            if found is not None:
+                end, value = found
+                yield start, end, value
+                pos = end
@@ -0,0 +1,236 @@
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Text
+
+from .catalog import TEN_TRUONG, CatalogSnapshot, get_artifact, get_catalog, live_snapshots, snapshot_of
+from .metrics import REGISTRY, tenant_label
+from .score_analytics import NganhScoreStats
+
+# Dựng sẵn toàn bộ câu trả lời ngay khi có phiên bản danh mục mới thay vì dựng dần khi được hỏi
+RESPONSE_CACHE_EAGER = os.environ.get("RESPONSE_CACHE_EAGER", "").lower() in ("1", "true", "yes")
+
+
+def render_danh_sach_nganh(nganh_list: List[Dict[Text, Any]], ten_truong: Text = TEN_TRUONG) -> Text:
+    """Danh sách toàn bộ các ngành đào tạo"""
+    parts = [f"{ten_truong} đào tạo các ngành sau:\n"]
+    parts.extend(f"\n{i}. {nganh['ten_nganh']}\n\n" for i, nganh in enumerate(nganh_list, 1))
+    return "".join(parts)
+
+
+def render_thong_tin(nganh: Dict[Text, Any]) -> Text:
+    """Phần giới thiệu chung của một ngành"""
+    return "".join([
+        f"Dưới đây là thông tin về ngành {nganh['ten_nganh']}, mã ngành {nganh['ma_nganh']}:\n\n",
+        nganh["gioi_thieu_chung"],
+    ])
+
+
+def render_co_hoi_viec_lam(nganh: Dict[Text, Any]) -> Text:
+    """Các cơ hội việc làm của một ngành"""
+    parts = [f"Cơ hội việc làm của ngành {nganh['ten_nganh']}:\n\n"]
+    parts.extend(f"{i}. {co_hoi}\n" for i, co_hoi in enumerate(nganh["co_hoi_viec_lam"], 1))
+    return "".join(parts)
+
+
+def render_diem_chuan(nganh: Dict[Text, Any]) -> Text:
+    """Điểm chuẩn các năm của một ngành, năm mới nhất trước"""
+    if not nganh["diem_chuan"]:
+        return f"Hiện tại chưa có thông tin về điểm chuẩn ngành {nganh['ten_nganh']}."
+
+    parts = [f"Điểm chuẩn ngành {nganh['ten_nganh']} các năm gần đây:\n\n"]
+    # Các năm của bản ghi Nganh đã được sắp tăng dần trong ma trận điểm chuẩn
+    for year in reversed(nganh["diem_chuan"]):
+        diem = nganh["diem_chuan"][year]
+        if diem is not None:
+            parts.append(f"Năm {year}: {diem} điểm\n")
+    return "".join(parts)
+
+
+def render_xu_huong(nganh: Dict[Text, Any], stats: NganhScoreStats) -> Text:
+    """Diễn biến điểm chuẩn qua các năm của một ngành, kèm thống kê và thứ hạng trong năm mới nhất"""
+    if not stats.diem_theo_nam:
+        return f"Hiện tại chưa có thông tin về điểm chuẩn ngành {nganh['ten_nganh']}."
+    nam_moi_nhat, diem_moi_nhat = stats.diem_theo_nam[-1]
+    if len(stats.diem_theo_nam) == 1:
+        return (f"Ngành {nganh['ten_nganh']} mới có điểm chuẩn năm {nam_moi_nhat}: {diem_moi_nhat} điểm, "
+                f"chưa đủ dữ liệu để đánh giá xu hướng.")
+
+    chenh_lech = dict(stats.chenh_lech)
+    parts = [f"Xu hướng điểm chuẩn ngành {nganh['ten_nganh']}:\n\n"]
+    for nam, diem in stats.diem_theo_nam:
+        parts.append(f"Năm {nam}: {diem} điểm" + (f" ({chenh_lech[nam]:+.2f})\n" if nam in chenh_lech else "\n"))
+
+    nam_dau, diem_dau = stats.diem_theo_nam[0]
+    thay_doi = diem_moi_nhat - diem_dau
+    if thay_doi > 0:
+        parts.append(f"\nNhìn chung điểm chuẩn tăng {thay_doi:.2f} điểm từ năm {nam_dau} đến năm {nam_moi_nhat}.\n")
+    elif thay_doi < 0:
+        parts.append(f"\nNhìn chung điểm chuẩn giảm {-thay_doi:.2f} điểm từ năm {nam_dau} đến năm {nam_moi_nhat}.\n")
+    else:
+        parts.append(f"\nĐiểm chuẩn năm {nam_moi_nhat} bằng năm {nam_dau}.\n")
+    parts.append(f"Thấp nhất {stats.thap_nhat[1]} điểm (năm {stats.thap_nhat[0]}), "
+                 f"cao nhất {stats.cao_nhat[1]} điểm (năm {stats.cao_nhat[0]}), "
+                 f"trung bình {stats.trung_binh:.2f} điểm.\n")
+    phan_vi = stats.phan_vi[nam_moi_nhat]
+    if phan_vi > 0:
+        parts.append(f"Năm {nam_moi_nhat}, điểm chuẩn ngành cao hơn {phan_vi:.0f}% số ngành của trường.")
+    else:
+        parts.append(f"Năm {nam_moi_nhat}, đây là một trong các ngành có điểm chuẩn thấp nhất của trường.")
+    return "".join(parts)
+
+
+# Các loại câu trả lời theo từng ngành
+RENDERERS: Dict[Text, Callable[[Dict[Text, Any]], Text]] = {
+    "thong_tin": render_thong_tin,
+    "co_hoi_viec_lam": render_co_hoi_viec_lam,
+    "diem_chuan": render_diem_chuan,
+}
+
+
+class ResponseCache:
+    """
+    Các câu trả lời chỉ phụ thuộc dữ liệu danh mục, dựng một lần cho mỗi phiên bản.
+
+    Bộ đệm gắn với snapshot nên tự được thay mới khi danh mục nạp lại. Câu trả
+    lời được dựng khi được hỏi lần đầu, hoặc dựng toàn bộ bằng `warm()`. Câu
+    trả lời theo ngành được lưu theo vị trí của ngành trong danh mục nên bộ
+    đệm có thể được pickle cùng danh mục (xem compiler).
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.nganh_list = snapshot.nganh_list
+        self._responses: Dict[Hashable, Text] = {}
+        self._positions = {id(nganh): vi_tri for vi_tri, nganh in enumerate(self.nganh_list)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self) -> Dict[Text, Any]:
+        state = self.__dict__.copy()
+        del state["_positions"], state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[Text, Any]) -> None:
+        self.__dict__.update(state)
+        self._positions = {id(nganh): vi_tri for vi_tri, nganh in enumerate(self.nganh_list)}
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable, render: Callable[[], Text]) -> Text:
+        response = self._responses.get(key)
+        if response is not None:
+            self.hits += 1
+            return response
+        response = render()
+        with self._lock:
+            self.misses += 1
+            return self._responses.setdefault(key, response)
+
+    def danh_sach_nganh(self, ten_truong: Text = TEN_TRUONG) -> Text:
+        """
+        Câu trả lời liệt kê các ngành đào tạo
+
+        Tên trường là một phần của khóa, vì bộ đệm dựng sẵn bởi compiler không
+        biết danh mục sẽ được nạp cho trường nào.
+
+        Args:
+            ten_truong (str): Tên trường sở hữu danh mục
+
+        Returns:
+            str: Câu trả lời đã dựng
+        """
+        return self._get(("danh_sach_nganh", ten_truong),
+                         lambda: render_danh_sach_nganh(self.nganh_list, ten_truong))
+
+    def nganh(self, kind: Text, nganh: Dict[Text, Any]) -> Text:
+        """
+        Câu trả lời về một ngành
+
+        Args:
+            kind (str): Loại câu trả lời, một khóa của RENDERERS
+            nganh (dict): Bản ghi ngành trong danh mục của snapshot
+
+        Returns:
+            str: Câu trả lời đã dựng
+        """
+        vi_tri = self._positions.get(id(nganh))
+        if vi_tri is None:
+            # Bản ghi không thuộc danh mục của bộ đệm thì dựng trực tiếp
+            return RENDERERS[kind](nganh)
+        return self._get((kind, vi_tri), lambda: RENDERERS[kind](nganh))
+
+    def warm(self, ten_truong: Text = TEN_TRUONG) -> None:
+        """Dựng sẵn toàn bộ câu trả lời của danh mục"""
+        self.danh_sach_nganh(ten_truong)
+        for nganh in self.nganh_list:
+            for kind in RENDERERS:
+                self.nganh(kind, nganh)
+
+    def stats(self) -> Dict[Text, Any]:
+        """Số câu trả lời đã dựng, bộ nhớ ước tính (byte) và tỉ lệ dùng lại"""
+        with self._lock:
+            responses = list(self._responses.values())
+            memory = sys.getsizeof(self._responses) + sum(sys.getsizeof(response) for response in responses)
+        return {
+            "version": self.version,
+            "size": len(responses),
+            "memory_bytes": memory,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def build_response_cache(snapshot: CatalogSnapshot) -> ResponseCache:
+    """Xây dựng bộ đệm câu trả lời cho một snapshot"""
+    cache = ResponseCache(snapshot)
+    if RESPONSE_CACHE_EAGER:
+        cache.warm(snapshot.ten_truong)
+    return cache
+
+
+def prebuild_response_cache(nganh_list: Optional[List[Dict[Text, Any]]] = None) -> None:
+    """
+    Dựng sẵn câu trả lời cho danh mục và cho mỗi lần nạp lại
+
+    Args:
+        nganh_list (list): Danh sách ngành của danh mục cần dựng, mặc định là danh mục dùng chung
+    """
+    snapshot = snapshot_of(nganh_list) if nganh_list is not None else None
+    catalog = snapshot.catalog if snapshot is not None else None
+    (catalog or get_catalog()).prebuild_artifact("response_cache", build_response_cache)
+
+
+def get_response_cache(nganh_list: List[Dict[Text, Any]]) -> ResponseCache:
+    """
+    Lấy bộ đệm câu trả lời cho danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        ResponseCache: Bộ đệm câu trả lời
+    """
+    if RESPONSE_CACHE_EAGER:
+        prebuild_response_cache(nganh_list)
+    return get_artifact(nganh_list, "response_cache", build_response_cache)
+
+
+def _collect_metrics():
+    totals: Dict[Text, Dict[Text, int]] = {}
+    for snapshot in live_snapshots():
+        cache = snapshot._artifacts.get("response_cache")
+        if cache is not None:
+            stats = cache.stats()
+            total = totals.setdefault(tenant_label(snapshot.tenant), dict.fromkeys(stats, 0))
+            for key in ("hits", "misses", "size", "memory_bytes"):
+                total[key] += stats[key]
+    for name, kind, key, documentation in (
+            ("response_cache_hits_total", "counter", "hits", "Số câu trả lời lấy từ bộ đệm"),
+            ("response_cache_misses_total", "counter", "misses", "Số câu trả lời phải dựng"),
+            ("response_cache_entries", "gauge", "size", "Số câu trả lời đang được lưu"),
+            ("response_cache_memory_bytes", "gauge", "memory_bytes", "Bộ nhớ ước tính của các câu trả lời đã lưu")):
+        yield name, kind, documentation, [("", {"tenant": tenant}, total[key]) for tenant, total in totals.items()]
+
+
+REGISTRY.add_collector(_collect_metrics)
@@ -0,0 +1,169 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, NamedTuple, Optional, Text, Tuple
+
+from .catalog import CatalogSnapshot, get_artifact
+
+
+class NganhScoreStats(NamedTuple):
+    """Thống kê điểm chuẩn của một ngành qua các năm có điểm"""
+    # (năm, điểm) theo năm tăng dần, bỏ các năm chưa có điểm
+    diem_theo_nam: Tuple[Tuple[Text, float], ...]
+    # (năm, điểm năm đó trừ điểm của năm có điểm liền trước), từ năm có điểm thứ hai
+    chenh_lech: Tuple[Tuple[Text, float], ...]
+    thap_nhat: Optional[Tuple[Text, float]]
+    cao_nhat: Optional[Tuple[Text, float]]
+    trung_binh: Optional[float]
+    # năm -> phần trăm số ngành của danh mục có điểm chuẩn năm đó thấp hơn ngành này
+    phan_vi: Dict[Text, float]
+    # Năm có điểm gần nhất với từng năm trong khoảng năm của danh mục (xem ScoreAnalytics.nam_gan_nhat)
+    bang_nam_gan_nhat: Tuple[Optional[Text], ...]
+
+    @property
+    def nam_moi_nhat(self) -> Optional[Text]:
+        """Năm gần nhất ngành có điểm chuẩn"""
+        return self.diem_theo_nam[-1][0] if self.diem_theo_nam else None
+
+    @property
+    def diem_moi_nhat(self) -> Optional[float]:
+        return self.diem_theo_nam[-1][1] if self.diem_theo_nam else None
+
+
+class ScoreAnalytics:
+    """
+    Thống kê điểm chuẩn của danh mục, tính một lần cho mỗi phiên bản.
+
+    Gồm năm mới nhất có dữ liệu của cả danh mục (thay cho năm viết cứng trong
+    các hành động, nên năm mới trong nganh.json được dùng ngay khi nạp lại),
+    thống kê từng ngành và thứ hạng phần trăm của từng ngành trong mỗi năm. Năm
+    có điểm gần nhất được tra bằng bảng dựng sẵn cho mọi năm trong khoảng năm
+    của danh mục; năm ngoài khoảng được kéo về đầu mút, nên mọi lần tra đều là
+    O(1). Thống kê được lưu theo vị trí ngành nên pickle được cùng danh mục.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.nganh_list = snapshot.nganh_list
+
+        cutoffs: Dict[Text, List[float]] = {}
+        for nganh in self.nganh_list:
+            for nam, diem in nganh["diem_chuan"].items():
+                if diem is not None:
+                    cutoffs.setdefault(nam, []).append(diem)
+        years = sorted(cutoffs, key=int)
+        self.years: List[Text] = years
+        self.latest_year: Optional[Text] = years[-1] if years else None
+        self.first_year = int(years[0]) if years else 0
+        self.last_year = int(years[-1]) if years else -1
+        # Điểm chuẩn mỗi năm của cả danh mục, tăng dần
+        self.cutoffs: Dict[Text, List[float]] = {nam: sorted(values) for nam, values in cutoffs.items()}
+
+        self.stats: List[NganhScoreStats] = [self._build_stats(nganh) for nganh in self.nganh_list]
+        self._positions = {id(nganh): vi_tri for vi_tri, nganh in enumerate(self.nganh_list)}
+
+    def __getstate__(self) -> Dict[Text, Any]:
+        state = self.__dict__.copy()
+        del state["_positions"]
+        return state
+
+    def __setstate__(self, state: Dict[Text, Any]) -> None:
+        self.__dict__.update(state)
+        self._positions = {id(nganh): vi_tri for vi_tri, nganh in enumerate(self.nganh_list)}
+
+    def _build_stats(self, nganh: Dict[Text, Any]) -> NganhScoreStats:
+        diem_theo_nam = tuple(sorted(((nam, diem) for nam, diem in nganh["diem_chuan"].items() if diem is not None),
+                                     key=lambda item: int(item[0])))
+        chenh_lech = tuple((nam, diem - truoc) for (_, truoc), (nam, diem) in zip(diem_theo_nam, diem_theo_nam[1:]))
+        scores = [diem for _, diem in diem_theo_nam]
+
+        # Hai năm cách đều thì lấy năm nhỏ hơn, giống Nganh.nam_gan_nhat
+        numbers = [int(nam) for nam, _ in diem_theo_nam]
+        bang = []
+        for nam in range(self.first_year, self.last_year + 1):
+            if not numbers:
+                bang.append(None)
+                continue
+            hi = bisect_left(numbers, nam)
+            if hi == len(numbers) or (hi > 0 and nam - numbers[hi - 1] <= numbers[hi] - nam):
+                hi -= 1
+            bang.append(diem_theo_nam[hi][0])
+
+        return NganhScoreStats(
+            diem_theo_nam=diem_theo_nam,
+            chenh_lech=chenh_lech,
+            # Điểm bằng nhau thì lấy năm gần nhất
+            thap_nhat=min(reversed(diem_theo_nam), key=lambda item: item[1]) if diem_theo_nam else None,
+            cao_nhat=max(reversed(diem_theo_nam), key=lambda item: item[1]) if diem_theo_nam else None,
+            trung_binh=sum(scores) / len(scores) if scores else None,
+            phan_vi={nam: self.phan_vi(nam, diem) for nam, diem in diem_theo_nam},
+            bang_nam_gan_nhat=tuple(bang),
+        )
+
+    def of(self, nganh: Dict[Text, Any]) -> NganhScoreStats:
+        """
+        Thống kê của một ngành
+
+        Args:
+            nganh (dict): Bản ghi ngành, thường thuộc danh mục của snapshot
+
+        Returns:
+            NganhScoreStats: Thống kê đã tính sẵn, hoặc tính ngay nếu ngành
+            không thuộc danh mục
+        """
+        vi_tri = self._positions.get(id(nganh))
+        if vi_tri is None:
+            return self._build_stats(nganh)
+        return self.stats[vi_tri]
+
+    def nam_gan_nhat(self, nganh: Dict[Text, Any], nam: Text) -> Optional[Text]:
+        """
+        Năm gần `nam` nhất mà ngành có điểm chuẩn
+
+        Args:
+            nganh (dict): Bản ghi ngành
+            nam (str): Năm cần tìm
+
+        Returns:
+            str: Năm gần nhất, None nếu ngành chưa có điểm năm nào hoặc `nam` không phải số
+        """
+        try:
+            target = int(nam)
+        except (ValueError, TypeError):
+            return None
+        bang = self.of(nganh).bang_nam_gan_nhat
+        if not bang:
+            return None
+        return bang[min(max(target, self.first_year), self.last_year) - self.first_year]
+
+    def phan_vi(self, nam: Text, diem: float) -> Optional[float]:
+        """
+        Phần trăm số ngành có điểm chuẩn năm `nam` thấp hơn `diem`
+
+        Args:
+            nam (str): Năm
+            diem (float): Mức điểm, có thể là điểm chuẩn của một ngành hoặc điểm của thí sinh
+
+        Returns:
+            float: Từ 0 đến 100, None nếu năm đó không có dữ liệu
+        """
+        cutoffs = self.cutoffs.get(str(nam))
+        if not cutoffs:
+            return None
+        return bisect_left(cutoffs, diem) * 100 / len(cutoffs)
+
+
+def build_score_analytics(snapshot: CatalogSnapshot) -> ScoreAnalytics:
+    """Tính thống kê điểm chuẩn cho một snapshot"""
+    return ScoreAnalytics(snapshot)
+
+
+def get_score_analytics(nganh_list: List[Dict[Text, Any]]) -> ScoreAnalytics:
+    """
+    Lấy thống kê điểm chuẩn cho danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        ScoreAnalytics: Thống kê điểm chuẩn
+    """
+    return get_artifact(nganh_list, "score_analytics", build_score_analytics)
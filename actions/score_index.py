@@ -0,0 +1,331 @@
+import heapq
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+from .catalog import CatalogSnapshot, get_artifact
+
+
+class CutoffEntry(NamedTuple):
+    """Một ngành trong chỉ mục điểm chuẩn của một năm"""
+    diem_chuan: float
+    ten_nganh: Text
+    ma_khoi: Text
+    nganh: Dict[Text, Any]
+
+
+class YearCutoffIndex:
+    """
+    Các ngành có điểm chuẩn trong một năm, sắp theo điểm chuẩn tăng dần.
+
+    Với một mức điểm, các ngành thí sinh có thể cân nhắc (điểm chuẩn không vượt
+    quá điểm + biên độ) là một đoạn đầu của danh sách, tìm được bằng tìm kiếm nhị
+    phân. Thứ tự trong đoạn đó trùng với thứ tự "chênh lệch giảm dần, tên tăng
+    dần" mà hành động tư vấn hiển thị, nên top-k chỉ là cắt k phần tử đầu.
+    """
+
+    def __init__(self, entries: Iterable[CutoffEntry]):
+        self.entries: List[CutoffEntry] = sorted(entries, key=lambda entry: (entry.diem_chuan, entry.ten_nganh))
+        self.cutoffs: List[float] = [entry.diem_chuan for entry in self.entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def count_within(self, diem: float, margin: float = 2) -> int:
+        """
+        Số ngành có điểm chuẩn đủ gần với mức điểm
+
+        Dùng đúng phép so sánh `diem - diem_chuan >= -margin` của cách duyệt cũ
+        để kết quả không lệch do làm tròn số thực.
+
+        Args:
+            diem (float): Điểm của thí sinh
+            margin (float): Số điểm được phép thiếu so với điểm chuẩn
+
+        Returns:
+            int: Số ngành thỏa mãn, chúng là các phần tử đầu của `entries`
+        """
+        cutoffs = self.cutoffs
+        lo, hi = 0, len(cutoffs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if diem - cutoffs[mid] >= -margin:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def within(self, diem: float, margin: float = 2, limit: Optional[int] = None) -> List[CutoffEntry]:
+        """
+        Các ngành có điểm chuẩn đủ gần với mức điểm, chênh lệch lớn nhất trước
+
+        Args:
+            diem (float): Điểm của thí sinh
+            margin (float): Số điểm được phép thiếu so với điểm chuẩn
+            limit (int): Số ngành tối đa cần lấy
+
+        Returns:
+            list: Các CutoffEntry đã sắp xếp
+        """
+        count = self.count_within(diem, margin)
+        if limit is not None:
+            count = min(count, limit)
+        return self.entries[:count]
+
+    def count_within_many(self, scores: Iterable[float], margin: float = 2) -> List[int]:
+        """
+        Đếm số ngành phù hợp cho nhiều mức điểm cùng lúc
+
+        Các mức điểm được sắp xếp rồi quét song song với danh sách điểm chuẩn,
+        nên cả lô chỉ tốn O(n + m log m) thay vì m lần tìm kiếm riêng.
+
+        Args:
+            scores (iterable): Các mức điểm
+            margin (float): Số điểm được phép thiếu so với điểm chuẩn
+
+        Returns:
+            list: Số ngành phù hợp, theo đúng thứ tự các mức điểm đầu vào
+        """
+        scores = list(scores)
+        counts = [0] * len(scores)
+        cutoffs = self.cutoffs
+        pos = 0
+        for i in sorted(range(len(scores)), key=scores.__getitem__):
+            diem = scores[i]
+            while pos < len(cutoffs) and diem - cutoffs[pos] >= -margin:
+                pos += 1
+            counts[i] = pos
+        return counts
+
+    def within_many(self, scores: Iterable[float], margin: float = 2,
+                    limit: Optional[int] = None) -> List[List[CutoffEntry]]:
+        """
+        Các ngành phù hợp cho nhiều mức điểm cùng lúc
+
+        Returns:
+            list: Với mỗi mức điểm, danh sách CutoffEntry như `within`
+        """
+        result = []
+        for count in self.count_within_many(scores, margin):
+            if limit is not None:
+                count = min(count, limit)
+            result.append(self.entries[:count])
+        return result
+
+
+class CutoffScoreIndex:
+    """
+    Chỉ mục điểm chuẩn theo từng năm, xây dựng một lần cho mỗi phiên bản danh mục
+    """
+
+    def __init__(self, nganh_list: List[Dict[Text, Any]]):
+        by_year: Dict[Text, List[CutoffEntry]] = {}
+        for nganh in nganh_list:
+            ma_khoi = nganh["khoi_xet_tuyen"][0] if nganh["khoi_xet_tuyen"] else "N/A"
+            ten_nganh = nganh["ten_nganh"]
+            for nam, diem_chuan in nganh["diem_chuan"].items():
+                if diem_chuan is not None:
+                    by_year.setdefault(nam, []).append(CutoffEntry(diem_chuan, ten_nganh, ma_khoi, nganh))
+        self.years: Dict[Text, YearCutoffIndex] = {nam: YearCutoffIndex(entries) for nam, entries in by_year.items()}
+        self._empty = YearCutoffIndex([])
+
+    def year(self, nam: Text) -> YearCutoffIndex:
+        """Chỉ mục của một năm, rỗng nếu năm đó không có dữ liệu"""
+        return self.years.get(str(nam), self._empty)
+
+
+class KhoiEntry(NamedTuple):
+    """Một ngành xét tuyển bằng một khối trong một năm"""
+    diem_chuan: float
+    ten_nganh: Text
+    vi_tri: int
+    nganh: Dict[Text, Any]
+
+
+class Recommendation(NamedTuple):
+    """Một ngành được gợi ý theo điểm của một khối"""
+    ten_nganh: Text
+    ma_khoi: Text
+    diem_dat: float
+    diem_chuan: float
+    chenh_lech: float
+    nganh: Dict[Text, Any]
+
+
+class KhoiYearIndex:
+    """
+    Các ngành xét tuyển bằng một khối trong một năm, sắp theo điểm chuẩn tăng dần.
+
+    Với điểm khối `diem`, các ngành đạt điểm chuẩn là một đoạn đầu của danh
+    sách, và trong đoạn đó chênh lệch `diem - diem_chuan` giảm dần.
+    """
+
+    def __init__(self, entries: Iterable[KhoiEntry]):
+        self.entries: List[KhoiEntry] = sorted(entries, key=lambda entry: (entry.diem_chuan, entry.ten_nganh, entry.vi_tri))
+        self.cutoffs: List[float] = [entry.diem_chuan for entry in self.entries]
+        # Các bản ghi cùng tên ngành, theo thứ tự trong danh mục
+        self.by_name: Dict[Text, List[KhoiEntry]] = {}
+        for entry in sorted(self.entries, key=lambda entry: entry.vi_tri):
+            self.by_name.setdefault(entry.ten_nganh, []).append(entry)
+
+    def count_reachable(self, diem: float) -> int:
+        """Số ngành có điểm chuẩn không vượt quá `diem` (các phần tử đầu của `entries`)"""
+        cutoffs = self.cutoffs
+        lo, hi = 0, len(cutoffs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if diem >= cutoffs[mid]:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def first_reachable(self, ten_nganh: Text, diem: float) -> Optional[KhoiEntry]:
+        """Bản ghi đầu tiên trong danh mục mang tên `ten_nganh` mà `diem` đạt điểm chuẩn"""
+        for entry in self.by_name.get(ten_nganh, ()):
+            if diem >= entry.diem_chuan:
+                return entry
+        return None
+
+
+class KhoiCutoffIndex:
+    """
+    Chỉ mục khối -> ngành theo từng năm, xây dựng một lần cho mỗi phiên bản danh mục
+    """
+
+    def __init__(self, nganh_list: List[Dict[Text, Any]]):
+        by_year: Dict[Text, Dict[Text, List[KhoiEntry]]] = {}
+        for vi_tri, nganh in enumerate(nganh_list):
+            ten_nganh = nganh["ten_nganh"]
+            khoi_xet_tuyen = list(dict.fromkeys(nganh["khoi_xet_tuyen"]))
+            for nam, diem_chuan in nganh["diem_chuan"].items():
+                if diem_chuan is None:
+                    continue
+                entry = KhoiEntry(diem_chuan, ten_nganh, vi_tri, nganh)
+                year = by_year.setdefault(nam, {})
+                for ma_khoi in khoi_xet_tuyen:
+                    year.setdefault(ma_khoi, []).append(entry)
+        self.years: Dict[Text, Dict[Text, KhoiYearIndex]] = {
+            nam: {ma_khoi: KhoiYearIndex(entries) for ma_khoi, entries in blocks.items()}
+            for nam, blocks in by_year.items()
+        }
+        self._empty = KhoiYearIndex([])
+
+    def get(self, nam: Text, ma_khoi: Text) -> KhoiYearIndex:
+        """Chỉ mục của một khối trong một năm, rỗng nếu không có dữ liệu"""
+        return self.years.get(str(nam), {}).get(ma_khoi, self._empty)
+
+    def recommend(self, nam: Text, khoi_scores: Sequence[Tuple[Text, float]],
+                  limit: Optional[int] = None) -> List[Recommendation]:
+        """
+        Gợi ý các ngành mà điểm khối đạt điểm chuẩn, chênh lệch lớn nhất trước
+
+        Mỗi ngành (theo tên) chỉ xuất hiện một lần, gắn với khối đứng trước nhất
+        trong `khoi_scores` mà ngành đạt điểm chuẩn, giống cách duyệt lần lượt
+        từng khối rồi bỏ qua ngành trùng tên. Danh sách gợi ý được trộn từ các
+        đoạn đầu đã sắp xếp của từng khối nên chỉ duyệt khoảng `limit` ngành.
+
+        Args:
+            nam (str): Năm xét điểm chuẩn
+            khoi_scores (list): Các cặp (mã khối, điểm khối) theo thứ tự ưu tiên
+            limit (int): Số ngành tối đa cần lấy
+
+        Returns:
+            list: Các Recommendation theo (chênh lệch giảm dần, tên ngành)
+        """
+        indexes = [(ma_khoi, diem, self.get(nam, ma_khoi)) for ma_khoi, diem in khoi_scores]
+
+        def stream(rank: int, ma_khoi: Text, diem: float, index: KhoiYearIndex) -> Iterator[tuple]:
+            for entry in index.entries[:index.count_reachable(diem)]:
+                chenh_lech = diem - entry.diem_chuan
+                yield (-chenh_lech, entry.ten_nganh, rank, entry.vi_tri, chenh_lech, ma_khoi, diem, entry)
+
+        streams = [stream(rank, ma_khoi, diem, index) for rank, (ma_khoi, diem, index) in enumerate(indexes)]
+        result: List[Recommendation] = []
+        for _, ten_nganh, rank, _, chenh_lech, ma_khoi, diem, entry in heapq.merge(*streams):
+            # Ngành đã đạt ở một khối ưu tiên hơn thì thuộc về khối đó
+            if any(index.first_reachable(ten_nganh, diem_truoc) is not None
+                   for _, diem_truoc, index in indexes[:rank]):
+                continue
+            # Trong cùng khối, chỉ giữ bản ghi đầu tiên trong danh mục mang tên này
+            if indexes[rank][2].first_reachable(ten_nganh, diem) is not entry:
+                continue
+            result.append(Recommendation(ten_nganh, ma_khoi, diem, entry.diem_chuan, chenh_lech, entry.nganh))
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def recommend_many(self, nam: Text, students: Iterable[Sequence[Tuple[Text, float]]],
+                       limit: Optional[int] = None) -> List[List[Recommendation]]:
+        """
+        Gợi ý cho nhiều thí sinh cùng lúc, kết quả giống hệt `recommend` cho từng thí sinh
+
+        Thay vì trộn từng luồng và kiểm tra lại các khối đứng trước, mỗi thí sinh
+        chỉ duyệt một lần đoạn đầu đạt điểm chuẩn của từng khối theo thứ tự ưu
+        tiên: khối đầu tiên gặp một tên ngành giữ ngành đó, trong cùng khối giữ
+        bản ghi đứng trước trong danh mục; sau đó sắp một lần theo đúng khóa
+        (chênh lệch giảm dần, tên ngành, thứ tự khối, vị trí) của `recommend`.
+        Chỉ mục của từng khối được tra một lần cho cả lô.
+
+        Args:
+            nam (str): Năm xét điểm chuẩn
+            students (iterable): Với mỗi thí sinh, các cặp (mã khối, điểm khối) theo thứ tự ưu tiên
+            limit (int): Số ngành tối đa cần lấy cho mỗi thí sinh
+
+        Returns:
+            list: Với mỗi thí sinh, danh sách Recommendation như `recommend`
+        """
+        indexes: Dict[Text, KhoiYearIndex] = {}
+        result = []
+        for khoi_scores in students:
+            claimed: Dict[Text, tuple] = {}
+            for rank, (ma_khoi, diem) in enumerate(khoi_scores):
+                index = indexes.get(ma_khoi)
+                if index is None:
+                    index = indexes[ma_khoi] = self.get(nam, ma_khoi)
+                for entry in index.entries[:index.count_reachable(diem)]:
+                    current = claimed.get(entry.ten_nganh)
+                    if current is None or (current[2] == rank and entry.vi_tri < current[3]):
+                        claimed[entry.ten_nganh] = (entry.diem_chuan - diem, entry.ten_nganh, rank, entry.vi_tri,
+                                                    ma_khoi, diem, entry)
+            ordered = sorted(claimed.values())
+            if limit is not None:
+                ordered = ordered[:limit]
+            result.append([Recommendation(ten_nganh, ma_khoi, diem, entry.diem_chuan, diem - entry.diem_chuan,
+                                          entry.nganh)
+                           for _, ten_nganh, _, _, ma_khoi, diem, entry in ordered])
+        return result
+
+
+def build_score_index(snapshot: CatalogSnapshot) -> CutoffScoreIndex:
+    """Xây dựng chỉ mục điểm chuẩn cho một snapshot"""
+    return CutoffScoreIndex(snapshot.nganh_list)
+
+
+def get_score_index(nganh_list: List[Dict[Text, Any]]) -> CutoffScoreIndex:
+    """
+    Lấy chỉ mục điểm chuẩn cho danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        CutoffScoreIndex: Chỉ mục điểm chuẩn
+    """
+    return get_artifact(nganh_list, "score_index", build_score_index)
+
+
+def build_khoi_index(snapshot: CatalogSnapshot) -> KhoiCutoffIndex:
+    """Xây dựng chỉ mục khối -> ngành cho một snapshot"""
+    return KhoiCutoffIndex(snapshot.nganh_list)
+
+
+def get_khoi_index(nganh_list: List[Dict[Text, Any]]) -> KhoiCutoffIndex:
+    """
+    Lấy chỉ mục khối -> ngành cho danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        KhoiCutoffIndex: Chỉ mục khối -> ngành
+    """
+    return get_artifact(nganh_list, "khoi_index", build_khoi_index)
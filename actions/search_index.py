@@ -0,0 +1,277 @@
+import math
+import re
+import unicodedata
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Text, Tuple
+
+from .catalog import CatalogSnapshot, get_artifact
+from .normalize import fold_diacritics, normalize_text
+from .viet_tat import expand_abbreviations
+
+# Tham số BM25: k1 quyết định mức bão hòa của tần suất từ, b mức chuẩn hóa theo độ dài văn bản
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Số ngành trả về mặc định và độ dài tối đa (ký tự) của đoạn trích
+SO_KET_QUA = 3
+DO_DAI_TRICH_DOAN = 220
+
+# Số câu tối đa được ghi cho mỗi từ của một ngành khi chọn đoạn trích; giữ các
+# câu đầu tiên để thời gian chọn đoạn trích không tăng theo độ dài phần giới thiệu
+SO_CAU_MOI_TU = 64
+
+# Các âm tiết (đã bỏ dấu) chỉ dùng để hỏi, không mang nội dung. Từ ghép có chúng
+# vẫn được đánh chỉ mục theo cặp âm tiết ("lam viec", "o to").
+TU_DUNG = frozenset(
+    "nganh nao gi la o de va cua cho ve nhung cac duoc nen voi trong thi co khong toi em minh ban hoc muon "
+    "mot nhu the sao hay hoac ma neu khi tai tu den".split())
+
+# Âm tiết hoặc số trong chuỗi đã bỏ dấu, viết thường
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Ranh giới câu trong phần giới thiệu: dấu chấm câu theo sau là khoảng trắng, hoặc xuống dòng
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+# Đánh dấu in đậm trong dữ liệu ngành
+_MARKDOWN = re.compile(r"\*\*|__")
+
+
+def tokenize(text: Text) -> List[Text]:
+    """
+    Tách chuỗi thành các âm tiết không dấu, viết thường
+
+    Args:
+        text (str): Chuỗi bất kỳ
+
+    Returns:
+        list: Các âm tiết theo thứ tự trong chuỗi
+    """
+    return _TOKEN.findall(fold_diacritics(normalize_text(text)))
+
+
+def terms_of(tokens: List[Text]) -> List[Text]:
+    """
+    Các từ được đánh chỉ mục của một dãy âm tiết: âm tiết đơn không phải từ dừng
+    và cặp âm tiết liền nhau (trừ cặp gồm hai từ dừng)
+
+    Args:
+        tokens (list): Kết quả của tokenize
+
+    Returns:
+        list: Các từ, có thể lặp lại
+    """
+    terms = [token for token in tokens if token not in TU_DUNG]
+    terms.extend(f"{first} {second}" for first, second in zip(tokens, tokens[1:])
+                 if first not in TU_DUNG or second not in TU_DUNG)
+    return terms
+
+
+def split_sentences(nganh: Dict[Text, Any]) -> List[Text]:
+    """Các câu của phần giới thiệu và từng cơ hội việc làm của một ngành, đã bỏ đánh dấu in đậm"""
+    sentences = []
+    gioi_thieu = unicodedata.normalize("NFC", _MARKDOWN.sub("", nganh.get("gioi_thieu_chung") or ""))
+    sentences.extend(cau.strip() for cau in _SENTENCE_END.split(gioi_thieu) if cau.strip())
+    for co_hoi in nganh.get("co_hoi_viec_lam") or []:
+        co_hoi = unicodedata.normalize("NFC", _MARKDOWN.sub("", co_hoi)).strip()
+        if co_hoi:
+            sentences.append(co_hoi)
+    return sentences
+
+
+class SearchResult(NamedTuple):
+    """Một ngành tìm được cùng đoạn trích có các từ khớp được in đậm"""
+    nganh: Dict[Text, Any]
+    diem: float
+    trich_doan: Text
+
+
+class NganhSearchIndex:
+    """
+    Chỉ mục toàn văn (inverted index) trên phần giới thiệu và cơ hội việc làm
+    của các ngành, xếp hạng bằng BM25, xây dựng một lần cho mỗi phiên bản danh mục.
+
+    Từ được đánh chỉ mục là âm tiết không dấu và cặp âm tiết liền nhau, nên
+    "cảng biển" khớp cả cách gõ không dấu và được ưu tiên hơn văn bản chỉ có
+    "cảng" và "biển" rời nhau. Mỗi mục của danh sách ngành theo từ (posting)
+    ghi kèm tối đa SO_CAU_MOI_TU câu đầu tiên chứa từ đó, nên đoạn trích được
+    chọn chỉ từ các posting của câu truy vấn: thời gian tìm kiếm phụ thuộc số
+    ngành chứa từ, không phụ thuộc độ dài phần giới thiệu.
+    """
+
+    def __init__(self, nganh_list: List[Dict[Text, Any]], k1: float = BM25_K1, b: float = BM25_B):
+        self.records = nganh_list
+        self.sentences: List[List[Text]] = []
+        # Từ -> [(vị trí ngành, tần suất, các câu chứa từ)]
+        self.postings: Dict[Text, List[Tuple[int, int, Tuple[int, ...]]]] = {}
+        lengths = []
+        for vi_tri, nganh in enumerate(nganh_list):
+            sentences = split_sentences(nganh)
+            self.sentences.append(sentences)
+            counts: Dict[Text, int] = {}
+            where: Dict[Text, List[int]] = {}
+            length = 0
+            for so_cau, cau in enumerate(sentences):
+                tokens = tokenize(cau)
+                length += len(tokens)
+                for term in terms_of(tokens):
+                    counts[term] = counts.get(term, 0) + 1
+                    cau_chua = where.setdefault(term, [])
+                    if len(cau_chua) < SO_CAU_MOI_TU and (not cau_chua or cau_chua[-1] != so_cau):
+                        cau_chua.append(so_cau)
+            for term, count in counts.items():
+                self.postings.setdefault(term, []).append((vi_tri, count, tuple(where[term])))
+            lengths.append(length)
+
+        size = len(nganh_list)
+        avg_length = (sum(lengths) / size) if size else 0.0
+        self.k1 = k1
+        # Phần mẫu số BM25 chỉ phụ thuộc độ dài văn bản, tính sẵn cho từng ngành
+        self.norms = [k1 * (1 - b + b * length / avg_length) if avg_length else k1 for length in lengths]
+        self.idf = {term: math.log(1 + (size - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for term, posting in self.postings.items()}
+
+    @staticmethod
+    def parse_query(query: Text) -> Tuple[List[Text], Dict[Text, Optional[Set[Text]]]]:
+        """
+        Phân tích câu truy vấn sau khi mở rộng viết tắt
+
+        Returns:
+            tuple: (các từ khác nhau theo thứ tự xuất hiện, {âm tiết không dấu: các cách gõ của âm tiết,
+            None nếu câu truy vấn được gõ không dấu})
+        """
+        text = expand_abbreviations(normalize_text(query))
+        folded = fold_diacritics(text)
+        accented = folded != text and len(folded) == len(text)
+        forms: Dict[Text, Optional[Set[Text]]] = {}
+        tokens = []
+        for match in _TOKEN.finditer(folded):
+            tokens.append(match.group())
+            if accented:
+                forms.setdefault(match.group(), set()).add(text[match.start():match.end()])
+            else:
+                forms[match.group()] = None
+        return list(dict.fromkeys(terms_of(tokens))), forms
+
+    def search(self, query: Text, limit: Optional[int] = SO_KET_QUA) -> List[SearchResult]:
+        """
+        Tìm các ngành có phần giới thiệu hoặc cơ hội việc làm phù hợp nhất với câu hỏi
+
+        Args:
+            query (str): Câu hỏi của người dùng, ví dụ "ngành nào làm việc ở cảng biển"
+            limit (int): Số ngành tối đa cần lấy
+
+        Returns:
+            list: Các SearchResult theo điểm BM25 giảm dần
+        """
+        terms, forms = self.parse_query(query)
+        terms = [term for term in terms if term in self.postings]
+        scores: Dict[int, float] = {}
+        k1 = self.k1
+        norms = self.norms
+        for term in terms:
+            idf = self.idf[term]
+            for vi_tri, count, _ in self.postings[term]:
+                scores[vi_tri] = scores.get(vi_tri, 0.0) + idf * count * (k1 + 1) / (count + norms[vi_tri])
+
+        ranked = sorted(scores, key=lambda vi_tri: (-scores[vi_tri], vi_tri))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [SearchResult(self.records[vi_tri], scores[vi_tri], self.snippet(vi_tri, terms, forms))
+                for vi_tri in ranked]
+
+    def snippet(self, vi_tri: int, terms: List[Text], forms: Dict[Text, Optional[Set[Text]]]) -> Text:
+        """
+        Câu của ngành chứa nhiều từ truy vấn nhất (tính theo IDF), các âm tiết khớp được in đậm
+
+        Args:
+            vi_tri (int): Vị trí ngành trong danh mục
+            terms (list): Các từ truy vấn có trong chỉ mục
+            forms (dict): Các cách gõ của từng âm tiết truy vấn (xem parse_query)
+
+        Returns:
+            str: Đoạn trích, rỗng nếu ngành không có câu nào chứa từ truy vấn
+        """
+        sentence_scores: Dict[int, float] = {}
+        for term in terms:
+            idf = self.idf[term]
+            for posting_vi_tri, _, cau_chua in self.postings[term]:
+                if posting_vi_tri == vi_tri:
+                    for so_cau in cau_chua:
+                        sentence_scores[so_cau] = sentence_scores.get(so_cau, 0.0) + idf
+                    break
+        if not sentence_scores:
+            return ""
+        best = min(sentence_scores, key=lambda so_cau: (-sentence_scores[so_cau], so_cau))
+        return highlight(self.sentences[vi_tri][best], terms, forms)
+
+
+def highlight(sentence: Text, terms: List[Text], forms: Dict[Text, Optional[Set[Text]]],
+              max_length: int = DO_DAI_TRICH_DOAN) -> Text:
+    """
+    In đậm các chỗ khớp câu truy vấn, cắt câu dài quanh chỗ khớp đầu tiên
+
+    Cặp âm tiết khớp một cặp của câu truy vấn luôn được in đậm. Âm tiết đơn chỉ
+    được in đậm khi câu truy vấn gõ không dấu hoặc âm tiết được gõ đúng dấu, để
+    "cung" không làm nổi bật "cũng".
+
+    Args:
+        sentence (str): Câu gốc ở dạng NFC
+        terms (list): Các từ truy vấn (âm tiết và cặp âm tiết không dấu)
+        forms (dict): Các cách gõ của từng âm tiết truy vấn (xem NganhSearchIndex.parse_query)
+        max_length (int): Độ dài tối đa của đoạn trích
+
+    Returns:
+        str: Đoạn trích
+    """
+    lowered = sentence.lower()
+    folded = fold_diacritics(lowered)
+    if len(folded) != len(sentence):
+        return sentence[:max_length]
+    matches = list(_TOKEN.finditer(folded))
+    marked = [False] * len(matches)
+    query_terms = set(terms)
+    for i, match in enumerate(matches):
+        word = match.group()
+        typed = forms.get(word)
+        if word in query_terms and (typed is None or lowered[match.start():match.end()] in typed):
+            marked[i] = True
+        if i and f"{matches[i - 1].group()} {word}" in query_terms and match.start() - matches[i - 1].end() <= 1:
+            marked[i - 1] = marked[i] = True
+    spans = [match.span() for match, mark in zip(matches, marked) if mark]
+    start, end = 0, len(sentence)
+    if end > max_length:
+        start = max(0, (spans[0][0] if spans else 0) - max_length // 4)
+        end = min(len(sentence), start + max_length)
+        # Không cắt giữa một từ
+        while start > 0 and sentence[start - 1].isalnum():
+            start -= 1
+        while end < len(sentence) and sentence[end].isalnum():
+            end += 1
+    parts = ["…" if start > 0 else ""]
+    last = start
+    for span_start, span_end in spans:
+        if span_start < start or span_end > end:
+            continue
+        parts.append(sentence[last:span_start])
+        parts.append(f"**{sentence[span_start:span_end]}**")
+        last = span_end
+    parts.append(sentence[last:end])
+    parts.append("…" if end < len(sentence) else "")
+    return "".join(parts)
+
+
+def build_search_index(snapshot: CatalogSnapshot) -> NganhSearchIndex:
+    """Xây dựng chỉ mục toàn văn cho một snapshot"""
+    return NganhSearchIndex(snapshot.nganh_list)
+
+
+def get_search_index(nganh_list: List[Dict[Text, Any]]) -> NganhSearchIndex:
+    """
+    Lấy chỉ mục toàn văn cho danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        NganhSearchIndex: Chỉ mục toàn văn
+    """
+    return get_artifact(nganh_list, "search_index", build_search_index)
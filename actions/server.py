@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Text, Union
+
+from rasa_sdk import utils
+from rasa_sdk.constants import APPLICATION_ROOT_LOGGER_NAME
+from rasa_sdk.endpoint import (DEFAULT_ENDPOINTS_PATH, DEFAULT_KEEP_ALIVE_TIMEOUT, create_app_for_serve,
+                               create_argument_parser, create_ssl_config)
+from rasa_sdk.executor import ActionExecutor
+from rasa_sdk.interfaces import ActionExecutionRejection, ActionNotFoundException
+from sanic import Sanic, response
+from sanic.worker.loader import AppLoader
+
+from .bulk_advice import FORMATS, AdviceWriter, BulkAdvisor, RowDecoder
+from .metrics import CONTENT_TYPE, REGISTRY
+from .tenants import catalog_for_tenant
+
+logger = logging.getLogger(__name__)
+
+ACTION_SECONDS = REGISTRY.histogram(
+    "action_latency_seconds", "Thời gian trả lời một lượt gọi webhook, kể cả thời gian chờ worker", ["action"])
+ACTION_CALLS = REGISTRY.counter(
+    "action_calls_total", "Số lượt gọi webhook theo kết quả (ok, rejected, not_found, error)", ["action", "outcome"])
+
+
+class InstrumentedActionExecutor(ActionExecutor):
+    """
+    ActionExecutor ghi lại độ trễ và kết quả của mọi hành động, kể cả các hành
+    động không chạy qua worker pool.
+    """
+
+    async def run(self, action_call: Dict[Text, Any], *args: Any, **kwargs: Any):
+        name = action_call.get("next_action") or ""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await super().run(action_call, *args, **kwargs)
+            outcome = "ok"
+            return result
+        except ActionExecutionRejection:
+            outcome = "rejected"
+            raise
+        except ActionNotFoundException:
+            # Tên hành động lạ do client gửi không được dùng làm nhãn
+            name, outcome = "unknown", "not_found"
+            raise
+        finally:
+            ACTION_SECONDS.observe(time.perf_counter() - start, name)
+            ACTION_CALLS.inc(name, outcome)
+
+
+def create_app(action_executor: ActionExecutor, cors_origins: Union[Text, List[Text], None] = "*",
+               auto_reload: bool = False, endpoints: Text = DEFAULT_ENDPOINTS_PATH,
+               keep_alive_timeout: int = DEFAULT_KEEP_ALIVE_TIMEOUT) -> Sanic:
+    """
+    Tạo ứng dụng Sanic của action server kèm route /metrics
+
+    Được gọi trong tiến trình chính và trong mỗi worker của Sanic nên phải ở mức
+    module. Khi tắt đo đạc (ACTION_METRICS=0), /metrics không được mở.
+
+    Returns:
+        Sanic: Ứng dụng gồm /health, /webhook, /actions của rasa_sdk, /advice/bulk và /metrics
+    """
+    app = create_app_for_serve(action_executor, cors_origins=cors_origins, auto_reload=auto_reload,
+                               endpoints=endpoints, keep_alive_timeout=keep_alive_timeout)
+
+    @app.post("/advice/bulk", stream=True)
+    async def bulk_advice(request) -> Optional[response.HTTPResponse]:
+        """
+        Tư vấn ngành cho cả lớp: thân request là CSV hoặc JSONL điểm của từng học
+        sinh (xem bulk_advice), kết quả được trả dần theo từng đoạn dữ liệu nhận
+        được. Tham số: format (csv|jsonl, mặc định theo Content-Type), output
+        (jsonl|csv) và tenant (mã trường).
+        """
+        content_type = request.headers.get("content-type", "")
+        input_format = request.args.get("format") or ("jsonl" if "json" in content_type else "csv")
+        output_format = request.args.get("output", "jsonl")
+        if input_format not in FORMATS or output_format not in FORMATS:
+            return response.json({"error": f"Định dạng phải là một trong: {', '.join(FORMATS)}"}, status=400)
+        catalog = catalog_for_tenant(request.args.get("tenant"))
+        if catalog is None:
+            return response.json({"error": "Không có danh mục cho trường này"}, status=404)
+
+        decoder = RowDecoder(input_format)
+        writer = AdviceWriter(output_format)
+        advisor = BulkAdvisor(catalog.nganh_list)
+        loop = asyncio.get_running_loop()
+
+        def process(rows):
+            return writer.write(advisor.advise(rows))
+
+        stream = await request.respond(content_type=FORMATS[output_format])
+        if writer.header():
+            await stream.send(writer.header())
+        while True:
+            chunk = await request.stream.read()
+            rows = decoder.feed(chunk) if chunk is not None else decoder.close()
+            if rows:
+                # Phần tính toán chạy ngoài event loop để server vẫn nhận các lượt webhook khác
+                await stream.send(await loop.run_in_executor(None, process, rows))
+            if chunk is None:
+                break
+        await stream.eof()
+
+    if REGISTRY.enabled:
+        @app.get("/metrics")
+        async def metrics(_) -> response.HTTPResponse:
+            """Số liệu của tiến trình theo định dạng văn bản của Prometheus"""
+            return response.text(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    return app
+
+
+def run(action_executor: ActionExecutor, port: int = 5055, cors_origins: Union[Text, List[Text], None] = "*",
+        ssl_certificate: Optional[Text] = None, ssl_keyfile: Optional[Text] = None,
+        ssl_password: Optional[Text] = None, auto_reload: bool = False,
+        endpoints: Text = DEFAULT_ENDPOINTS_PATH) -> None:
+    """Chạy action server như `rasa run actions`, thêm /metrics trên cùng cổng"""
+    loader = AppLoader(factory=partial(create_app, action_executor, cors_origins=cors_origins,
+                                       auto_reload=auto_reload, endpoints=endpoints))
+    app = loader.load()
+    ssl_config = create_ssl_config(ssl_certificate, ssl_keyfile, ssl_password)
+    host = os.environ.get("SANIC_HOST", "0.0.0.0")
+    logger.info(f"Action server chạy tại {'https' if ssl_config else 'http'}://{host}:{port}")
+    app.prepare(host=host, port=port, ssl=ssl_config, workers=utils.number_of_sanic_workers())
+    Sanic.serve(primary=app, app_loader=loader)
+
+
+def main() -> None:
+    parser = create_argument_parser()
+    parser.description = ("Chạy action server (cùng tham số với `rasa run actions`) kèm số liệu Prometheus tại "
+                          "/metrics. Mỗi worker Sanic có số liệu riêng; đặt ACTION_METRICS=0 để tắt đo đạc.")
+    parser.set_defaults(actions="actions")
+    args = parser.parse_args()
+    if args.grpc:
+        parser.error("/metrics chỉ có trên HTTP, chạy gRPC bằng `python -m rasa_sdk --grpc`")
+
+    utils.configure_colored_logging(args.loglevel)
+    utils.configure_file_logging(logging.getLogger(APPLICATION_ROOT_LOGGER_NAME), args.log_file,
+                                 args.loglevel, args.logging_config_file)
+    utils.update_sanic_log_level()
+
+    action_executor = InstrumentedActionExecutor()
+    action_executor.register_package(args.actions_module or args.actions)
+    run(action_executor, args.port, args.cors, args.ssl_certificate, args.ssl_keyfile, args.ssl_password,
+        args.auto_reload, args.endpoints)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import asyncio
+import copy
+import math
+import os
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Text, Tuple, TypeVar
+
+from .metrics import REGISTRY
+
+# Gộp các lượt gọi giống hệt nhau đến cùng lúc thành một lần xử lý
+ACTION_COALESCE = os.environ.get("ACTION_COALESCE", "1").lower() not in ("0", "false", "no")
+
+# Thời gian (giây) kết quả vừa xử lý xong còn được dùng chung cho các lượt đến sát sau
+ACTION_COALESCE_TTL = float(os.environ.get("ACTION_COALESCE_TTL", "0.5"))
+
+# Số khóa được giữ tối đa trước khi dọn các kết quả đã hết hạn
+_MAX_FLIGHTS = 4096
+
+COALESCED = REGISTRY.counter(
+    "action_coalesce_total", "Số lượt gọi tự xử lý (computed) hoặc dùng chung kết quả của lượt khác (shared)",
+    ["action", "outcome"])
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Gộp các lượt xử lý có cùng khóa thành một lần chạy.
+
+    Lượt đầu tiên của một khóa chạy `compute` trong một task riêng; các lượt
+    cùng khóa đến khi task chưa xong, hoặc trong `ttl` giây sau khi xong, chờ
+    và nhận kết quả của task đó thay vì tự chạy lại. Mỗi lượt nhận một bản sao
+    riêng của kết quả nên có thể sửa mà không ảnh hưởng lượt khác. Task không bị
+    hủy theo lượt đã tạo ra nó, nên người dùng rời đi giữa chừng không làm hỏng
+    kết quả của những người đang chờ. Kết quả lỗi, hoặc bị `keep` loại, không
+    được giữ lại sau khi xong.
+    """
+
+    def __init__(self, ttl: float = ACTION_COALESCE_TTL):
+        self.ttl = ttl
+        # Khóa -> (task, thời điểm hết hạn theo đồng hồ của event loop; vô cùng khi chưa xong)
+        self._flights: Dict[Hashable, Tuple[asyncio.Task, float]] = {}
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[T]],
+                  keep: Optional[Callable[[T], bool]] = None, name: Text = "") -> T:
+        """
+        Chạy `compute` hoặc dùng chung kết quả của lượt cùng khóa đang chạy
+
+        Args:
+            key: Khóa của lượt xử lý, gồm mọi thứ quyết định kết quả
+            compute (callable): Hàm không tham số trả về coroutine tính kết quả
+            keep (callable): Trả về False nếu kết quả không được dùng lại sau khi xong
+            name (str): Tên hành động, dùng làm nhãn số liệu
+
+        Returns:
+            Bản sao kết quả của lần chạy
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        flight = self._flights.get(key)
+        if flight is not None and flight[1] >= now and flight[0].get_loop() is loop:
+            COALESCED.inc(name, "shared")
+            task = flight[0]
+        else:
+            COALESCED.inc(name, "computed")
+            if len(self._flights) >= _MAX_FLIGHTS:
+                self._prune(now)
+            task = loop.create_task(compute())
+            self._flights[key] = (task, math.inf)
+            task.add_done_callback(partial(self._finished, key, keep))
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _finished(self, key: Hashable, keep: Optional[Callable[[Any], bool]], task: asyncio.Task) -> None:
+        flight = self._flights.get(key)
+        if flight is None or flight[0] is not task:
+            return
+        if task.cancelled() or task.exception() is not None or self.ttl <= 0 \
+                or (keep is not None and not keep(task.result())):
+            del self._flights[key]
+        else:
+            self._flights[key] = (task, task.get_loop().time() + self.ttl)
+
+    def _prune(self, now: float) -> None:
+        for key in [key for key, (_, expires) in self._flights.items() if expires < now]:
+            del self._flights[key]
+        if len(self._flights) >= _MAX_FLIGHTS:
+            # Toàn các lượt đang chạy: bỏ theo dõi những lượt đã có, chúng vẫn chạy tiếp cho người đang chờ
+            self._flights.clear()
+
+    def stats(self) -> Dict[Text, Any]:
+        """Số khóa đang chạy và số kết quả còn được dùng chung"""
+        running = sum(1 for task, _ in self._flights.values() if not task.done())
+        return {"ttl": self.ttl, "running": running, "cached": len(self._flights) - running}
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Lấy bộ gộp lượt xử lý dùng chung của tiến trình"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+def _collect_metrics():
+    if _single_flight is None:
+        return
+    stats = _single_flight.stats()
+    yield "action_coalesce_running", "gauge", "Số khóa đang được xử lý, các lượt cùng khóa chờ kết quả", \
+        [("", {}, stats["running"])]
+    yield "action_coalesce_cached", "gauge", "Số kết quả vừa xong còn được dùng chung trong thời gian TTL", \
+        [("", {}, stats["cached"])]
+
+
+REGISTRY.add_collector(_collect_metrics)
@@ -0,0 +1,173 @@
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Text, Tuple
+
+from .catalog import CatalogSnapshot, get_artifact, get_catalog, snapshot_of
+from .normalize import fold_diacritics, normalize_text, repair_typing, strip_tones
+from .phrase_matcher import PhraseMatcher
+
+logger = logging.getLogger(__name__)
+
+# Từ khóa sở thích và các ngành tương ứng, ngành phù hợp nhất đứng trước.
+# Ngành được ghi bằng tên trong nganh.json (không phân biệt hoa thường, dấu và
+# tiền tố "Ngành") hoặc bằng mã ngành.
+SO_THICH_NGANH = {
+    "máy tính": ["Công nghệ thông tin", "Mạng máy tính và Truyền thông dữ liệu", "Hệ thống thông tin quản lý"],
+    "lập trình": ["Công nghệ thông tin", "Khoa học dữ liệu", "Hệ thống thông tin quản lý"],
+    "phần mềm": ["Công nghệ thông tin", "Hệ thống thông tin quản lý"],
+    "mạng máy tính": ["Mạng máy tính và Truyền thông dữ liệu", "Công nghệ thông tin"],
+    "an ninh mạng": ["Mạng máy tính và Truyền thông dữ liệu", "Công nghệ thông tin"],
+    "dữ liệu": ["Khoa học dữ liệu", "Mạng máy tính và Truyền thông dữ liệu"],
+    "trí tuệ nhân tạo": ["Khoa học dữ liệu", "Công nghệ thông tin"],
+    "thiết kế": ["Kỹ thuật Xây dựng", "Kỹ thuật Cơ khí", "Kỹ thuật Tàu thủy"],
+    "ô tô": ["Công nghệ kỹ thuật ô tô", "Kỹ thuật Ô tô"],
+    "xe máy": ["Công nghệ kỹ thuật ô tô", "Kỹ thuật Ô tô"],
+    "động cơ": ["Kỹ thuật Ô tô", "Công nghệ kỹ thuật ô tô", "Kỹ thuật Cơ khí"],
+    "điện": ["Kỹ thuật Điện", "Kỹ thuật điện, điện tử và điều khiển"],
+    "điện tử": ["Kỹ thuật điện, điện tử và điều khiển", "Kỹ thuật Điều khiển và Tự động hóa"],
+    "tự động hóa": ["Kỹ thuật Điều khiển và Tự động hóa", "Công nghệ kỹ thuật điều khiển và tự động hóa"],
+    "robot": ["Kỹ thuật Điều khiển và Tự động hóa", "Công nghệ kỹ thuật điều khiển và tự động hóa",
+              "Kỹ thuật điện, điện tử và điều khiển"],
+    "cơ khí": ["Kỹ thuật Cơ khí", "Công nghệ kỹ thuật cơ khí"],
+    "máy móc": ["Công nghệ kỹ thuật cơ khí", "Kỹ thuật Cơ khí"],
+    "công trình": ["Kỹ thuật Xây dựng", "Kỹ thuật Xây dựng công trình giao thông"],
+    "xây dựng": ["Kỹ thuật Xây dựng", "Kỹ thuật Xây dựng công trình giao thông", "Quản lý Xây dựng"],
+    "cầu đường": ["Kỹ thuật Xây dựng công trình giao thông"],
+    "giao thông": ["Kỹ thuật Xây dựng công trình giao thông", "Công nghệ kỹ thuật giao thông"],
+    "vận tải": ["Khai thác vận tải", "Kinh tế Vận tải", "Logistics và Quản lý chuỗi cung ứng"],
+    "logistics": ["Logistics và Quản lý chuỗi cung ứng"],
+    "chuỗi cung ứng": ["Logistics và Quản lý chuỗi cung ứng"],
+    "tàu": ["Kỹ thuật Tàu thủy", "Khoa học Hàng hải"],
+    "biển": ["Khoa học Hàng hải", "Kỹ thuật Tàu thủy"],
+    "hàng hải": ["Khoa học Hàng hải"],
+    "môi trường": ["Kỹ thuật Môi trường"],
+    "kinh tế": ["Kinh tế Vận tải", "Kinh tế Xây dựng"],
+    "kinh doanh": ["Logistics và Quản lý chuỗi cung ứng", "Kinh tế Vận tải", "Hệ thống thông tin quản lý"],
+    "quản lý": ["Quản lý Xây dựng", "Hệ thống thông tin quản lý", "Logistics và Quản lý chuỗi cung ứng"],
+    "luật": ["Luật"],
+    "pháp luật": ["Luật"],
+    "tiếng anh": ["Ngôn ngữ Anh"],
+    "ngoại ngữ": ["Ngôn ngữ Anh"],
+}
+
+# Ngành thứ k trong danh sách của một từ khóa được cộng TRONG_SO_GIAM^k điểm
+TRONG_SO_GIAM = 0.7
+
+# Số ngành gợi ý tối đa
+SO_NGANH_GOI_Y = 5
+
+
+def _normalize_ten(text: Text) -> Text:
+    ten = fold_diacritics(normalize_text(text))
+    return ten[len("nganh "):] if ten.startswith("nganh ") else ten
+
+
+class InterestMatch(NamedTuple):
+    """Một ngành được gợi ý theo sở thích"""
+    nganh: Dict[Text, Any]
+    diem: float
+    so_thich: Tuple[Text, ...]
+
+
+class InterestEngine:
+    """
+    Bộ gợi ý ngành theo sở thích, biên dịch một lần cho mỗi phiên bản danh mục.
+
+    Các từ khóa (đã bỏ dấu) được nạp vào một PhraseMatcher nên tin nhắn chỉ cần
+    duyệt một lần dù có hàng trăm từ khóa. Ngành đích được tra ra bản ghi trong
+    danh mục ngay khi xây dựng; ngành không tồn tại được ghi log và bỏ qua.
+    Từ gõ kiểu Telex/VNI ("laapj trinhf") được đọc như từ không dấu nếu khớp
+    với một từ của các từ khóa.
+    """
+
+    def __init__(self, nganh_list: List[Dict[Text, Any]],
+                 mapping: Dict[Text, List[Text]] = SO_THICH_NGANH):
+        by_name: Dict[Text, int] = {}
+        for vi_tri, nganh in enumerate(nganh_list):
+            by_name.setdefault(_normalize_ten(nganh["ten_nganh"]), vi_tri)
+            by_name.setdefault(nganh["ma_nganh"].strip(), vi_tri)
+
+        self.records = nganh_list
+        self.keywords: List[Text] = []
+        self.keyword_words: List[Tuple[Text, ...]] = []
+        self.targets: List[List[Tuple[int, float]]] = []
+        self.dead_links: List[Tuple[Text, Text]] = []
+        self.matcher = PhraseMatcher()
+        self.vocabulary = set()
+        for keyword, targets in mapping.items():
+            resolved = []
+            for target in targets:
+                vi_tri = by_name.get(_normalize_ten(target))
+                if vi_tri is None:
+                    self.dead_links.append((keyword, target))
+                elif vi_tri not in (v for v, _ in resolved):
+                    resolved.append((vi_tri, TRONG_SO_GIAM ** len(resolved)))
+            self.matcher.add(fold_diacritics(keyword.lower()), len(self.keywords))
+            self.vocabulary.update(fold_diacritics(keyword.lower()).split())
+            self.keywords.append(keyword)
+            self.keyword_words.append(tuple(strip_tones(word) for word in keyword.lower().split()))
+            self.targets.append(resolved)
+
+        if self.dead_links:
+            logger.warning("Các ngành trong bảng sở thích không có trong danh mục: "
+                           + ", ".join(f"'{target}' (từ khóa '{keyword}')" for keyword, target in self.dead_links))
+
+    def _typed_matches(self, typed: Text, folded: Text, index: int) -> bool:
+        # Từ gõ không dấu khớp mọi cách viết; từ gõ có dấu phải đúng dấu mũ/trăng/móc
+        # và chữ đ, chỉ bỏ qua dấu thanh ("diện", "diễn" không phải "điện")
+        return all(word == folded_word or strip_tones(word) == keyword_word
+                   for word, folded_word, keyword_word
+                   in zip(typed.split(), folded.split(), self.keyword_words[index]))
+
+    def match(self, message: Text, limit: Optional[int] = SO_NGANH_GOI_Y) -> List[InterestMatch]:
+        """
+        Gợi ý ngành cho các sở thích được nhắc trong tin nhắn
+
+        Mỗi sở thích cộng điểm cho các ngành của nó; ngành được nhiều sở thích
+        cùng nhắc tới có điểm cao hơn. Ngành bằng điểm giữ thứ tự xuất hiện.
+
+        Args:
+            message (str): Tin nhắn của người dùng
+            limit (int): Số ngành tối đa cần lấy
+
+        Returns:
+            list: Các InterestMatch theo điểm giảm dần
+        """
+        message = repair_typing(normalize_text(message), self.vocabulary)
+        text = fold_diacritics(message)
+        scores: Dict[int, float] = {}
+        reasons: Dict[int, List[Text]] = {}
+        seen = set()
+        for start, end, index in self.matcher.finditer(text):
+            if index in seen or not self._typed_matches(message[start:end], text[start:end], index):
+                continue
+            seen.add(index)
+            for vi_tri, trong_so in self.targets[index]:
+                scores[vi_tri] = scores.get(vi_tri, 0.0) + trong_so
+                reasons.setdefault(vi_tri, []).append(self.keywords[index])
+
+        ranked = sorted(scores, key=lambda vi_tri: -scores[vi_tri])
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [InterestMatch(self.records[vi_tri], scores[vi_tri], tuple(reasons[vi_tri])) for vi_tri in ranked]
+
+
+def build_interest_engine(snapshot: CatalogSnapshot) -> InterestEngine:
+    """Xây dựng bộ gợi ý theo sở thích cho một snapshot"""
+    return InterestEngine(snapshot.nganh_list)
+
+
+def get_interest_engine(nganh_list: List[Dict[Text, Any]]) -> InterestEngine:
+    """
+    Lấy bộ gợi ý theo sở thích cho danh sách ngành
+
+    Args:
+        nganh_list (list): Danh sách các ngành
+
+    Returns:
+        InterestEngine: Bộ gợi ý theo sở thích
+    """
+    # Xây lại ngay khi danh mục được nạp lại để ngành không tồn tại được báo lúc nạp
+    snapshot = snapshot_of(nganh_list)
+    catalog = snapshot.catalog if snapshot is not None else None
+    (catalog or get_catalog()).prebuild_artifact("interest_engine", build_interest_engine)
+    return get_artifact(nganh_list, "interest_engine", build_interest_engine)
@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Text
+
+from rasa_sdk import Tracker
+
+from .catalog import RELOAD_CHECK_INTERVAL, TEN_TRUONG, CatalogError, NganhCatalog, get_catalog
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# File JSON cấu hình các trường: {mã trường: {"nganh_json_path": ..., "ten_truong": ...}}
+TENANTS_CONFIG = os.environ.get("TENANTS_CONFIG", "")
+
+# Tổng bộ nhớ ước tính (MB) cho danh mục và chỉ mục của các trường đang được nạp
+TENANT_MEMORY_BUDGET_MB = float(os.environ.get("TENANT_MEMORY_BUDGET_MB", "256"))
+
+# Bộ nhớ ước tính của một danh mục: phần cố định và phần cho mỗi ngành (bản ghi,
+# chỉ mục tìm ngành, chỉ mục điểm, bộ đệm câu trả lời), đo bằng benchmarks/bench_tenants.py
+CATALOG_BASE_BYTES = 512 * 1024
+CATALOG_BYTES_PER_NGANH = 8 * 1024
+
+# Slot và khóa metadata của kênh chứa mã trường
+TENANT_SLOT = "ma_truong"
+TENANT_METADATA_KEY = "tenant_id"
+
+
+class TenantConfig(NamedTuple):
+    """Cấu hình danh mục của một trường"""
+    nganh_json_path: Text
+    ten_truong: Text = TEN_TRUONG
+
+
+def load_tenant_config(path: Text) -> Dict[Text, TenantConfig]:
+    """
+    Đọc file cấu hình các trường
+
+    Đường dẫn tương đối được tính từ thư mục chứa file cấu hình.
+
+    Args:
+        path (str): Đường dẫn file cấu hình
+
+    Returns:
+        dict: {mã trường: cấu hình}
+
+    Raises:
+        CatalogError: Nếu file sai cấu trúc
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, dict):
+        raise CatalogError("Cấu hình các trường phải là một object {mã trường: cấu hình}")
+
+    base = os.path.dirname(os.path.abspath(path))
+    tenants = {}
+    for tenant, config in data.items():
+        if not isinstance(config, dict) or not isinstance(config.get("nganh_json_path"), str):
+            raise CatalogError(f"Trường '{tenant}' thiếu 'nganh_json_path'")
+        tenants[tenant] = TenantConfig(os.path.join(base, config["nganh_json_path"]),
+                                       config.get("ten_truong") or TEN_TRUONG)
+    return tenants
+
+
+def estimate_catalog_bytes(catalog: NganhCatalog) -> int:
+    """Bộ nhớ ước tính của danh mục cùng các chỉ mục và bộ đệm của nó"""
+    return CATALOG_BASE_BYTES + CATALOG_BYTES_PER_NGANH * len(catalog.nganh_list)
+
+
+class TenantCatalogRegistry:
+    """
+    Danh mục ngành của nhiều trường trong cùng một action server.
+
+    Danh mục của mỗi trường chỉ được nạp ở lần hỏi đầu tiên. Khi tổng bộ nhớ
+    ước tính vượt `memory_budget`, các trường lâu không được hỏi nhất bị bỏ ra
+    cùng mọi chỉ mục và bộ đệm gắn với snapshot của chúng; lần hỏi sau sẽ nạp
+    lại. Trường vừa được nạp không bao giờ bị bỏ, kể cả khi một mình nó vượt
+    ngân sách.
+    """
+
+    def __init__(self, tenants: Optional[Dict[Text, TenantConfig]] = None,
+                 memory_budget: float = TENANT_MEMORY_BUDGET_MB * 2**20,
+                 check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.memory_budget = memory_budget
+        self.check_interval = check_interval
+        self._tenants: Dict[Text, TenantConfig] = dict(tenants or {})
+        self._loaded: "OrderedDict[Text, NganhCatalog]" = OrderedDict()
+        self._loading: Dict[Text, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, tenant: Text) -> bool:
+        return tenant in self._tenants
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def register(self, tenant: Text, nganh_json_path: Text, ten_truong: Text = TEN_TRUONG) -> None:
+        """
+        Thêm hoặc đổi cấu hình một trường, danh mục cũ (nếu đã nạp) bị bỏ
+
+        Args:
+            tenant (str): Mã trường
+            nganh_json_path (str): Đường dẫn danh mục của trường
+            ten_truong (str): Tên trường dùng trong câu trả lời
+        """
+        with self._lock:
+            self._tenants[tenant] = TenantConfig(nganh_json_path, ten_truong)
+            self._loaded.pop(tenant, None)
+
+    def unregister(self, tenant: Text) -> None:
+        """Bỏ một trường cùng danh mục đã nạp của nó"""
+        with self._lock:
+            self._tenants.pop(tenant, None)
+            self._loaded.pop(tenant, None)
+
+    def get(self, tenant: Text) -> Optional[NganhCatalog]:
+        """
+        Lấy danh mục của một trường, nạp ở lần dùng đầu tiên
+
+        Args:
+            tenant (str): Mã trường
+
+        Returns:
+            NganhCatalog: Danh mục của trường, None nếu trường chưa được đăng ký
+        """
+        with self._lock:
+            catalog = self._loaded.get(tenant)
+            if catalog is not None:
+                self._loaded.move_to_end(tenant)
+                return catalog
+            config = self._tenants.get(tenant)
+            if config is None:
+                return None
+            loading = self._loading.setdefault(tenant, threading.Lock())
+
+        # Nạp ngoài khóa chung để các trường khác không phải chờ; khóa theo trường
+        # bảo đảm nhiều lượt hỏi cùng lúc chỉ nạp danh mục một lần
+        with loading:
+            with self._lock:
+                catalog = self._loaded.get(tenant)
+            if catalog is not None:
+                return catalog
+            catalog = NganhCatalog(config.nganh_json_path, self.check_interval, tenant, config.ten_truong)
+            with self._lock:
+                # Cấu hình có thể đã bị đổi hoặc bỏ trong lúc nạp
+                if self._tenants.get(tenant) != config:
+                    return catalog
+                self._loaded[tenant] = catalog
+                self.loads += 1
+                self._evict()
+        logger.info(f"Đã nạp danh mục của trường '{tenant}' ({len(catalog.nganh_list)} ngành)")
+        return catalog
+
+    def _evict(self) -> None:
+        sizes = {tenant: estimate_catalog_bytes(catalog) for tenant, catalog in self._loaded.items()}
+        total = sum(sizes.values())
+        while total > self.memory_budget and len(self._loaded) > 1:
+            tenant, _ = self._loaded.popitem(last=False)
+            total -= sizes[tenant]
+            self.evictions += 1
+            logger.info(f"Bỏ danh mục của trường '{tenant}' khỏi bộ nhớ")
+
+    def stats(self) -> Dict[Text, Any]:
+        """Số trường đã đăng ký, đang nạp, bộ nhớ ước tính (byte), số lần nạp và số lần bỏ"""
+        with self._lock:
+            loaded: List[NganhCatalog] = list(self._loaded.values())
+        return {
+            "tenants": len(self._tenants),
+            "loaded": len(loaded),
+            "memory_bytes": sum(estimate_catalog_bytes(catalog) for catalog in loaded),
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+_registry: Optional[TenantCatalogRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_tenant_registry() -> TenantCatalogRegistry:
+    """
+    Lấy danh sách trường của tiến trình, đọc từ TENANTS_CONFIG ở lần gọi đầu tiên
+
+    Returns:
+        TenantCatalogRegistry: Danh sách trường, rỗng nếu không cấu hình
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                path = os.environ.get("TENANTS_CONFIG", TENANTS_CONFIG)
+                _registry = TenantCatalogRegistry(load_tenant_config(path) if path else None)
+    return _registry
+
+
+def set_tenant_registry(registry: TenantCatalogRegistry) -> None:
+    """
+    Thay danh sách trường dùng chung (dùng khi đo hiệu năng hoặc chạy với dữ liệu khác)
+
+    Args:
+        registry (TenantCatalogRegistry): Danh sách trường mới
+    """
+    global _registry
+    with _registry_lock:
+        _registry = registry
+
+
+def tenant_id(tracker: Tracker) -> Optional[Text]:
+    """
+    Mã trường của cuộc hội thoại
+
+    Metadata do kênh gắn vào tin nhắn được ưu tiên hơn slot `ma_truong`.
+
+    Args:
+        tracker (Tracker): Trạng thái hội thoại
+
+    Returns:
+        str: Mã trường, None nếu hội thoại không gắn với trường nào
+    """
+    metadata = (tracker.latest_message or {}).get("metadata") or {}
+    tenant = metadata.get(TENANT_METADATA_KEY) or tracker.get_slot(TENANT_SLOT)
+    return str(tenant) if tenant else None
+
+
+def get_tenant_catalog(tracker: Optional[Tracker] = None) -> Optional[NganhCatalog]:
+    """
+    Lấy danh mục ngành cho cuộc hội thoại
+
+    Khi không cấu hình trường nào, hoặc hội thoại không gắn với trường nào, danh
+    mục dùng chung được dùng. Trường không có trong cấu hình không được trả lời
+    bằng danh mục của trường khác.
+
+    Args:
+        tracker (Tracker): Trạng thái hội thoại
+
+    Returns:
+        NganhCatalog: Danh mục của trường, None nếu trường không có trong cấu hình
+    """
+    return catalog_for_tenant(tenant_id(tracker) if tracker is not None else None)
+
+
+def catalog_for_tenant(tenant: Optional[Text]) -> Optional[NganhCatalog]:
+    """
+    Lấy danh mục ngành theo mã trường, theo cùng quy tắc với get_tenant_catalog
+
+    Args:
+        tenant (str): Mã trường, None nếu không gắn với trường nào
+
+    Returns:
+        NganhCatalog: Danh mục của trường, None nếu trường không có trong cấu hình
+    """
+    registry = get_tenant_registry()
+    if tenant is None or not len(registry):
+        return get_catalog()
+    catalog = registry.get(tenant)
+    if catalog is None:
+        logger.warning(f"Không có danh mục cho trường '{tenant}'")
+    return catalog
+
+
+def _collect_metrics():
+    if _registry is None:
+        return
+    stats = _registry.stats()
+    for name, kind, key, documentation in (
+            ("tenants_registered", "gauge", "tenants", "Số trường đã đăng ký"),
+            ("tenants_loaded", "gauge", "loaded", "Số trường đang có danh mục trong bộ nhớ"),
+            ("tenants_memory_bytes", "gauge", "memory_bytes", "Bộ nhớ ước tính của danh mục các trường đang nạp"),
+            ("tenant_loads_total", "counter", "loads", "Số lần nạp danh mục của một trường"),
+            ("tenant_evictions_total", "counter", "evictions", "Số lần bỏ danh mục của một trường khỏi bộ nhớ")):
+        yield name, kind, documentation, [("", {}, stats[key])]
+
+
+REGISTRY.add_collector(_collect_metrics)
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional, Text, Tuple
+
+from .catalog import CatalogSnapshot, get_catalog
+from .normalize import fold_diacritics
+from .phrase_matcher import PhraseMatcher
+
+# Ánh xạ từ viết tắt sang tên đầy đủ. Viết tắt gõ không dấu được nhận tự động
+# nên chỉ cần ghi cách viết có dấu; tên ngành gõ không dấu, sai dấu hoặc kiểu
+# Telex/VNI được NganhMatchIndex nhận ở bước so khớp bỏ dấu.
+VIET_TAT_MAPPING = {
+    # Công nghệ
+    "cntt": "công nghệ thông tin",
+    "it": "công nghệ thông tin",
+    "cnktck": "công nghệ kỹ thuật cơ khí",
+    "cnktdh": "công nghệ kỹ thuật điều khiển và tự động hóa",
+    "cnktgt": "công nghệ kỹ thuật giao thông",
+    "cnkto": "công nghệ kỹ thuật ô tô",
+    "cnoto": "công nghệ kỹ thuật ô tô",
+
+    # Hệ thống, khoa học
+    "htttql": "hệ thống thông tin quản lý",
+    "httql": "hệ thống thông tin quản lý",
+    "khdl": "khoa học dữ liệu",
+    "khdlieu": "khoa học dữ liệu",
+    "khhh": "khoa học hàng hải",
+
+    # Kinh tế
+    "ktvt": "kinh tế vận tải",
+    "ktxd": "kinh tế xây dựng",
+
+    # Kỹ thuật
+    "ktck": "kỹ thuật cơ khí",
+    "ktđ": "kỹ thuật điện",
+    "ktddt": "kỹ thuật điện, điện tử và điều khiển",
+    "ktđk": "kỹ thuật điều khiển và tự động hóa",
+    "ktmt": "kỹ thuật môi trường",
+    "oto": "kỹ thuật ô tô",
+    "kttt": "kỹ thuật tàu thủy",
+    "ktxd": "kỹ thuật xây dựng",
+    "ktxdctgt": "kỹ thuật xây dựng công trình giao thông",
+
+    # Logistics
+    "logistics": "logistics và quản lý chuỗi cung ứng",
+    "qlccu": "logistics và quản lý chuỗi cung ứng",
+    "log": "logistics và quản lý chuỗi cung ứng",
+
+    # Mạng, ngôn ngữ
+    "mmt": "mạng máy tính và truyền thông dữ liệu",
+    "mmtvttdl": "mạng máy tính và truyền thông dữ liệu",
+    "nnanh": "ngôn ngữ anh",
+    "nna": "ngôn ngữ anh",
+
+    # Quản lý
+    "qlxd": "quản lý xây dựng",
+
+    # Tên gọi ngắn
+    "mạng máy tính": "mạng máy tính và truyền thông dữ liệu",
+    "hệ thống thông tin": "hệ thống thông tin quản lý",
+}
+
+
+class AbbreviationExpander:
+    """
+    Bộ mở rộng viết tắt, biên dịch một lần cho mỗi bảng viết tắt.
+
+    Câu truy vấn được duyệt một lần; mỗi vị trí đầu từ lấy viết tắt dài nhất
+    kết thúc ở ranh giới từ. Phần đã được thay thế không bị thay tiếp, nên các
+    viết tắt không còn lồng vào nhau như cách gọi `str.replace` lần lượt.
+
+    Viết tắt được so trên chuỗi đã bỏ dấu: phần gõ không dấu khớp mọi cách
+    viết, phần gõ có dấu phải đúng dấu ("ktd" và "ktđ" là "kỹ thuật điện",
+    nhưng "ít" không phải "it").
+    """
+
+    def __init__(self, mapping: Dict[Text, Text]):
+        self.mapping = dict(mapping)
+        candidates: Dict[Text, List[Tuple[Text, Text]]] = {}
+        for viet_tat, ten_day_du in self.mapping.items():
+            candidates.setdefault(fold_diacritics(viet_tat), []).append((viet_tat, ten_day_du))
+        self.matcher = PhraseMatcher(candidates.items())
+
+    @staticmethod
+    def _pick(typed: Text, folded: Text, candidates: List[Tuple[Text, Text]]) -> Optional[Text]:
+        for viet_tat, ten_day_du in candidates:
+            if typed == viet_tat or typed == folded:
+                return ten_day_du
+        return None
+
+    def expand(self, text: Text) -> Text:
+        """
+        Thay các viết tắt trong chuỗi bằng tên đầy đủ
+
+        Args:
+            text (str): Chuỗi đã viết thường
+
+        Returns:
+            str: Chuỗi sau khi mở rộng viết tắt
+        """
+        folded = fold_diacritics(text)
+        if len(folded) != len(text):
+            # Chuỗi chưa ở dạng NFC thì chỉ nhận viết tắt gõ đúng như trong bảng
+            folded = text
+        parts = []
+        last = 0
+        for start, end, candidates in self.matcher.finditer(folded):
+            ten_day_du = self._pick(text[start:end], folded[start:end], candidates)
+            # Bỏ qua nếu tên đầy đủ đã có sẵn tại đây (ví dụ "logistics và quản lý chuỗi cung ứng")
+            if ten_day_du is None or text.startswith(ten_day_du, start):
+                continue
+            parts.append(text[last:start])
+            parts.append(ten_day_du)
+            last = end
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
+
+
+def build_abbreviation_expander(snapshot: Optional[CatalogSnapshot] = None) -> AbbreviationExpander:
+    """Biên dịch bộ mở rộng viết tắt cho một snapshot danh mục"""
+    return AbbreviationExpander(VIET_TAT_MAPPING)
+
+
+def get_abbreviation_expander() -> AbbreviationExpander:
+    """
+    Lấy bộ mở rộng viết tắt của phiên bản danh mục hiện hành
+
+    Returns:
+        AbbreviationExpander: Bộ mở rộng viết tắt
+    """
+    return get_catalog().snapshot.artifact("abbreviation_expander", build_abbreviation_expander)
+
+
+def expand_abbreviations(text: Text) -> Text:
+    """
+    Mở rộng các viết tắt tên ngành trong chuỗi đã viết thường
+
+    Args:
+        text (str): Chuỗi cần xử lý
+
+    Returns:
+        str: Chuỗi sau khi mở rộng viết tắt
+    """
+    return get_abbreviation_expander().expand(text)
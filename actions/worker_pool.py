@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Text, Tuple
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Loại worker xử lý phần tính toán nặng: "thread" hoặc "process"
+ACTION_WORKER_TYPE = os.environ.get("ACTION_WORKER_TYPE", "thread")
+
+# Số worker chạy song song
+ACTION_WORKERS = int(os.environ.get("ACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Số lượt tra cứu được chờ worker rảnh; vượt quá thì lượt mới bị từ chối ngay
+ACTION_QUEUE_SIZE = int(os.environ.get("ACTION_QUEUE_SIZE", "64"))
+
+# Số lượt tư vấn (tính toán nặng) được chạy cùng lúc và được chờ worker rảnh
+ACTION_ADVICE_CONCURRENCY = int(os.environ.get("ACTION_ADVICE_CONCURRENCY", str(max(1, ACTION_WORKERS // 2))))
+ACTION_ADVICE_QUEUE_SIZE = int(os.environ.get("ACTION_ADVICE_QUEUE_SIZE", "16"))
+
+# Thời gian chờ tối đa (giây) cho mỗi lượt xử lý, tính cả thời gian chờ worker
+ACTION_TIMEOUT = float(os.environ.get("ACTION_TIMEOUT", "5.0"))
+
+BUSY_MESSAGE = "Hệ thống đang có nhiều người hỏi cùng lúc. Bạn vui lòng thử lại sau ít phút nhé!"
+TIMEOUT_MESSAGE = "Xin lỗi, tôi cần thêm thời gian để xử lý câu hỏi này. Bạn vui lòng thử lại sau nhé!"
+
+WORKER_SECONDS = REGISTRY.histogram(
+    "action_worker_seconds", "Thời gian chạy phần xử lý của hành động trong worker", ["action"])
+QUEUE_SECONDS = REGISTRY.histogram(
+    "action_queue_wait_seconds", "Thời gian lượt xử lý chờ worker rảnh", ["action"])
+OUTCOMES = REGISTRY.counter(
+    "action_worker_outcomes_total", "Kết quả các lượt gửi vào worker pool (ok, rejected, timeout, error)",
+    ["action", "outcome"])
+
+ActionHandler = Callable[[CollectingDispatcher, Tracker, Dict[Text, Any]], List[Dict[Text, Any]]]
+
+
+class AdmissionClass(NamedTuple):
+    """Giới hạn nhận việc của một nhóm hành động trong worker pool"""
+    # Khi worker rảnh, nhóm có số nhỏ hơn được nhận trước
+    priority: int
+    # Số lượt của nhóm được chạy cùng lúc trong worker
+    concurrency: int
+    # Số lượt của nhóm được chờ worker rảnh
+    queue_size: int
+
+
+# Tra cứu nhanh (điểm chuẩn, khối thi, thông tin ngành) được ưu tiên hơn tư vấn cần tính
+# toán nhiều; tư vấn chỉ được chiếm một phần worker để tra cứu luôn còn chỗ chạy
+ADMISSION_CLASSES: Dict[Text, AdmissionClass] = {
+    "tra_cuu": AdmissionClass(priority=0, concurrency=ACTION_WORKERS, queue_size=ACTION_QUEUE_SIZE),
+    "tu_van": AdmissionClass(priority=1, concurrency=ACTION_ADVICE_CONCURRENCY, queue_size=ACTION_ADVICE_QUEUE_SIZE),
+}
+DEFAULT_ADMISSION = "tra_cuu"
+
+
+def _call_handler(handler: ActionHandler, tracker: Tracker,
+                  domain: Dict[Text, Any]) -> Tuple[List[Dict[Text, Any]], List[Dict[Text, Any]], float]:
+    """
+    Chạy phần xử lý của hành động trong worker với một dispatcher riêng
+
+    Returns:
+        tuple: (các tin nhắn đã gửi, các event trả về, thời gian xử lý tính bằng giây)
+    """
+    start = time.perf_counter()
+    dispatcher = CollectingDispatcher()
+    events = handler(dispatcher, tracker, domain)
+    return dispatcher.messages, events, time.perf_counter() - start
+
+
+class WorkerPool:
+    """
+    Nhóm worker chạy phần xử lý đồng bộ của các hành động ngoài event loop.
+
+    Mỗi hành động thuộc một nhóm nhận việc (AdmissionClass). Một lượt chỉ được
+    gửi vào worker khi còn worker rảnh và nhóm của nó chưa chạy đủ
+    `concurrency` lượt; nếu không, lượt đó chờ trong hàng đợi riêng của nhóm.
+    Khi worker rảnh, hàng đợi của nhóm ưu tiên cao hơn được lấy trước, nên một
+    đợt tư vấn dồn dập không làm chậm các lượt tra cứu. Hàng đợi của nhóm đã đủ
+    `queue_size` lượt thì lượt mới bị từ chối ngay. Mỗi lượt có thời gian tối
+    đa `timeout` tính cả lúc chờ, quá hạn thì người dùng nhận lời xin lỗi thay
+    vì phải chờ.
+    """
+
+    def __init__(self, worker_type: Text = ACTION_WORKER_TYPE, workers: int = ACTION_WORKERS,
+                 classes: Optional[Dict[Text, AdmissionClass]] = None, timeout: float = ACTION_TIMEOUT):
+        self.worker_type = worker_type
+        self.workers = workers
+        self.classes = dict(classes or ADMISSION_CLASSES)
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._order = sorted(self.classes, key=lambda name: self.classes[name].priority)
+        self._waiting: Dict[Text, Deque[asyncio.Future]] = {name: deque() for name in self.classes}
+        self._running: Dict[Text, int] = dict.fromkeys(self.classes, 0)
+        self._rejected: Dict[Text, int] = dict.fromkeys(self.classes, 0)
+        self.busy = 0
+        self.timeouts = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.worker_type == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                            thread_name_prefix="action-worker")
+        return self._executor
+
+    def _has_room(self, admission: Text) -> bool:
+        return self.busy < self.workers and self._running[admission] < self.classes[admission].concurrency
+
+    def _start(self, admission: Text) -> None:
+        self._running[admission] += 1
+        self.busy += 1
+
+    def _admit(self, admission: Text) -> Optional[asyncio.Future]:
+        """
+        Nhận một lượt mới của nhóm `admission`
+
+        Returns:
+            Future | None: None nếu được chạy ngay, Future hoàn thành khi đến lượt nếu phải chờ
+
+        Raises:
+            asyncio.QueueFull: Nếu hàng đợi của nhóm đã đầy
+        """
+        with self._lock:
+            # Hàng đợi của một nhóm chỉ còn lượt chờ khi nhóm đó hết chỗ (xem _release),
+            # nên còn chỗ nghĩa là không có lượt nào của nhóm đang chờ trước
+            if self._has_room(admission):
+                self._start(admission)
+                return None
+            waiting = self._waiting[admission]
+            if len(waiting) >= self.classes[admission].queue_size:
+                self._rejected[admission] += 1
+                raise asyncio.QueueFull
+            waiter = asyncio.get_running_loop().create_future()
+            waiting.append(waiter)
+            return waiter
+
+    def _release(self, admission: Text, _future: Any = None) -> None:
+        # Được gọi từ luồng worker khi một lượt xong: trả chỗ rồi giao chỗ trống cho lượt
+        # đang chờ của nhóm ưu tiên cao nhất còn được chạy thêm
+        granted = []
+        with self._lock:
+            self._running[admission] -= 1
+            self.busy -= 1
+            for name in self._order:
+                waiting = self._waiting[name]
+                while waiting and self._has_room(name):
+                    self._start(name)
+                    granted.append((waiting.popleft(), name))
+        for waiter, name in granted:
+            waiter.get_loop().call_soon_threadsafe(self._wake, waiter, name)
+
+    def _wake(self, waiter: asyncio.Future, admission: Text) -> None:
+        if waiter.done():
+            # Lượt chờ đã bị hủy (quá hạn) đúng lúc được giao chỗ: trả lại chỗ đó
+            self._release(admission)
+        else:
+            waiter.set_result(None)
+
+    def _abandon(self, admission: Text, waiter: asyncio.Future) -> None:
+        # Lượt chờ bị hủy khi chưa được giao chỗ thì rời hàng đợi; nếu đã được giao, _wake trả chỗ
+        with self._lock:
+            try:
+                self._waiting[admission].remove(waiter)
+            except ValueError:
+                pass
+
+    def _timed_out(self, dispatcher: CollectingDispatcher, name: Text) -> List[Dict[Text, Any]]:
+        with self._lock:
+            self.timeouts += 1
+        OUTCOMES.inc(name, "timeout")
+        logger.warning(f"Xử lý vượt quá {self.timeout} giây, trả lời xin lỗi người dùng")
+        dispatcher.utter_message(text=TIMEOUT_MESSAGE)
+        return []
+
+    async def run(self, handler: ActionHandler, dispatcher: CollectingDispatcher,
+                  tracker: Tracker, domain: Dict[Text, Any], name: Text = "",
+                  admission: Text = DEFAULT_ADMISSION) -> List[Dict[Text, Any]]:
+        """
+        Chạy phần xử lý của hành động trong worker và chuyển kết quả về dispatcher
+
+        Args:
+            handler (callable): Hàm xử lý đồng bộ (dispatcher, tracker, domain) -> events
+            dispatcher: Rasa dispatcher của lượt hiện tại
+            tracker: Tracker của cuộc hội thoại
+            domain (dict): Domain của bot
+            name (str): Tên hành động, dùng làm nhãn số liệu
+            admission (str): Nhóm nhận việc của hành động, một khóa của ADMISSION_CLASSES
+
+        Returns:
+            list: Các event do hàm xử lý trả về, rỗng nếu bị từ chối hoặc quá hạn
+        """
+        if admission not in self.classes:
+            admission = DEFAULT_ADMISSION
+        start = time.perf_counter()
+        try:
+            waiter = self._admit(admission)
+        except asyncio.QueueFull:
+            logger.warning(f"Hàng đợi nhóm {admission} đã đầy, từ chối lượt mới")
+            OUTCOMES.inc(name, "rejected")
+            dispatcher.utter_message(text=BUSY_MESSAGE)
+            return []
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter, self.timeout)
+            except asyncio.TimeoutError:
+                return self._timed_out(dispatcher, name)
+            finally:
+                if waiter.cancelled():
+                    self._abandon(admission, waiter)
+
+        try:
+            future = self.executor.submit(_call_handler, handler, tracker, domain)
+        except Exception:
+            self._release(admission)
+            raise
+        # Chỉ trả chỗ khi worker thực sự xong việc, kể cả khi lượt đã quá hạn
+        future.add_done_callback(partial(self._release, admission))
+
+        try:
+            remaining = max(0.0, self.timeout - (time.perf_counter() - start))
+            messages, events, seconds = await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+        except asyncio.TimeoutError:
+            return self._timed_out(dispatcher, name)
+        except Exception:
+            OUTCOMES.inc(name, "error")
+            raise
+
+        OUTCOMES.inc(name, "ok")
+        WORKER_SECONDS.observe(seconds, name)
+        QUEUE_SECONDS.observe(max(0.0, time.perf_counter() - start - seconds), name)
+        dispatcher.messages.extend(messages)
+        return events
+
+    def stats(self) -> Dict[Text, Any]:
+        """Thống kê theo nhóm nhận việc: số lượt đang chạy, đang chờ, bị từ chối, và số lượt quá hạn"""
+        with self._lock:
+            return {
+                "worker_type": self.worker_type,
+                "workers": self.workers,
+                "busy": self.busy,
+                "timeouts": self.timeouts,
+                "classes": {
+                    name: {
+                        "priority": limit.priority,
+                        "concurrency": limit.concurrency,
+                        "queue_size": limit.queue_size,
+                        "running": self._running[name],
+                        "waiting": len(self._waiting[name]),
+                        "rejected": self._rejected[name],
+                    }
+                    for name, limit in self.classes.items()
+                },
+            }
+
+
+_pool: Optional[WorkerPool] = None
+
+
+def get_worker_pool() -> WorkerPool:
+    """Lấy nhóm worker dùng chung của tiến trình"""
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool()
+    return _pool
+
+
+def _collect_metrics():
+    if _pool is None:
+        return
+    stats = _pool.stats()
+    yield "action_worker_busy", "gauge", "Số worker đang chạy một lượt xử lý", [("", {}, stats["busy"])]
+    yield "action_worker_count", "gauge", "Số worker của worker pool", [("", {}, stats["workers"])]
+    classes = stats["classes"]
+    for name, kind, key, documentation in (
+            ("action_admission_running", "gauge", "running", "Số lượt của nhóm đang chạy trong worker"),
+            ("action_admission_waiting", "gauge", "waiting", "Số lượt của nhóm đang chờ worker rảnh"),
+            ("action_admission_concurrency", "gauge", "concurrency", "Số lượt của nhóm được chạy cùng lúc"),
+            ("action_admission_queue_size", "gauge", "queue_size", "Số lượt của nhóm được chờ"),
+            ("action_admission_rejected_total", "counter", "rejected", "Số lượt bị từ chối vì hàng đợi của nhóm đã đầy")):
+        yield name, kind, documentation, [("", {"admission": admission}, row[key]) for admission, row in classes.items()]
+
+
+REGISTRY.add_collector(_collect_metrics)
@@ -0,0 +1,241 @@
+"""
+Đo hiệu năng từng hành động trong actions/actions.py
+
+Mỗi hành động được gọi trực tiếp với Tracker giả lập và CollectingDispatcher,
+trên danh mục thật (nganh.json) và các danh mục sinh ngẫu nhiên. Kết quả gồm
+số lượt/giây, các phân vị độ trễ và bộ nhớ đỉnh, được lưu thành file JSON trong
+thư mục results/ để so sánh giữa các lần phát hành.
+
+Cách chạy:
+    python benchmarks/bench_actions.py
+    python benchmarks/bench_actions.py --sizes 0 1000 --compare results/action_benchmark.json
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from synthetic import ROOT_DIR, write_catalog
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions as actions_module
+from actions.catalog import NGANH_JSON_PATH, NganhCatalog, set_catalog
+
+RESULT_PATH = os.path.join(ROOT_DIR, "results", "action_benchmark.json")
+
+# Các tình huống đại diện cho từng hành động: (slots, tin nhắn mới nhất)
+SCENARIOS: Dict[Text, List[Tuple[Dict[Text, Any], Text]]] = {
+    "action_xu_ly_ten": [
+        ({"ten_nguoi_dung": "  nguyễn   văn an "}, "tôi tên nguyễn văn an"),
+        ({"ten_nguoi_dung": "Trịnh Trần Phương Tuấn 123"}, "tên tôi là Trịnh Trần Phương Tuấn"),
+    ],
+    "action_tra_loi_nganh_tuyen_sinh": [
+        ({}, "trường có những ngành nào"),
+    ],
+    "action_tra_loi_thong_tin_nganh": [
+        ({"ten_nganh": "Công nghệ thông tin"}, "thông tin ngành Công nghệ thông tin"),
+        ({"ten_nganh": "cntt"}, "giới thiệu ngành cntt"),
+        ({"ten_nganh": "logistics"}, "cho thêm thông tin về ngành logistics"),
+        ({"ten_nganh": "cong nghe thong tin"}, "thông tin ngành cong nghe thong tin"),
+        ({"ten_nganh": "kỹ thuât ô tô"}, "giới thiệu ngành kỹ thuât ô tô"),
+    ],
+    "action_tra_loi_co_hoi_viec_lam": [
+        ({"ten_nganh": "ô tô"}, "cơ hội việc làm ngành ô tô"),
+        ({"ten_nganh": "khoa hoc du lieu"}, "ra trường làm gì ngành khoa hoc du lieu"),
+    ],
+    "action_tra_loi_diem_chuan_nganh": [
+        ({"ten_nganh": "Công nghệ thông tin", "nam": "năm 2024"}, "điểm chuẩn cntt năm 2024"),
+        ({"ten_nganh": "ktđ", "nam": "năm ngoái"}, "điểm chuẩn ktđ năm ngoái"),
+        ({"ten_nganh": "logistics", "nam": None}, "điểm chuẩn logistics"),
+        ({"ten_nganh": "luat", "nam": "2019"}, "điểm chuẩn luật 2019"),
+    ],
+    "action_tra_loi_khoi_xet_tuyen": [
+        ({"ten_nganh": "mang may tinh"}, "ngành mạng máy tính xét khối nào"),
+        ({"ten_nganh": "ngôn ngữ anh"}, "ngôn ngữ anh thi khối gì"),
+    ],
+    "action_tu_van_nganh_theo_diem": [
+        ({}, "em được 24 điểm thì học ngành nào"),
+        ({}, "tổng điểm 21.5 diem"),
+        ({}, "thi được 18 thì sao"),
+    ],
+    "action_tu_van_nganh_theo_so_thich": [
+        ({}, "em thích lập trình và máy tính"),
+        ({}, "em thích ô tô, động cơ và cơ khí"),
+        ({}, "em thích tiếng anh và kinh doanh"),
+    ],
+    "action_tu_van_theo_mon_va_diem": [
+        ({}, "Tôi được Toán 8, Lý 7.5, Hóa 8.5"),
+        ({}, "toan 9 ly 8 anh 7 van 6"),
+        ({}, "ngữ văn 8, lịch sử 7, địa lý 6.5 và tiếng anh 9 còn toán thì được 7.25 điểm"),
+    ],
+    "action_tra_loi_khoi_xet_tuyen_mon_hoc": [
+        ({"khoi_xet_tuyen": "A00"}, "khối A00 gồm những môn nào"),
+        ({"khoi_xet_tuyen": "d7"}, "khối d7 thi môn gì"),
+    ],
+}
+
+
+def all_actions() -> List[Action]:
+    """Các hành động được định nghĩa trong actions/actions.py"""
+    result = []
+    for obj in vars(actions_module).values():
+        if (inspect.isclass(obj) and issubclass(obj, Action) and not inspect.isabstract(obj)
+                and obj.__module__ == actions_module.__name__):
+            result.append(obj())
+    return sorted(result, key=lambda action: action.name())
+
+
+def make_tracker(slots: Dict[Text, Any], text: Text) -> Tracker:
+    """Tạo Tracker giả lập với slots và tin nhắn mới nhất"""
+    latest_message = {"text": text, "intent": {}, "entities": []}
+    return Tracker("benchmark", dict(slots), latest_message, [], False, None, None, None)
+
+
+async def call_action(action: Action, slots: Dict[Text, Any], text: Text) -> CollectingDispatcher:
+    dispatcher = CollectingDispatcher()
+    result = action.run(dispatcher, make_tracker(slots, text), {})
+    if inspect.isawaitable(result):
+        await result
+    return dispatcher
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def bench_action(action: Action, iterations: int, warmup: int, time_budget: float) -> Dict[Text, Any]:
+    scenarios = SCENARIOS.get(action.name(), [({}, "")])
+    started = time.perf_counter()
+    for i in range(warmup):
+        await call_action(action, *scenarios[i % len(scenarios)])
+        if time.perf_counter() - started > time_budget / 4:
+            break
+
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        slots, text = scenarios[i % len(scenarios)]
+        start = time.perf_counter()
+        await call_action(action, slots, text)
+        samples.append(time.perf_counter() - start)
+        # Hành động quá chậm trên danh mục lớn chỉ chạy trong giới hạn thời gian
+        if start - started > time_budget and len(samples) >= len(scenarios):
+            break
+    elapsed = time.perf_counter() - started
+
+    # Đo bộ nhớ đỉnh ở một lượt riêng vì tracemalloc làm chậm đáng kể
+    tracemalloc.start()
+    for slots, text in scenarios:
+        await call_action(action, slots, text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": len(samples) / elapsed,
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+async def bench_catalog(label: Text, path: Text, args: argparse.Namespace) -> Dict[Text, Any]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    catalog = NganhCatalog(path)
+    load_seconds = time.perf_counter() - start
+    _, load_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    set_catalog(catalog)
+
+    print(f"\n== {label}: {len(catalog.nganh_list)} ngành, nạp trong {load_seconds * 1000:.1f} ms")
+    results = {}
+    for action in all_actions():
+        stats = await bench_action(action, args.iterations, args.warmup, args.time_budget)
+        results[action.name()] = stats
+        print(f"  {action.name():<40} {stats['ops_per_sec']:>9.0f} lượt/s  p50 {stats['p50_ms']:7.3f} ms  "
+              f"p95 {stats['p95_ms']:7.3f} ms  p99 {stats['p99_ms']:7.3f} ms  {stats['peak_memory_kb']:8.0f} KB")
+    return {
+        "catalog_size": len(catalog.nganh_list),
+        "load_ms": load_seconds * 1000,
+        "load_peak_memory_kb": load_peak / 1024,
+        "actions": results,
+    }
+
+
+def compare(report: Dict[Text, Any], baseline_path: Text, tolerance: float) -> int:
+    """In các hành động có p95 chậm hơn mốc cũ quá `tolerance`, trả về số lượng"""
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = 0
+    for label, catalog in report["catalogs"].items():
+        old_catalog = baseline.get("catalogs", {}).get(label)
+        if not old_catalog:
+            continue
+        for name, stats in catalog["actions"].items():
+            old = old_catalog["actions"].get(name)
+            if old and stats["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions += 1
+                print(f"CHẬM HƠN: {label} {name} p95 {old['p95_ms']:.3f} -> {stats['p95_ms']:.3f} ms")
+    return regressions
+
+
+async def main_async(args: argparse.Namespace) -> Optional[int]:
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "catalogs": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            if size:
+                label = f"synthetic_{size}"
+                path = write_catalog(size, os.path.join(tmp, f"{label}.json"))
+            else:
+                label, path = "nganh.json", NGANH_JSON_PATH
+            report["catalogs"][label] = await bench_catalog(label, path, args)
+
+    regressions = compare(report, args.compare, args.tolerance) if args.compare else None
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f"\nĐã lưu kết quả vào {args.output}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 10000, 100000],
+                        help="kích thước danh mục, 0 là nganh.json thật")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--time-budget", type=float, default=10.0,
+                        help="số giây tối đa đo một hành động trên một danh mục")
+    parser.add_argument("--output", default=RESULT_PATH, help="file JSON lưu kết quả, để trống để không lưu")
+    parser.add_argument("--compare", help="file kết quả cũ dùng làm mốc so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="mức chậm hơn cho phép so với mốc (0.2 = 20%%)")
+    args = parser.parse_args()
+    regressions = asyncio.run(main_async(args))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Đo độ trễ tra cứu và tư vấn trong worker pool khi tải tư vấn tăng vọt (ngày công bố điểm)
+
+Các lượt tra cứu (nhanh) và tư vấn (chậm) đến theo phân phối Poisson và được
+gửi vào WorkerPool thật; phần xử lý chỉ ngủ một khoảng thời gian cố định để
+giữ worker như tính toán thật. So sánh hai cách nhận việc:
+    fifo      một hàng đợi chung cho mọi hành động (cách cũ)
+    theo nhóm hàng đợi và giới hạn riêng cho tra cứu, tư vấn (ADMISSION_CLASSES)
+Kết quả gồm độ trễ p50/p95/p99 theo nhóm, số lượt bị từ chối, quá hạn và độ
+sâu hàng đợi lớn nhất của mỗi nhóm.
+
+Cách chạy:
+    python benchmarks/bench_admission.py --workers 4 --lookup-rate 150 --advice-rate 120 --duration 5
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List, Text
+
+import synthetic  # noqa
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions.worker_pool import BUSY_MESSAGE, TIMEOUT_MESSAGE, AdmissionClass, WorkerPool
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def handler_for(seconds: float):
+    def handler(dispatcher, tracker, domain):
+        time.sleep(seconds)
+        dispatcher.utter_message(text="ok")
+        return []
+    return handler
+
+
+async def run_load(pool: WorkerPool, admission: Dict[Text, Text], rates: Dict[Text, float],
+                   costs: Dict[Text, float], duration: float, seed: int):
+    """Phát tải vòng hở lên `pool`, trả về (độ trễ theo nhóm, kết quả theo nhóm, hàng đợi lớn nhất)"""
+    rng = random.Random(seed)
+    tracker = Tracker("bench", {}, {}, [], False, None, {}, "")
+    handlers = {kind: handler_for(cost) for kind, cost in costs.items()}
+    latencies: Dict[Text, List[float]] = defaultdict(list)
+    outcomes: Dict[Text, Dict[Text, int]] = defaultdict(lambda: defaultdict(int))
+    max_waiting: Dict[Text, int] = defaultdict(int)
+
+    async def one(kind: Text) -> None:
+        dispatcher = CollectingDispatcher()
+        start = time.perf_counter()
+        await pool.run(handlers[kind], dispatcher, tracker, {}, kind, admission[kind])
+        elapsed = time.perf_counter() - start
+        text = dispatcher.messages[0].get("text") if dispatcher.messages else None
+        if text == BUSY_MESSAGE:
+            outcomes[kind]["rejected"] += 1
+        elif text == TIMEOUT_MESSAGE:
+            outcomes[kind]["timeout"] += 1
+        else:
+            outcomes[kind]["ok"] += 1
+            latencies[kind].append(elapsed)
+
+    async def arrivals(kind: Text, rate: float) -> List[asyncio.Task]:
+        tasks = []
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(rng.expovariate(rate))
+            tasks.append(asyncio.create_task(one(kind)))
+            for name, row in pool.stats()["classes"].items():
+                max_waiting[name] = max(max_waiting[name], row["waiting"])
+        return tasks
+
+    batches = await asyncio.gather(*(arrivals(kind, rate) for kind, rate in rates.items()))
+    await asyncio.gather(*(task for tasks in batches for task in tasks))
+    return latencies, outcomes, max_waiting
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lookup-rate", type=float, default=150.0, help="số lượt tra cứu mỗi giây")
+    parser.add_argument("--advice-rate", type=float, default=120.0, help="số lượt tư vấn mỗi giây")
+    parser.add_argument("--lookup-ms", type=float, default=2.0, help="thời gian xử lý một lượt tra cứu")
+    parser.add_argument("--advice-ms", type=float, default=40.0, help="thời gian xử lý một lượt tư vấn")
+    parser.add_argument("--queue-size", type=int, default=64, help="hàng đợi chung của cách cũ, hàng đợi tra cứu")
+    parser.add_argument("--advice-queue-size", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Mỗi lượt bị từ chối đều ghi cảnh báo; tắt để kết quả dễ đọc
+    logging.disable(logging.WARNING)
+
+    rates = {"tra_cuu": args.lookup_rate, "tu_van": args.advice_rate}
+    costs = {"tra_cuu": args.lookup_ms / 1000, "tu_van": args.advice_ms / 1000}
+    capacity = args.workers / (args.lookup_rate * costs["tra_cuu"] + args.advice_rate * costs["tu_van"])
+    print(f"{args.workers} worker, tra cứu {args.lookup_rate:g}/s x {args.lookup_ms:g} ms, "
+          f"tư vấn {args.advice_rate:g}/s x {args.advice_ms:g} ms (tải bằng {1 / capacity:.0%} sức chứa)")
+
+    # Cách cũ: mọi lượt chung một hàng đợi, tổng số lượt đang chạy và đang chờ không quá queue_size
+    fifo = {"chung": AdmissionClass(priority=0, concurrency=args.workers,
+                                    queue_size=max(0, args.queue_size - args.workers))}
+    grouped = {
+        "tra_cuu": AdmissionClass(priority=0, concurrency=args.workers, queue_size=args.queue_size),
+        "tu_van": AdmissionClass(priority=1, concurrency=max(1, args.workers // 2), queue_size=args.advice_queue_size),
+    }
+    modes = [
+        ("fifo", fifo, {"tra_cuu": "chung", "tu_van": "chung"}),
+        ("theo nhóm", grouped, {"tra_cuu": "tra_cuu", "tu_van": "tu_van"}),
+    ]
+    for label, classes, admission in modes:
+        pool = WorkerPool("thread", args.workers, classes, args.timeout)
+        latencies, outcomes, max_waiting = asyncio.run(
+            run_load(pool, admission, rates, costs, args.duration, args.seed))
+        print(f"  {label}: hàng đợi lớn nhất {dict(max_waiting)}")
+        for kind in rates:
+            values = latencies[kind]
+            row = outcomes[kind]
+            print(f"    {kind:<8} ok {row['ok']:5} | từ chối {row['rejected']:5} | quá hạn {row['timeout']:4} | "
+                  f"p50 {percentile(values, 0.5) * 1000:7.1f} ms | p95 {percentile(values, 0.95) * 1000:7.1f} ms | "
+                  f"p99 {percentile(values, 0.99) * 1000:7.1f} ms | tb "
+                  f"{(statistics.fmean(values) if values else 0) * 1000:7.1f} ms")
+        pool.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+So sánh nganh.json với snapshot nhị phân mmap khi nhiều tiến trình action
+server cùng nạp danh mục: kích thước file, thời gian nạp, bộ nhớ riêng và PSS
+(phần bộ nhớ dùng chung được chia đều cho các tiến trình) của mỗi tiến trình,
+và chi phí giải mã đoạn văn khi cần gửi
+
+Bộ nhớ mỗi tiến trình được đọc từ /proc/self/smaps_rollup nên chỉ chạy trên Linux.
+
+Cách chạy:
+    python benchmarks/bench_binary_snapshot.py --sizes 1000 10000 --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from synthetic import generate_catalog
+
+from actions.binary_snapshot import convert
+from actions.catalog import load_nganh_file
+
+
+def memory_kb() -> dict:
+    """Rss, Pss và bộ nhớ riêng (KB) của tiến trình hiện tại"""
+    result = {}
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                result[parts[0][:-1]] = int(parts[1])
+    return {"rss": result["Rss"], "pss": result["Pss"], "private": result["Private_Clean"] + result["Private_Dirty"]}
+
+
+def worker(path: str, barrier, queue) -> None:
+    before = memory_kb()
+    start = time.perf_counter()
+    nganh_list = load_nganh_file(path)
+    load = time.perf_counter() - start
+    sum(len(nganh["ten_nganh"]) for nganh in nganh_list)
+    # Đợi mọi tiến trình cùng nạp xong để PSS phản ánh phần dùng chung
+    barrier.wait()
+    after = memory_kb()
+    barrier.wait()
+    queue.put((load, {key: after[key] - before[key] for key in after}))
+
+
+def run_workers(path: str, workers: int) -> tuple:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    queue = context.Queue()
+    processes = [context.Process(target=worker, args=(path, barrier, queue)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    load = sum(load for load, _ in results) / workers
+    memory = {key: sum(mem[key] for _, mem in results) / workers / 1024 for key in results[0][1]}
+    return load, memory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            data = generate_catalog(size, years=args.years)
+            # Mỗi chương trình có đoạn giới thiệu riêng, như một danh mục thật
+            for nganh in data:
+                nganh["gioi_thieu_chung"] = f"{nganh['ten_nganh']}. {nganh['gioi_thieu_chung']}"
+            json_path = os.path.join(tmp, f"{size}.json")
+            with open(json_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False)
+            bin_path = os.path.join(tmp, f"{size}.bin")
+            convert(json_path, bin_path)
+
+            print(f"{size:>6} ngành | nganh.json {os.path.getsize(json_path) / 2**20:6.2f} MB | "
+                  f"snapshot {os.path.getsize(bin_path) / 2**20:6.2f} MB | {args.workers} tiến trình")
+            for label, path in (("json", json_path), ("mmap", bin_path)):
+                load, memory = run_workers(path, args.workers)
+                print(f"       {label}: nạp {load * 1000:7.1f} ms | mỗi tiến trình RSS {memory['rss']:6.1f} MB, "
+                      f"riêng {memory['private']:6.1f} MB, PSS {memory['pss']:6.1f} MB")
+
+            nganh_list = load_nganh_file(bin_path)
+            start = time.perf_counter()
+            for nganh in nganh_list:
+                nganh["gioi_thieu_chung"], nganh["co_hoi_viec_lam"]
+            decode = (time.perf_counter() - start) / len(nganh_list)
+            print(f"       giải mã giới thiệu + cơ hội việc làm từ snapshot: {decode * 1e6:5.2f} µs/ngành")
+
+
+if __name__ == "__main__":
+    main()
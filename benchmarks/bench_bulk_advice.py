@@ -0,0 +1,172 @@
+"""
+Đo tốc độ tư vấn hàng loạt (actions/bulk_advice.py) và so với gọi từng lượt chat
+
+Sinh một file CSV điểm từng môn (bậc 0,25 như điểm thi thật, một phần học sinh
+chỉ có tổng điểm), chạy toàn bộ qua advise_stream như CLI, rồi kiểm tra một
+mẫu học sinh cho ra đúng danh sách ngành của ActionTuVanTheoMonVaDiem và
+ActionTuVanNganhTheoDiem. Kèm thời gian ước tính nếu tư vấn từng học sinh qua
+hành động trong khung chat, và kiểm tra danh mục chưa có điểm chuẩn năm nào
+vẫn trả về lỗi cho từng dòng thay vì làm hỏng cả luồng kết quả, cũng như
+một lô lẫn tổng điểm hợp lệ và không hợp lệ ("nan", "inf", số âm, quá 30)
+chỉ làm lỗi đúng các dòng sai.
+
+Cách chạy:
+    python benchmarks/bench_bulk_advice.py --students 100000
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import time
+import tracemalloc
+
+from synthetic import load_real_catalog
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions.actions import ActionTuVanNganhTheoDiem, ActionTuVanTheoMonVaDiem
+from actions.bulk_advice import NO_CUTOFF_MESSAGE, advise_stream
+from actions.catalog import get_catalog
+from actions.nganh_model import compact_nganh_list
+
+# Tên cột như file của các trường THPT: có dấu, không dấu, viết tắt
+SUBJECT_COLUMNS = ["Toán", "Vật lý", "Hóa học", "Sinh học", "Ngữ văn", "Lịch sử", "Địa lý", "Tiếng Anh", "GDCD"]
+
+# Tổ hợp môn thường gặp (thí sinh thi 3 môn xét tuyển cộng các môn bắt buộc)
+COMBINATIONS = [
+    ["Toán", "Vật lý", "Hóa học", "Ngữ văn", "Tiếng Anh"],
+    ["Toán", "Hóa học", "Sinh học", "Ngữ văn", "Tiếng Anh"],
+    ["Toán", "Ngữ văn", "Lịch sử", "Địa lý", "GDCD", "Tiếng Anh"],
+    ["Toán", "Vật lý", "Tiếng Anh", "Ngữ văn"],
+]
+
+
+def generate_csv(students: int, total_ratio: float, seed: int = 0) -> bytes:
+    """File CSV điểm của `students` học sinh"""
+    rng = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["sbd"] + SUBJECT_COLUMNS + ["tong_diem"])
+    for i in range(students):
+        row = {column: "" for column in SUBJECT_COLUMNS}
+        total = ""
+        if rng.random() < total_ratio:
+            total = f"{rng.randint(60, 112) / 4:.2f}"
+        else:
+            level = rng.gauss(6.5, 1.3)
+            for column in rng.choice(COMBINATIONS):
+                diem = min(10.0, max(0.0, round((level + rng.gauss(0, 1.0)) * 4) / 4))
+                row[column] = f"{diem:g}".replace(".", ",")
+        writer.writerow([f"HS{i:06d}"] + [row[column] for column in SUBJECT_COLUMNS] + [total])
+    return out.getvalue().encode("utf-8")
+
+
+def chunks_of(data: bytes, size: int = 1 << 16):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def chat_advice(row: dict) -> tuple:
+    """Danh sách (tên ngành, khối, điểm chuẩn) mà hành động trong khung chat gợi ý cho một dòng"""
+    if row["tong_diem"]:
+        action, text = ActionTuVanNganhTheoDiem(), f"{row['tong_diem'].replace(',', '.')} điểm"
+    else:
+        text = ", ".join(f"{column} {row[column].replace(',', '.')}" for column in SUBJECT_COLUMNS if row[column])
+        action = ActionTuVanTheoMonVaDiem()
+    dispatcher = CollectingDispatcher()
+    action.xu_ly(dispatcher, Tracker("bench", {}, {"text": text}, [], False, None, None, None), {})
+    lines = re.findall(r"^\d+\. (.+) - Khối (\w+)\n.*Điểm chuẩn: ([\d.]+)", dispatcher.messages[0]["text"], re.M)
+    return tuple((ten, khoi, float(diem_chuan)) for ten, khoi, diem_chuan in lines)
+
+
+def check_no_cutoffs(data: bytes) -> None:
+    """Tư vấn một mẫu trên danh mục đã xóa hết điểm chuẩn: mọi dòng phải nhận lỗi thiếu điểm chuẩn"""
+    raw = load_real_catalog()
+    for nganh in raw:
+        nganh["diem_chuan"] = {}
+    empty = compact_nganh_list(raw)
+    sample = b"\n".join(data.split(b"\n")[:201]) + b"\n"
+    advices = [json.loads(line) for part in advise_stream([sample], empty) for line in part.splitlines()]
+    missing = sum(advice["loi"] == NO_CUTOFF_MESSAGE and not advice["nganh"] for advice in advices)
+    print(f"  danh mục chưa có điểm chuẩn: {missing}/{len(advices)} dòng nhận lỗi thiếu điểm chuẩn")
+
+
+def check_invalid_totals(nganh_list: list) -> None:
+    """Lô lẫn tổng điểm hợp lệ và không hợp lệ: dòng sai nhận lỗi, dòng đúng giống khi tư vấn riêng"""
+    totals = ["25", "nan", "inf", "-3", "31", "abc", "18,5", "-inf", "24"]
+    lines = [json.dumps({"sbd": f"HS{i}", "tong_diem": total}) for i, total in enumerate(totals)]
+    # NaN của JSON (không có nháy) cũng phải bị từ chối
+    lines.append('{"sbd": "HSnan", "tong_diem": NaN}')
+    batch = ("\n".join(lines) + "\n").encode("utf-8")
+    runs = [[json.loads(line) for part in advise_stream([batch], nganh_list, "jsonl")
+             for line in part.splitlines()] for _ in range(5)]
+    alone = {}
+    for line in lines:
+        advice = [json.loads(out) for part in advise_stream([(line + "\n").encode("utf-8")], nganh_list, "jsonl")
+                  for out in part.splitlines()][0]
+        alone[advice["id"]] = advice
+    stable = all(run == runs[0] for run in runs)
+    valid = [advice for advice in runs[0] if not advice["loi"]]
+    same = all(advice == alone[advice["id"]] for advice in runs[0])
+    print(f"  lô lẫn tổng điểm sai: {len(valid)}/{len(runs[0])} dòng được tư vấn "
+          f"({', '.join(advice['id'] for advice in valid)}), giống khi tư vấn riêng: {same}, "
+          f"kết quả ổn định qua {len(runs)} lần: {stable}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--total-ratio", type=float, default=0.2, help="tỉ lệ học sinh chỉ có tổng điểm")
+    parser.add_argument("--check", type=int, default=300, help="số học sinh được so với hành động trong khung chat")
+    args = parser.parse_args()
+
+    nganh_list = get_catalog().nganh_list
+    data = generate_csv(args.students, args.total_ratio)
+    print(f"{args.students} học sinh, {len(data) / 2**20:.1f} MB CSV")
+
+    for output_format in ("jsonl", "csv"):
+        start = time.perf_counter()
+        size = lines = 0
+        for part in advise_stream(chunks_of(data), nganh_list, "csv", output_format):
+            size += len(part)
+            lines += part.count("\n")
+        elapsed = time.perf_counter() - start
+        # Đo bộ nhớ trong một lượt riêng vì tracemalloc làm chậm đáng kể
+        tracemalloc.start()
+        for _ in advise_stream(chunks_of(data), nganh_list, "csv", output_format):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  ra {output_format:<5}: {elapsed:6.2f} giây, {args.students / elapsed:9.0f} học sinh/giây, "
+              f"{lines} dòng ({size / 2**20:.1f} MB), bộ nhớ đỉnh {peak / 2**20:.1f} MB")
+
+    # Đối chiếu một mẫu với hành động trong khung chat
+    rows = list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+    sample = random.Random(1).sample(range(len(rows)), min(args.check, len(rows)))
+    sample_csv = io.StringIO()
+    writer = csv.DictWriter(sample_csv, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows[i] for i in sample)
+    bulk = [json.loads(line) for part in advise_stream([sample_csv.getvalue().encode("utf-8")], nganh_list)
+            for line in part.splitlines()]
+
+    start = time.perf_counter()
+    expected = [chat_advice(rows[i]) for i in sample]
+    per_student = (time.perf_counter() - start) / len(sample)
+    # Khung chat hiển thị điểm chuẩn với một chữ số thập phân
+    mismatches = sum(
+        tuple((nganh["ten_nganh"], nganh["ma_khoi"], float(f"{nganh['diem_chuan']:.1f}"))
+              for nganh in advice["nganh"]) != chat
+        for advice, chat in zip(bulk, expected))
+    print(f"  đối chiếu {len(sample)} học sinh với khung chat: {mismatches} khác biệt")
+    print(f"  gọi từng lượt chat: {per_student * 1e6:.0f} µs/học sinh, "
+          f"ước tính {per_student * args.students:.1f} giây cho {args.students} học sinh")
+    check_no_cutoffs(data)
+    check_invalid_totals(nganh_list)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Đo hiệu quả gộp các lượt gọi giống hệt nhau đến cùng lúc (actions/single_flight.py)
+
+Mô phỏng đợt hỏi dồn dập ngay sau khi công bố điểm: các lượt hỏi đến theo
+phân phối Poisson, phần lớn là cùng vài câu (danh sách ngành, điểm chuẩn các
+ngành được quan tâm nhất) theo phân phối Zipf. Các lượt được gọi qua
+`Action.run` thật, tức qua bộ gộp lượt và worker pool. So sánh khi tắt và
+bật gộp lượt: số lần phần xử lý thực sự chạy trong worker, độ trễ p50/p95/p99
+và số lượt bị từ chối. Benchmark cũng kiểm tra mỗi lượt nhận đúng câu trả lời
+như khi tự xử lý.
+
+Cách chạy:
+    python benchmarks/bench_coalesce.py --rate 3000 --duration 3 --ttl 0.5
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Text, Tuple
+
+from synthetic import load_real_catalog
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions as actions_module
+from actions import single_flight, worker_pool
+from actions.single_flight import SingleFlight
+from actions.worker_pool import BUSY_MESSAGE, TIMEOUT_MESSAGE, WorkerPool
+
+
+def build_requests() -> List[Tuple[Any, Dict[Text, Any], Text]]:
+    """Các câu hỏi có thể có, câu được hỏi nhiều nhất đứng đầu: (hành động, slots, tin nhắn)"""
+    ten_nganh = [nganh["ten_nganh"] for nganh in load_real_catalog()]
+    requests = [(actions_module.ActionTraLoiNganhTuyenSinh(), {}, "trường có những ngành nào")]
+    for ten in ten_nganh:
+        requests.append((actions_module.ActionTraLoiDiemChuanNganh(), {"ten_nganh": ten}, f"điểm chuẩn {ten}"))
+    for ten in ten_nganh:
+        requests.append((actions_module.ActionTraLoiKhoiXetTuyen(), {"ten_nganh": ten}, f"{ten} xét khối nào"))
+    for diem in range(15, 30):
+        requests.append((actions_module.ActionTuVanNganhTheoDiem(), {}, f"em được {diem} điểm thì học ngành gì"))
+    return requests
+
+
+def make_tracker(sender: int, slots: Dict[Text, Any], text: Text) -> Tracker:
+    return Tracker(f"user-{sender}", slots, {"text": text, "intent": {}, "entities": []}, [], False, None, {}, "")
+
+
+async def run_burst(requests, weights, rate: float, duration: float, seed: int):
+    """Phát tải vòng hở, trả về (độ trễ từng lượt, số lượt bị từ chối/quá hạn, câu trả lời sai)"""
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    failed = 0
+    wrong = 0
+    expected: Dict[int, List[Dict[Text, Any]]] = {}
+
+    async def one(sender: int, index: int) -> None:
+        nonlocal failed, wrong
+        action, slots, text = requests[index]
+        dispatcher = CollectingDispatcher()
+        start = time.perf_counter()
+        events = await action.run(dispatcher, make_tracker(sender, slots, text), {})
+        latencies.append(time.perf_counter() - start)
+        if any(message.get("text") in (BUSY_MESSAGE, TIMEOUT_MESSAGE) for message in dispatcher.messages):
+            failed += 1
+        elif expected.setdefault(index, [dispatcher.messages, events]) != [dispatcher.messages, events]:
+            wrong += 1
+
+    # Lịch đến cố định theo seed để mọi lượt đo gửi cùng các câu hỏi vào cùng thời điểm
+    arrivals = []
+    at = 0.0
+    while True:
+        at += rng.expovariate(rate)
+        if at >= duration:
+            break
+        arrivals.append((at, rng.choices(range(len(requests)), weights)[0]))
+
+    tasks = []
+    start = time.perf_counter()
+    for sender, (at, index) in enumerate(arrivals):
+        delay = at - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(sender, index)))
+    await asyncio.gather(*tasks)
+    return latencies, failed, wrong
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=3000.0, help="số lượt hỏi mỗi giây")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--zipf", type=float, default=1.2, help="độ lệch của phân phối câu hỏi")
+    parser.add_argument("--ttl", type=float, default=0.5, help="thời gian dùng chung kết quả đã xong (giây)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    requests = build_requests()
+    weights = [1 / (rank ** args.zipf) for rank in range(1, len(requests) + 1)]
+    print(f"{len(requests)} câu hỏi khác nhau, {args.rate:g} lượt/giây trong {args.duration:g} giây, "
+          f"{args.workers} worker")
+
+    for label, enabled, ttl in (("không gộp", False, 0.0), ("gộp, ttl 0", True, 0.0),
+                                (f"gộp, ttl {args.ttl:g}", True, args.ttl)):
+        actions_module.ACTION_COALESCE = enabled
+        single_flight._single_flight = SingleFlight(ttl)
+        worker_pool._pool = pool = WorkerPool("thread", args.workers)
+        calls = 0
+        pool_run = pool.run
+
+        async def counted_run(*a, **kw):
+            nonlocal calls
+            calls += 1
+            return await pool_run(*a, **kw)
+
+        pool.run = counted_run
+        latencies, failed, wrong = asyncio.run(run_burst(requests, weights, args.rate, args.duration, args.seed))
+        pool.executor.shutdown(wait=True)
+        print(f"  {label:<14} {len(latencies):6} lượt, xử lý {calls:6} lần "
+              f"({calls / len(latencies):5.1%}) | p50 {percentile(latencies, 0.5) * 1000:6.2f} ms | "
+              f"p95 {percentile(latencies, 0.95) * 1000:6.2f} ms | p99 {percentile(latencies, 0.99) * 1000:6.2f} ms | "
+              f"từ chối/quá hạn {failed} | sai {wrong}")
+
+
+if __name__ == "__main__":
+    main()
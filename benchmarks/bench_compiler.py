@@ -0,0 +1,57 @@
+"""
+Đo thời gian khởi động danh mục: đọc nganh.json rồi dựng mọi cấu trúc tra cứu
+so với nạp file cấu trúc dựng sẵn của `python -m actions.compiler`
+
+Cách chạy:
+    python benchmarks/bench_compiler.py --sizes 0 1000 10000
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from synthetic import write_catalog
+
+from actions.catalog import NGANH_JSON_PATH, NganhCatalog, artifacts_path, load_nganh_file
+from actions.compiler import ARTIFACT_BUILDERS, compile_artifacts, write_artifacts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 10000],
+                        help="kích thước danh mục, 0 là nganh.json thật")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"{size}.json")
+            if size:
+                write_catalog(size, path)
+            else:
+                with open(NGANH_JSON_PATH, 'rb') as src, open(path, 'wb') as dst:
+                    dst.write(src.read())
+
+            start = time.perf_counter()
+            snapshot = NganhCatalog(path).snapshot
+            for name, builder in ARTIFACT_BUILDERS.items():
+                snapshot.artifact(name, builder)
+            cold = time.perf_counter() - start
+
+            with open(path, 'rb') as file:
+                source_sha256 = hashlib.sha256(file.read()).hexdigest()
+            compiled, timings = compile_artifacts(load_nganh_file(path))
+            size_bytes = write_artifacts(artifacts_path(path), compiled, source_sha256)
+
+            start = time.perf_counter()
+            snapshot = NganhCatalog(path).snapshot
+            warm = time.perf_counter() - start
+            assert set(snapshot._artifacts) == set(ARTIFACT_BUILDERS)
+
+            print(f"{len(snapshot.nganh_list):>6} ngành | đọc JSON + dựng {cold * 1000:8.1f} ms | "
+                  f"nạp bản dựng sẵn {warm * 1000:7.1f} ms ({size_bytes / 2**20:.1f} MB)")
+            print("       " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Đếm số lần phải tìm ngành theo tên khi phát lại các story, có và không có slot ma_nganh
+
+Các story được phát lại ngay trong tiến trình (như load_replay.py nhưng gọi
+thẳng hành động, không qua HTTP): slot được cập nhật từ thực thể và từ event
+hành động trả về. Lượt "không có mã" xóa slot ma_nganh trước mỗi lượt gọi để
+mô phỏng cách làm cũ, khi tên ngành trong slot phải đi lại chuỗi tìm kiếm.
+Kết quả gồm số lần tìm ngành theo bước cho kết quả, số lần chạy chuỗi tìm kiếm
+(bộ đệm kết quả trống) và số lần so khớp mờ thực sự chấm điểm.
+
+Cách chạy:
+    python benchmarks/bench_ma_nganh.py --conversations 2000
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import random
+import time
+from typing import Any, Dict, List, Text
+
+import yaml
+from load_replay import DOMAIN_FILE, NLU_FILE, STORY_FILES, Conversation, choose_text, load_examples, load_stories
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions as action_module
+from actions.actions import CatalogAction
+from actions.catalog import get_catalog
+from actions.match_index import MATCH_STAGES, NganhMatchIndex
+
+
+def load_actions() -> Dict[Text, Action]:
+    registry = {}
+    for value in vars(action_module).values():
+        if inspect.isclass(value) and issubclass(value, Action) and not inspect.isabstract(value) \
+                and value.__module__ == action_module.__name__:
+            action = value()
+            registry[action.name()] = action
+    return registry
+
+
+def run_action(action: Action, conversation: Conversation, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    tracker = Tracker.from_dict(json.loads(conversation.payload(action.name()))["tracker"])
+    dispatcher = CollectingDispatcher()
+    if isinstance(action, CatalogAction):
+        return action.xu_ly(dispatcher, tracker, domain)
+    events = action.run(dispatcher, tracker, domain)
+    return asyncio.run(events) if inspect.iscoroutine(events) else events
+
+
+def replay(stories, examples, domain, slot_entities, registry, conversations: int, keep_code: bool, seed: int):
+    """Phát lại `conversations` hội thoại, trả về (số lần tìm theo bước, số lần chạy chuỗi, số lần chấm mờ, giây)"""
+    rng = random.Random(seed)
+    # Danh mục mới để bộ đệm kết quả tìm ngành của hai lượt đo không dùng chung
+    get_catalog().reload(force=True)
+    MATCH_STAGES._values.clear()
+    counts = {"cascade": 0, "fuzzy": 0}
+    resolve, score_batch = NganhMatchIndex.resolve, NganhMatchIndex.score_batch
+
+    def counted_resolve(self, *args, **kwargs):
+        counts["cascade"] += 1
+        return resolve(self, *args, **kwargs)
+
+    def counted_score_batch(self, *args, **kwargs):
+        counts["fuzzy"] += 1
+        return score_batch(self, *args, **kwargs)
+
+    NganhMatchIndex.resolve, NganhMatchIndex.score_batch = counted_resolve, counted_score_batch
+    start = time.perf_counter()
+    try:
+        for _ in range(conversations):
+            story = rng.choice(stories)
+            conversation = Conversation(domain, slot_entities, None)
+            for turn in story.turns:
+                conversation.user(turn, choose_text(turn, examples, rng))
+                for name in turn.actions:
+                    action = registry.get(name)
+                    if action is not None:
+                        if not keep_code:
+                            conversation.slots["ma_nganh"] = None
+                        conversation.apply({"events": run_action(action, conversation, domain)})
+                    conversation.action(name)
+    finally:
+        NganhMatchIndex.resolve, NganhMatchIndex.score_batch = resolve, score_batch
+    elapsed = time.perf_counter() - start
+    stages = {labels[1]: int(value) for labels, value in MATCH_STAGES._values.items()}
+    return stages, counts["cascade"], counts["fuzzy"], elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(DOMAIN_FILE, 'r', encoding='utf-8') as file:
+        domain = yaml.safe_load(file)
+    stories = load_stories(STORY_FILES)
+    examples = load_examples(NLU_FILE)
+    slot_entities = {
+        mapping["entity"]: slot
+        for slot, config in (domain.get("slots") or {}).items()
+        for mapping in config.get("mappings") or []
+        if mapping.get("type") == "from_entity" and mapping.get("entity")
+    }
+    registry = load_actions()
+    print(f"{len(stories)} story, {args.conversations} hội thoại mỗi lượt đo")
+
+    results = {}
+    for label, keep_code in (("không có mã", False), ("có mã", True)):
+        stages, cascade, fuzzy, elapsed = replay(stories, examples, domain, slot_entities, registry,
+                                                 args.conversations, keep_code, args.seed)
+        results[label] = (stages, cascade, fuzzy)
+        detail = ", ".join(f"{stage} {count}" for stage, count in sorted(stages.items(), key=lambda x: -x[1]))
+        print(f"  {label:<12} tìm ngành {sum(stages.values()):6} lần ({detail})")
+        print(f"  {'':<12} chạy chuỗi tìm kiếm {cascade} lần, so khớp mờ {fuzzy} lần, {elapsed:.2f} giây")
+
+    before, after = results["không có mã"], results["có mã"]
+    lookups = sum(count for stage, count in before[0].items() if stage != "canonical")
+    lookups_after = sum(count for stage, count in after[0].items() if stage not in ("id", "canonical"))
+    print(f"  slot ma_nganh trả lời {after[0].get('id', 0)} lần tìm ngành theo mã; "
+          f"tìm theo tên (sau bước tên chuẩn) {lookups} -> {lookups_after}, "
+          f"chạy chuỗi {before[1]} -> {after[1]}, so khớp mờ {before[2]} -> {after[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Đo thời gian tra cứu của chỉ mục tìm ngành trên danh mục lớn
+
+Cách chạy:
+    python benchmarks/bench_match_index.py --sizes 26 1000 10000
+"""
+import argparse
+import statistics
+import time
+
+from synthetic import generate_catalog, load_real_catalog
+
+from actions.match_index import NganhMatchIndex
+
+QUERIES = [
+    "công nghệ thông tin",
+    "logistics và quản lý chuỗi cung ứng",
+    "kỹ thuật ô tô",
+    "ô tô",
+    "thông tin",
+    "kinh tế vận tải",
+    "kỹ thuật điện tử",
+    "khoa hoc du lieu",
+    "cong nghe thong tin",
+    "ngôn ngữ",
+]
+
+
+def bench(size: int, repeat: int) -> None:
+    nganh_list = load_real_catalog() if size <= 26 else generate_catalog(size)
+    start = time.perf_counter()
+    index = NganhMatchIndex(nganh_list)
+    build = time.perf_counter() - start
+    print(f"\n{len(nganh_list)} ngành - xây chỉ mục {build * 1000:.1f} ms")
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _, stage = index.resolve(query)
+            samples.append(time.perf_counter() - start)
+        print(f"  {query:<40} {stage:<10} trung vị {statistics.median(samples) * 1e6:8.1f} µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[26, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
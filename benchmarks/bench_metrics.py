@@ -0,0 +1,90 @@
+"""
+Đo chi phí của việc đo đạc (actions/metrics.py) trên đường xử lý
+
+Mọi tình huống của bench_actions được gọi qua InstrumentedActionExecutor như một
+lượt webhook thật (qua worker pool), lần lượt khi bật và khi tắt đo đạc, xen kẽ
+nhiều vòng để giảm nhiễu. Kèm theo chi phí của một lần tăng bộ đếm, một lần ghi
+histogram và một lần xuất /metrics.
+
+Cách chạy:
+    python benchmarks/bench_metrics.py --rounds 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List, Text
+
+from bench_actions import SCENARIOS
+
+from actions.metrics import REGISTRY
+from actions.server import ACTION_CALLS, ACTION_SECONDS, InstrumentedActionExecutor
+
+
+def action_calls() -> List[Dict[Text, Any]]:
+    """Các lượt gọi webhook ứng với các tình huống của bench_actions"""
+    calls = []
+    for name, scenarios in SCENARIOS.items():
+        for slots, text in scenarios:
+            calls.append({
+                "next_action": name,
+                "sender_id": "benchmark",
+                "tracker": {"sender_id": "benchmark", "slots": dict(slots),
+                            "latest_message": {"text": text, "intent": {}, "entities": []},
+                            "events": [], "paused": False, "followup_action": None, "active_loop": {},
+                            "latest_action_name": None},
+                "domain": {},
+                "version": "3.0.0",
+            })
+    return calls
+
+
+async def run_round(executor: InstrumentedActionExecutor, calls: List[Dict[Text, Any]]) -> float:
+    """Thời gian trung bình (giây) của một lượt gọi"""
+    start = time.perf_counter()
+    for call in calls:
+        await executor.run(call)
+    return (time.perf_counter() - start) / len(calls)
+
+
+def per_call(func, repeat: int = 200000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    executor = InstrumentedActionExecutor()
+    executor.register_package("actions")
+    calls = action_calls()
+    await run_round(executor, calls)
+
+    results = {True: [], False: []}
+    for _ in range(args.rounds):
+        for enabled in (True, False):
+            REGISTRY.enabled = enabled
+            results[enabled].append(await run_round(executor, calls))
+    REGISTRY.enabled = True
+
+    on = statistics.median(results[True])
+    off = statistics.median(results[False])
+    print(f"{len(calls)} lượt gọi mỗi vòng, {args.rounds} vòng")
+    print(f"  tắt đo đạc: {off * 1e6:8.1f} µs/lượt")
+    print(f"  bật đo đạc: {on * 1e6:8.1f} µs/lượt ({(on - off) * 1e6:+.1f} µs, {(on / off - 1) * 100:+.1f}%)")
+
+    print(f"  tăng bộ đếm: {per_call(lambda: ACTION_CALLS.inc('a', 'ok')) * 1e9:6.0f} ns, "
+          f"ghi histogram: {per_call(lambda: ACTION_SECONDS.observe(0.003, 'a')) * 1e9:6.0f} ns")
+    start = time.perf_counter()
+    text = REGISTRY.render()
+    print(f"  xuất /metrics: {(time.perf_counter() - start) * 1000:.2f} ms ({len(text) / 1024:.1f} KB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
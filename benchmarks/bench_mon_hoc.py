@@ -0,0 +1,107 @@
+"""
+So sánh bộ trích xuất điểm theo môn (một lượt duyệt) với vòng lặp từ khóa + regex cũ
+
+Tin nhắn dài được tạo bằng cách chèn các đoạn nói chuyện ngẫu nhiên giữa các
+cặp môn - điểm, mô phỏng tin nhắn lộn xộn của người dùng thật.
+
+Cách chạy:
+    python benchmarks/bench_mon_hoc.py --lengths 0 200 1000
+"""
+import argparse
+import random
+import re
+import time
+
+import synthetic  # noqa: F401  (thêm thư mục gốc vào sys.path)
+
+from actions.mon_hoc import extract_subject_scores
+
+# Tin nhắn mẫu và kết quả đúng mong đợi
+MESSAGES = {
+    "Tôi được Toán 8, Lý 7.5, Hóa 8.5": {"toán": 8.0, "lý": 7.5, "hóa": 8.5},
+    "toan 9 ly 8 anh 7 van 6": {"toán": 9.0, "lý": 8.0, "anh": 7.0, "văn": 6.0},
+    "ngữ văn 8, lịch sử 7, địa lý 6.5 và tiếng anh 9 còn toán thì được 7.25 điểm":
+        {"văn": 8.0, "sử": 7.0, "địa": 6.5, "anh": 9.0, "toán": 7.25},
+    "em là học sinh lớp 12, 8 điểm toán 7 điểm văn với 9 điểm tiếng anh": {"toán": 8.0, "văn": 7.0, "anh": 9.0},
+    "toán, lý, hóa em được lần lượt 8, 7, 9": {"toán": 8.0, "lý": 7.0, "hóa": 9.0},
+    # Chữ số không phải số thập phân (số mũ, số trong vòng tròn) bị bỏ qua thay vì làm hỏng lượt gọi
+    "toán 8² lý 7 hóa 8": {"toán": 8.0, "lý": 7.0, "hóa": 8.0},
+    "toán 8 lý 7 hóa 9 ①": {"toán": 8.0, "lý": 7.0, "hóa": 9.0},
+    # Gõ VNI khi bộ gõ không bật: chữ số cuối từ là phím dấu, không phải điểm
+    "to1an 8 ly1 7 ho1a 9": {"toán": 8.0, "lý": 7.0, "hóa": 9.0},
+    "to1an 8 ly1 hoa 9": {"toán": 8.0, "hóa": 9.0},
+    "toan8 ly7 hoa9": {"toán": 8.0, "lý": 7.0, "hóa": 9.0},
+}
+
+FILLER = [
+    "dạ", "anh chị ơi", "cho em hỏi", "năm nay", "em đang phân vân", "ngành vận tải",
+    "thi thử lần 2", "hôm qua", "mẹ em bảo", "sinh viên năm nhất", "khối nào", "ở cơ sở 2",
+]
+
+def old_extract(message: str) -> dict:
+    """Cách làm cũ: bảng từ khóa khởi tạo lại ở mỗi lượt gọi, mỗi từ khóa một hoặc hai regex"""
+    mon_tu_dong = {
+        "toán": ["toán", "toan", "đại số", "dai so", "hình học", "hinh hoc", "math"],
+        "lý": ["lý", "ly", "vật lý", "vat ly", "physics"],
+        "hóa": ["hóa", "hoa", "hóa học", "hoa hoc", "chemistry"],
+        "sinh": ["sinh", "sinh học", "sinh hoc", "biology"],
+        "văn": ["văn", "van", "ngữ văn", "ngu van", "literature"],
+        "sử": ["sử", "su", "lịch sử", "lich su", "history"],
+        "địa": ["địa", "dia", "địa lý", "dia ly", "geography"],
+        "anh": ["anh", "tiếng anh", "tieng anh", "english"]
+    }
+    found_subjects = {}
+    for mon, keywords in mon_tu_dong.items():
+        for keyword in keywords:
+            if keyword in message:
+                diem_match = re.search(r'{}.*?(\d+(\.\d+)?)'.format(keyword), message)
+                if not diem_match:
+                    diem_match = re.search(r'(\d+(\.\d+)?).*?{}'.format(keyword), message)
+                if diem_match:
+                    found_subjects[mon] = float(diem_match.group(1))
+                    break
+    return found_subjects
+
+
+def messy(message: str, words: int, rng: random.Random) -> str:
+    """Chèn khoảng `words` từ nói chuyện vào giữa các phần của tin nhắn"""
+    parts = message.split(", ")
+    result = []
+    for part in parts:
+        result.append(part)
+        chen = []
+        while sum(len(f.split()) for f in chen) < words // max(1, len(parts)):
+            chen.append(rng.choice(FILLER))
+        result.append(" ".join(chen))
+    return ", ".join(p for p in result if p)
+
+
+def timeit(func, messages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            func(message)
+    return (time.perf_counter() - start) / (repeat * len(messages))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 50, 200, 1000],
+                        help="số từ nói chuyện chèn thêm vào mỗi tin nhắn")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for length in args.lengths:
+        samples = [(messy(m, length, rng).lower(), expected) for m, expected in MESSAGES.items()]
+        messages = [message for message, _ in samples]
+        old = timeit(old_extract, messages, args.repeat)
+        new = timeit(extract_subject_scores, messages, args.repeat)
+        old_ok = sum(old_extract(message) == expected for message, expected in samples)
+        new_ok = sum(extract_subject_scores(message) == expected for message, expected in samples)
+        print(f"+{length:>5} từ | vòng lặp cũ {old * 1e6:8.1f} µs, đúng {old_ok}/{len(samples)} | "
+              f"một lượt duyệt {new * 1e6:8.1f} µs, đúng {new_ok}/{len(samples)}")
+
+
+if __name__ == "__main__":
+    main()
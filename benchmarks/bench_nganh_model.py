@@ -0,0 +1,96 @@
+"""
+So sánh bộ nhớ và tốc độ tra điểm chuẩn giữa danh mục dạng dict (json.load)
+và bản ghi Nganh gọn với ma trận điểm chuẩn năm × ngành
+
+Cách chạy:
+    python benchmarks/bench_nganh_model.py --sizes 1000 10000 --years 20
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from synthetic import generate_catalog
+
+from actions.nganh_model import compact_nganh_list
+
+
+def measure(build) -> tuple:
+    """Bộ nhớ (byte) còn được giữ bởi kết quả của build()"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def old_nam_gan_nhat(nam_value, nam_list):
+    """Cách làm cũ: đổi toàn bộ năm sang số rồi sắp theo khoảng cách ở mỗi lượt"""
+    try:
+        target_year = int(nam_value)
+        closest_years = sorted([int(year) for year in nam_list], key=lambda x: abs(x - target_year))
+        if closest_years:
+            return str(closest_years[0])
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def timeit(func, items, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - start) / (repeat * len(items))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--years", type=int, default=20, help="số năm có điểm chuẩn")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        text = json.dumps(generate_catalog(size, years=args.years), ensure_ascii=False)
+
+        dicts, dict_bytes = measure(lambda: json.loads(text))
+        records, compact_bytes = measure(lambda: compact_nganh_list(json.loads(text)))
+        # Riêng phần điểm chuẩn: dict năm -> float của từng ngành so với ma trận dùng chung
+        _, dict_scores = measure(lambda: [json.loads(json.dumps(n["diem_chuan"])) for n in dicts])
+        matrix = records[0]._matrix
+        matrix_bytes = matrix.values.itemsize * len(matrix.values)
+        print(f"{size:>6} ngành × {args.years} năm | dict {dict_bytes / 2**20:7.2f} MB | "
+              f"Nganh {compact_bytes / 2**20:7.2f} MB ({compact_bytes / dict_bytes:.0%})")
+        print(f"       riêng điểm chuẩn: dict {dict_scores / 2**20:7.2f} MB | ma trận {matrix_bytes / 2**20:7.2f} MB")
+
+        rng = random.Random(0)
+        queries = [(rng.randrange(size), str(2024 - rng.randrange(args.years + 5))) for _ in range(1000)]
+        # Bỏ bớt một số năm để tìm năm gần nhất phải dò qua các năm thiếu
+        for vi_tri in range(0, size, 3):
+            for nam in list(dicts[vi_tri]["diem_chuan"])[::2]:
+                del dicts[vi_tri]["diem_chuan"][nam]
+        records = compact_nganh_list(dicts)
+
+        def dict_lookup(query):
+            nganh, nam = dicts[query[0]], query[1]
+            if nam in nganh["diem_chuan"] and nganh["diem_chuan"][nam] is not None:
+                return nganh["diem_chuan"][nam]
+            return old_nam_gan_nhat(nam, list(nganh["diem_chuan"].keys()))
+
+        def compact_lookup(query):
+            nganh, nam = records[query[0]], query[1]
+            diem = nganh.diem_chuan_nam(nam)
+            return diem if diem is not None else nganh.nam_gan_nhat(nam)
+
+        assert all(dict_lookup(q) == compact_lookup(q) for q in queries)
+        print(f"       tra năm/năm gần nhất: dict {timeit(dict_lookup, queries, args.repeat) * 1e6:6.2f} µs | "
+              f"Nganh {timeit(compact_lookup, queries, args.repeat) * 1e6:6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
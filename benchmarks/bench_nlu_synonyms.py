@@ -0,0 +1,142 @@
+"""
+Đo tỷ lệ giá trị ten_nganh phải qua bước so khớp mờ trước và sau khi có từ
+đồng nghĩa sinh từ danh mục (data/nlu_nganh.yml, actions/nlu_generator.py)
+
+Giá trị ten_nganh được lấy từ các story (data/stories.yml, tests/test_stories.yml)
+và các ví dụ có chú thích ten_nganh trong data/nlu.yml, cùng các cách người dùng
+thường gõ tên các ngành đó: viết thường, không dấu, thêm hoặc bỏ "ngành", viết
+tắt trong bảng viết tắt, gõ thiếu một chữ. Mỗi giá trị đi qua EntitySynonymMapper
+(tra từ đồng nghĩa theo chữ thường như Rasa) rồi được tìm ngành như action;
+kết quả gồm số giá trị theo bước cho kết quả, tỷ lệ rơi vào so khớp mờ hoặc
+không tìm thấy, số giá trị ra sai ngành và thời gian tìm ngành trung bình.
+
+Cách chạy:
+    python benchmarks/bench_nlu_synonyms.py
+"""
+import argparse
+import os
+import re
+import subprocess
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Text, Tuple
+
+import yaml
+from synthetic import ROOT_DIR, load_real_catalog
+
+from actions.match_index import NganhMatchIndex
+from actions.nganh_model import compact_nganh_list
+from actions.nlu_generator import render_nlu
+from actions.normalize import fold_diacritics, normalize_text
+from actions.viet_tat import VIET_TAT_MAPPING, expand_abbreviations
+
+_ENTITY = re.compile(r"\[([^\]]+)\]\(ten_nganh(?::[^)]+)?\)")
+
+
+def story_values() -> List[Text]:
+    """Các giá trị ten_nganh trong story huấn luyện và story kiểm thử"""
+    values = []
+    for path in (os.path.join(ROOT_DIR, "data", "stories.yml"), os.path.join(ROOT_DIR, "tests", "test_stories.yml")):
+        with open(path, 'r', encoding='utf-8') as file:
+            for story in (yaml.safe_load(file) or {}).get("stories") or []:
+                for step in story.get("steps") or []:
+                    for entity in step.get("entities") or []:
+                        if isinstance(entity, dict) and "ten_nganh" in entity:
+                            values.append(str(entity["ten_nganh"]))
+                    values.extend(_ENTITY.findall(step.get("user") or ""))
+    return values
+
+
+def nlu_values() -> List[Text]:
+    with open(os.path.join(ROOT_DIR, "data", "nlu.yml"), 'r', encoding='utf-8') as file:
+        return _ENTITY.findall(file.read())
+
+
+def variants(index: NganhMatchIndex) -> List[Tuple[Text, Optional[int]]]:
+    """Các cách gõ tên từng ngành cùng vị trí ngành đúng"""
+    cases = []
+    for pos, name in enumerate(index.names):
+        ten = name[len("ngành "):] if name.startswith("ngành ") else name
+        for form in dict.fromkeys((ten, f"ngành {ten}", fold_diacritics(ten), f"nganh {fold_diacritics(ten)}")):
+            cases.append((form, pos))
+        # Gõ thiếu một chữ ở giữa tên
+        middle = len(ten) // 2
+        cases.append((ten[:middle] + ten[middle + 1:], pos))
+    for viet_tat, ten_day_du in VIET_TAT_MAPPING.items():
+        pos = index.positions.get(ten_day_du)
+        if pos is None:
+            pos = index.positions.get(f"ngành {ten_day_du}")
+        for form in dict.fromkeys((viet_tat, fold_diacritics(viet_tat))):
+            cases.append((form, pos))
+    return cases
+
+
+def load_synonyms(texts: List[Text]) -> Dict[Text, Text]:
+    """Từ đồng nghĩa theo chữ thường, giống EntitySynonymMapper"""
+    synonyms = {}
+    for text in texts:
+        for block in (yaml.safe_load(text) or {}).get("nlu") or []:
+            if "synonym" in block:
+                for line in (block.get("examples") or "").splitlines():
+                    if line.strip().startswith("- "):
+                        synonyms[line.strip()[2:].strip().lower()] = str(block["synonym"])
+    return synonyms
+
+
+def resolve(index: NganhMatchIndex, value: Text) -> Tuple[Optional[int], Text]:
+    """Tìm ngành như resolve_nganh, không qua bộ đệm"""
+    query = normalize_text(value)
+    pos = index.exact(query)
+    if pos is not None:
+        return pos, "canonical"
+    nganh, stage = index.resolve(expand_abbreviations(query))
+    return (index.positions[nganh["ten_nganh"].lower()] if nganh is not None else None), stage
+
+
+def measure(label: Text, index: NganhMatchIndex, cases: List[Tuple[Text, Optional[int]]],
+            synonyms: Dict[Text, Text]) -> None:
+    stages = Counter()
+    wrong = 0
+    start = time.perf_counter()
+    for value, expected in cases:
+        pos, stage = resolve(index, synonyms.get(value.lower(), value))
+        stages[stage] += 1
+        if expected is not None and pos != expected:
+            wrong += 1
+    elapsed = time.perf_counter() - start
+    slow = stages["fuzzy"] + stages["none"]
+    print(f"  {label:<6} {len(synonyms):4} từ đồng nghĩa | dạng chuẩn {stages['canonical'] / len(cases):6.1%} | "
+          f"so khớp mờ/không thấy {slow:3} ({slow / len(cases):5.1%}) | sai ngành {wrong:3} | "
+          f"tb {elapsed / len(cases) * 1e6:6.1f} µs | "
+          + ", ".join(f"{stage} {count}" for stage, count in stages.most_common()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="HEAD~1", help="phiên bản git của data/nlu.yml dùng làm mốc trước")
+    args = parser.parse_args()
+
+    nganh_list = compact_nganh_list(load_real_catalog())
+    index = NganhMatchIndex(nganh_list)
+    before = subprocess.run(["git", "show", f"{args.base}:data/nlu.yml"], cwd=ROOT_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    with open(os.path.join(ROOT_DIR, "data", "nlu.yml"), 'r', encoding='utf-8') as file:
+        after = [file.read(), render_nlu(nganh_list)]
+
+    groups = [
+        ("story", [(value, None) for value in story_values()]),
+        ("nlu", [(value, None) for value in nlu_values()]),
+        ("cách gõ", variants(index)),
+    ]
+    # Lượt chạy đầu khởi tạo bộ đệm chuẩn hóa và n-gram, không tính vào thời gian
+    for _, cases in groups:
+        for value, _ in cases:
+            resolve(index, value)
+    for name, cases in groups:
+        print(f"{name}: {len(cases)} giá trị")
+        measure("trước", index, cases, load_synonyms([before]))
+        measure("sau", index, cases, load_synonyms(after))
+
+
+if __name__ == "__main__":
+    main()
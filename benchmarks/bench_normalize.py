@@ -0,0 +1,101 @@
+"""
+So sánh lớp chuẩn hóa tiếng Việt dùng chung (actions/normalize.py) với các đường regex cũ
+
+Bỏ dấu bằng bảng str.translate so với NFD + regex, lọc tên người bằng tập chữ
+cái so với biểu thức chính quy liệt kê ký tự mà ActionXuLyTen biên dịch lại mỗi
+lượt, và chuẩn hóa tin nhắn có ghi nhớ so với NFC + viết thường mỗi lần. Mỗi
+phép đo chạy trên chuỗi mới (chưa có trong bộ nhớ đệm) và trên chuỗi lặp lại
+như trong hội thoại thật.
+
+Cách chạy:
+    python benchmarks/bench_normalize.py --strings 20000
+"""
+import argparse
+import random
+import re
+import time
+import unicodedata
+
+from synthetic import load_real_catalog
+
+from actions.normalize import clean_name, fold_diacritics, normalize_text, repair_typing
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Huỳnh", "Hoàng", "Võ", "Đặng", "Bùi", "Đỗ", "Ngô", "Dương"]
+TEN = ["Văn Đức", "Thị Ánh", "Minh Tuấn", "Ngọc Ế", "Quốc Bảo", "Thùy Dương", "Hữu Nghĩa", "Khánh Linh"]
+CAU = [
+    "cho em hỏi điểm chuẩn ngành {} năm ngoái",
+    "ngành {} học những gì ạ",
+    "cơ hội việc làm của   ngành {} thế nào",
+    "em muốn tìm hiểu về {} ở cơ sở 2",
+]
+
+_OLD_COMBINING = re.compile("[̀-ͯ]")
+
+
+def old_fold(text: str) -> str:
+    if text.isascii():
+        return text
+    folded = _OLD_COMBINING.sub("", unicodedata.normalize("NFD", text))
+    return folded.replace("đ", "d").replace("Đ", "D")
+
+
+def old_process_name(name: str) -> str:
+    """ActionXuLyTen.process_name trước đây"""
+    name = re.sub(r'[^a-zA-ZÀÁÂÃÈÉÊÌÍÒÓÔÕÙÚĂĐĨŨƠàáâãèéêìíòóôõùúăđĩũơƯĂẠẢẤẦẨẪẬẮẰẲẴẶẸẺẼỀỀỂưăạảấầẩẫậắằẳẵặẹẻẽềềểỄỆỈỊỌỎỐỒỔỖỘỚỜỞỠỢỤỦỨỪễếệỉịọỏốồổỗộớờởỡợụủứừỬỮỰỲỴÝỶỸửữựỳỵỷỹ\s]', '', name)
+    name = re.sub(r'\s+', ' ', name).strip()
+    return name.title()
+
+
+def old_normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text.lower()).split())
+
+
+def timeit(func, strings) -> float:
+    start = time.perf_counter()
+    for text in strings:
+        func(text)
+    return (time.perf_counter() - start) / len(strings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strings", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=200, help="số chuỗi khác nhau trong lượt lặp lại")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ten_nganh = [nganh["ten_nganh"] for nganh in load_real_catalog()]
+    # Mỗi chuỗi kèm số thứ tự nên không chuỗi nào có sẵn trong bộ nhớ đệm
+    names = [f" {rng.choice(HO)}  {rng.choice(TEN)} {i}!" for i in range(args.strings)]
+    messages = [rng.choice(CAU).format(rng.choice(ten_nganh)) + f" {i}" for i in range(args.strings)]
+    repeated_names = [names[i % args.distinct] for i in range(args.strings)]
+    repeated_messages = [messages[i % args.distinct] for i in range(args.strings)]
+
+    mismatches = sum(old_fold(text) != fold_diacritics(text) for text in messages + names)
+    mismatches += sum(old_normalize(text) != normalize_text(text) for text in messages)
+    # Tên cũ có thể mất chữ Ế do biểu thức liệt kê thiếu ký tự; so trên các tên không có chữ này
+    mismatches += sum(old_process_name(name) != clean_name(name).title() for name in names if "Ế" not in name)
+    print(f"{args.strings} chuỗi, {args.distinct} chuỗi khác nhau khi lặp lại, {mismatches} kết quả khác cách cũ")
+
+    rows = [
+        ("bỏ dấu tin nhắn", old_fold, fold_diacritics, messages, messages),
+        ("chuẩn hóa tin nhắn", old_normalize, normalize_text, messages, repeated_messages),
+        ("lọc tên người", old_process_name, lambda name: clean_name(name).title(), names, repeated_names),
+    ]
+    for label, old, new, fresh, repeated in rows:
+        old_time = timeit(old, fresh)
+        new_fresh = timeit(new, fresh)
+        new_repeated = timeit(new, repeated)
+        print(f"  {label:<20} cũ {old_time * 1e6:6.2f} µs | mới {new_fresh * 1e6:6.2f} µs "
+              f"({old_time / new_fresh:4.1f} lần) | lặp lại {new_repeated * 1e6:6.2f} µs "
+              f"({old_time / new_repeated:4.1f} lần)")
+
+    vocabulary = {word for ten in ten_nganh for word in fold_diacritics(normalize_text(ten)).split()}
+    typed = ["coong ngheej thoong tin", "kyx thuaatj ddieenj", "ngoon nguwx anh", "to1an tin ho5c"]
+    per_call = timeit(lambda text: repair_typing(text, vocabulary), typed * (args.strings // len(typed)))
+    print(f"  {'sửa kiểu gõ Telex/VNI':<20} {per_call * 1e6:6.2f} µs/tin nhắn, ví dụ "
+          f"'{typed[0]}' -> '{repair_typing(typed[0], vocabulary)}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Đo chi phí của bộ đệm câu trả lời dựng sẵn theo kích thước danh mục: thời gian
+dựng toàn bộ, số câu trả lời, bộ nhớ, và thời gian phục vụ từ bộ đệm so với
+dựng lại mỗi lượt
+
+Cách chạy:
+    python benchmarks/bench_render_cache.py --sizes 0 1000 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import write_catalog
+
+from actions.catalog import NGANH_JSON_PATH, NganhCatalog
+from actions.render_cache import RENDERERS, ResponseCache, render_danh_sach_nganh
+
+
+def timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 10000],
+                        help="kích thước danh mục, 0 là nganh.json thật")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = write_catalog(size, os.path.join(tmp, f"{size}.json")) if size else NGANH_JSON_PATH
+            snapshot = NganhCatalog(path).snapshot
+            nganh_list = snapshot.nganh_list
+
+            cache = ResponseCache(snapshot)
+            start = time.perf_counter()
+            cache.warm()
+            warm = time.perf_counter() - start
+            stats = cache.stats()
+
+            nganh = nganh_list[len(nganh_list) // 2]
+            render_list = timeit(lambda: render_danh_sach_nganh(nganh_list), args.repeat)
+            cached_list = timeit(cache.danh_sach_nganh, args.repeat)
+            render_one = timeit(lambda: [render(nganh) for render in RENDERERS.values()], args.repeat)
+            cached_one = timeit(lambda: [cache.nganh(kind, nganh) for kind in RENDERERS], args.repeat)
+            print(f"{len(nganh_list):>6} ngành | dựng toàn bộ {warm * 1000:8.1f} ms | {stats['size']:>6} câu trả lời | "
+                  f"{stats['memory_bytes'] / 1024 / 1024:7.2f} MB")
+            print(f"       danh sách ngành: dựng {render_list * 1e6:9.1f} µs, từ bộ đệm {cached_list * 1e6:6.2f} µs | "
+                  f"một ngành (3 loại): dựng {render_one * 1e6:6.1f} µs, từ bộ đệm {cached_one * 1e6:6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
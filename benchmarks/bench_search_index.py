@@ -0,0 +1,91 @@
+"""
+Đo thời gian xây và tìm kiếm của chỉ mục toàn văn BM25 (actions/search_index.py)
+khi phần giới thiệu của mỗi ngành dài dần
+
+Phần giới thiệu của mỗi ngành thật được nối thêm các câu lấy ngẫu nhiên từ
+giới thiệu và cơ hội việc làm của mọi ngành cho đến khi đạt kích thước cần đo,
+rồi đo thời gian xây chỉ mục, độ trễ p50/p95 của một lượt tìm kiếm (gồm cả
+chọn và in đậm đoạn trích) và bộ nhớ chỉ mục chiếm.
+
+Cách chạy:
+    python benchmarks/bench_search_index.py --sizes-kb 1 50 200 500
+"""
+import argparse
+import copy
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List, Text
+
+from synthetic import load_real_catalog
+
+from actions.search_index import NganhSearchIndex, split_sentences
+
+QUERIES = [
+    "ngành nào làm việc ở cảng biển",
+    "học gì để làm logistics",
+    "muốn làm kỹ sư ô tô",
+    "lap trinh phan mem",
+    "thiết kế cầu đường",
+    "quản lý chuỗi cung ứng",
+    "làm việc trong ngân hàng",
+    "CNTT",
+]
+
+
+def inflate(nganh_list: List[Dict[Text, Any]], size_kb: float, seed: int) -> List[Dict[Text, Any]]:
+    """Nối thêm câu ngẫu nhiên vào phần giới thiệu cho đến khi mỗi ngành dài khoảng `size_kb` KB"""
+    rng = random.Random(seed)
+    pool = [cau for nganh in nganh_list for cau in split_sentences(nganh)]
+    result = copy.deepcopy(nganh_list)
+    for nganh in result:
+        parts = [nganh.get("gioi_thieu_chung") or ""]
+        length = len(parts[0].encode("utf-8"))
+        while length < size_kb * 1024:
+            cau = rng.choice(pool)
+            parts.append(cau if cau.endswith((".", "!", "?", ";")) else cau + ".")
+            length += len(parts[-1].encode("utf-8")) + 1
+        nganh["gioi_thieu_chung"] = " ".join(parts)
+    return result
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def bench(size_kb: float, repeat: int, seed: int) -> None:
+    nganh_list = inflate(load_real_catalog(), size_kb, seed)
+    total_mb = sum(len((nganh.get("gioi_thieu_chung") or "").encode("utf-8")) for nganh in nganh_list) / 2 ** 20
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = NganhSearchIndex(nganh_list)
+    build = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    index.search(QUERIES[0])
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - start)
+    print(f"{size_kb:6g} KB/ngành ({total_mb:6.1f} MB) | {len(index.postings):7} từ | "
+          f"xây {build:7.2f} s | chỉ mục {memory:7.1f} MB | "
+          f"tìm p50 {percentile(samples, 0.5) * 1000:6.2f} ms | p95 {percentile(samples, 0.95) * 1000:6.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-kb", type=float, nargs="+", default=[1, 50, 200, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for size_kb in args.sizes_kb:
+        bench(size_kb, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
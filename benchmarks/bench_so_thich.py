@@ -0,0 +1,72 @@
+"""
+So sánh bộ gợi ý theo sở thích (PhraseMatcher, biên dịch một lần) với vòng lặp
+`keyword in message` cũ khi số từ khóa sở thích tăng lên
+
+Cách chạy:
+    python benchmarks/bench_so_thich.py --keywords 100 500 1000
+"""
+import argparse
+import random
+import time
+
+from synthetic import load_real_catalog
+
+from actions.so_thich import SO_THICH_NGANH, InterestEngine
+
+MESSAGES = [
+    "em thích lập trình và máy tính",
+    "em thích ô tô, động cơ và cơ khí",
+    "em thích tiếng anh và kinh doanh",
+    "dạ em chưa biết thích gì, chắc là mấy cái liên quan đến điện tử với robot ạ",
+    "em thich cau duong, xay dung va giao thong",
+]
+
+
+def generate_mapping(count: int, nganh_list: list, seed: int = 0) -> dict:
+    """Bảng sở thích thật cộng thêm các từ khóa hai âm tiết ghép ngẫu nhiên từ tên ngành"""
+    rng = random.Random(seed)
+    am_tiet = sorted({tu for nganh in nganh_list for tu in nganh["ten_nganh"].lower().replace(",", "").split()})
+    ten_nganh = [nganh["ten_nganh"] for nganh in nganh_list]
+    mapping = dict(SO_THICH_NGANH)
+    while len(mapping) < count:
+        mapping.setdefault(f"{rng.choice(am_tiet)} {rng.choice(am_tiet)}", rng.sample(ten_nganh, 2))
+    return mapping
+
+
+def old_match(message: str, mapping: dict) -> list:
+    message = message.lower()
+    matched = []
+    for keyword, nganh_list in mapping.items():
+        if keyword in message:
+            matched.extend(nganh_list)
+    return list(dict.fromkeys(matched))[:5]
+
+
+def timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in MESSAGES:
+            func(message)
+    return (time.perf_counter() - start) / (repeat * len(MESSAGES))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keywords", type=int, nargs="+", default=[len(SO_THICH_NGANH), 100, 300, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    nganh_list = load_real_catalog()
+    for count in args.keywords:
+        mapping = generate_mapping(count, nganh_list)
+        start = time.perf_counter()
+        engine = InterestEngine(nganh_list, mapping)
+        build = time.perf_counter() - start
+        old = timeit(lambda m: old_match(m, mapping), args.repeat)
+        new = timeit(engine.match, args.repeat)
+        print(f"{len(mapping):>6} từ khóa | biên dịch {build * 1000:7.1f} ms | "
+              f"vòng lặp cũ {old * 1e6:8.1f} µs | PhraseMatcher {new * 1e6:7.1f} µs | nhanh hơn {old / new:5.1f} lần")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Đo độ trễ của một trường được hỏi nhiều (trường "nóng") khi action server phục
+vụ nhiều trường: chỉ một trường được đăng ký, so với nhiều trường được đăng ký
+cùng lưu lượng rải rác tới các trường khác làm danh mục liên tục được nạp và
+bỏ khỏi bộ nhớ. Chỉ các lượt hỏi của trường nóng được tính độ trễ.
+
+Benchmark cũng kiểm tra câu trả lời không lẫn giữa các trường, và đo bộ nhớ
+thực của một danh mục để so với ước tính dùng cho ngân sách bộ nhớ.
+
+Cách chạy:
+    python benchmarks/bench_tenants.py --tenants 200 --budget-mb 16
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Text
+
+from synthetic import write_catalog
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions as actions_module
+from actions.catalog import NGANH_JSON_PATH, NganhCatalog
+from actions.match_index import resolve_nganh
+from actions.render_cache import get_response_cache
+from actions.score_index import get_khoi_index, get_score_index
+from actions.tenants import TenantCatalogRegistry, estimate_catalog_bytes, set_tenant_registry
+
+HOT_TENANT = "uth"
+
+# Các lượt hỏi của trường nóng: (hành động, slots)
+HOT_REQUESTS = [
+    (actions_module.ActionTraLoiNganhTuyenSinh(), {}),
+    (actions_module.ActionTraLoiThongTinNganh(), {"ten_nganh": "cntt"}),
+    (actions_module.ActionTraLoiThongTinNganh(), {"ten_nganh": "kỹ thuât ô tô"}),
+    (actions_module.ActionTraLoiCoHoiViecLam(), {"ten_nganh": "logistics"}),
+    (actions_module.ActionTraLoiDiemChuanNganh(), {"ten_nganh": "Công nghệ thông tin", "nam": None}),
+    (actions_module.ActionTuVanNganhTheoDiem(), {"diem": 24.5, "khoi_xet_tuyen": "A00"}),
+]
+
+
+def make_tracker(tenant: Text, slots: Dict[Text, Any]) -> Tracker:
+    """Tracker giả lập với mã trường trong metadata của tin nhắn"""
+    latest_message = {"text": "", "intent": {}, "entities": [], "metadata": {"tenant_id": tenant}}
+    return Tracker(tenant, dict(slots), latest_message, [], False, None, None, None)
+
+
+def ask(tenant: Text, action, slots: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    dispatcher = CollectingDispatcher()
+    action.xu_ly(dispatcher, make_tracker(tenant, slots), {})
+    return dispatcher.messages
+
+
+def run(registry: TenantCatalogRegistry, cold_tenants: List[Text], rounds: int, cold_per_hot: int) -> List[float]:
+    """Độ trễ (giây) các lượt hỏi của trường nóng, xen giữa là lượt hỏi các trường khác (không tính giờ)"""
+    set_tenant_registry(registry)
+    rng = random.Random(0)
+    for action, slots in HOT_REQUESTS:
+        ask(HOT_TENANT, action, slots)
+    latencies = []
+    for _ in range(rounds):
+        for action, slots in HOT_REQUESTS:
+            for _ in range(cold_per_hot):
+                cold_action, cold_slots = rng.choice(HOT_REQUESTS)
+                ask(rng.choice(cold_tenants), cold_action, cold_slots)
+            start = time.perf_counter()
+            ask(HOT_TENANT, action, slots)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def catalog_memory(path: Text) -> tuple:
+    """Bộ nhớ thực (byte) của danh mục sau khi dựng đủ chỉ mục, và ước tính tương ứng"""
+    tracemalloc.start()
+    catalog = NganhCatalog(path, tenant="do")
+    nganh_list = catalog.nganh_list
+    get_score_index(nganh_list), get_khoi_index(nganh_list)
+    get_response_cache(nganh_list).warm()
+    resolve_nganh("cong nghe thong tin", nganh_list)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used, estimate_catalog_bytes(catalog)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=200)
+    parser.add_argument("--size", type=int, default=100, help="số ngành của mỗi trường khác")
+    parser.add_argument("--budget-mb", type=float, default=16, help="ngân sách bộ nhớ của các danh mục")
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--cold-per-hot", type=int, default=1, help="số lượt hỏi trường khác trước mỗi lượt của trường nóng")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for i in range(args.tenants - 1):
+            paths[f"truong-{i}"] = write_catalog(args.size, os.path.join(tmp, f"{i}.json"), seed=i)
+
+        used, estimate = catalog_memory(paths["truong-0"])
+        print(f"Bộ nhớ một danh mục {args.size} ngành: đo {used / 2**20:.2f} MB, ước tính {estimate / 2**20:.2f} MB")
+
+        # (nhãn, các trường khác, ngân sách bộ nhớ MB, số lượt hỏi trường khác trước mỗi lượt của trường nóng)
+        scenarios = [
+            ("1 trường", {}, args.budget_mb, 0),
+            (f"{args.tenants} trường, không hỏi trường khác", paths, args.budget_mb, 0),
+            (f"{args.tenants} trường, đủ bộ nhớ", paths, 1e6, args.cold_per_hot),
+            (f"{args.tenants} trường, ngân sách {args.budget_mb:g} MB", paths, args.budget_mb, args.cold_per_hot),
+        ]
+        for label, tenants, budget_mb, cold_per_hot in scenarios:
+            registry = TenantCatalogRegistry(memory_budget=budget_mb * 2**20)
+            registry.register(HOT_TENANT, NGANH_JSON_PATH, "Trường Đại học Giao thông Vận tải TP.HCM")
+            for index, (tenant, path) in enumerate(tenants.items()):
+                registry.register(tenant, path, f"Trường số {index}")
+            latencies = run(registry, list(tenants), args.rounds, cold_per_hot)
+            stats = registry.stats()
+            print(f"{label}:\n    p50 {percentile(latencies, 0.5) * 1e6:6.1f} µs | p99 "
+                  f"{percentile(latencies, 0.99) * 1e6:6.1f} µs | trung bình {statistics.mean(latencies) * 1e6:6.1f} µs | "
+                  f"đang nạp {stats['loaded']}/{stats['tenants']}, nạp {stats['loads']} lần, bỏ {stats['evictions']} lần, "
+                  f"ước tính {stats['memory_bytes'] / 2**20:.1f} MB")
+
+        # Cùng một câu hỏi ở hai trường phải trả lời bằng danh mục và tên trường của từng trường
+        hot = ask(HOT_TENANT, *HOT_REQUESTS[0])[0]["text"]
+        other = ask("truong-1", *HOT_REQUESTS[0])[0]["text"]
+        assert hot.startswith("Trường Đại học Giao thông Vận tải TP.HCM") and other.startswith("Trường số 1")
+        assert ask("khong-co", *HOT_REQUESTS[0])[0]["text"].startswith("Hiện tại tôi không thể")
+        print("Câu trả lời không lẫn giữa các trường")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+"""
+Phát tải lên action server bằng cách phát lại các story thành lượt gọi webhook
+
+Mỗi story trong data/stories.yml và tests/test_stories.yml trở thành một cuộc
+hội thoại: lời người dùng lấy từ ví dụ của intent trong data/nlu.yml (thay giá
+trị thực thể bằng giá trị trong story), slot được cập nhật từ thực thể và từ
+event action server trả về, tracker mang đủ lịch sử event và domain như Rasa
+gửi thật. Chỉ các hành động tùy chỉnh (action_*) được gọi qua webhook; các
+utter_* chỉ được ghi vào lịch sử. Không cần Rasa server, chỉ cần action server
+(có thể để công cụ tự chạy `python -m actions.server` bằng --start-server).
+
+Hai chế độ tải:
+    --concurrency N       N người dùng phát lại story liên tục (vòng kín)
+    --profile PHASES      hội thoại mới đến theo phân phối Poisson với tốc độ
+                          của từng pha, ví dụ "60s@2,30s@40,120s@15" (vòng hở);
+                          có sẵn các mẫu: steady, ket-qua (ngày công bố kết quả)
+
+Kết quả gồm thông lượng, độ trễ p50/p95/p99, tỉ lệ lỗi và tỉ lệ bị từ chối
+(worker pool đầy hoặc quá hạn) theo từng hành động và từng pha.
+
+Cách chạy:
+    ACTION_WORKERS=8 python benchmarks/load_replay.py --start-server --concurrency 32 --duration 30
+    python benchmarks/load_replay.py --url http://localhost:5055/webhook --profile ket-qua
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Text, Tuple
+from urllib.parse import urlsplit
+
+import yaml
+from synthetic import ROOT_DIR
+
+import rasa_sdk
+
+from actions.worker_pool import BUSY_MESSAGE, TIMEOUT_MESSAGE
+
+STORY_FILES = [os.path.join(ROOT_DIR, "data", "stories.yml"), os.path.join(ROOT_DIR, "tests", "test_stories.yml")]
+NLU_FILE = os.path.join(ROOT_DIR, "data", "nlu.yml")
+DOMAIN_FILE = os.path.join(ROOT_DIR, "domain.yml")
+
+# Các mẫu tải theo pha: (thời lượng giây, số hội thoại mới mỗi giây)
+PROFILES: Dict[Text, Text] = {
+    "steady": "60s@5",
+    # Ngày công bố điểm thi: tải thường, vọt lên khi công bố, giảm dần trong vài giờ (thu gọn thành phút)
+    "ket-qua": "30s@2,20s@40,60s@20,60s@8,30s@2",
+}
+
+# Nhãn thực thể trong ví dụ NLU: [giá trị](thực_thể) hoặc [giá trị]{"entity": "thực_thể", ...}
+ANNOTATION = re.compile(r"\[([^\]]+)\](?:\((\w+)(?::[^)]*)?\)|\{[^}]*\"entity\"\s*:\s*\"(\w+)\"[^}]*\})")
+
+
+class Turn(NamedTuple):
+    """Một lượt người dùng trong story cùng các hành động bot thực hiện sau đó"""
+    intent: Text
+    entities: Dict[Text, Any]
+    text: Optional[Text]
+    actions: List[Text]
+
+
+class Story(NamedTuple):
+    name: Text
+    turns: List[Turn]
+
+
+def load_stories(paths: List[Text]) -> List[Story]:
+    """Đọc các story có ít nhất một hành động tùy chỉnh"""
+    stories = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as file:
+            data = yaml.safe_load(file) or {}
+        for story in data.get("stories", []):
+            turns: List[Turn] = []
+            for step in story.get("steps", []):
+                if "intent" in step:
+                    entities = {}
+                    for entity in step.get("entities") or []:
+                        entities.update(entity if isinstance(entity, dict) else {entity: None})
+                    text = step.get("user")
+                    turns.append(Turn(step["intent"], entities, text.strip() if text else None, []))
+                elif "action" in step and turns:
+                    turns[-1].actions.append(step["action"])
+            if any(action.startswith("action_") for turn in turns for action in turn.actions):
+                stories.append(Story(story.get("story", path), turns))
+    return stories
+
+
+def load_examples(path: Text) -> Dict[Text, List[Text]]:
+    """Các ví dụ (còn nhãn thực thể) của từng intent"""
+    with open(path, 'r', encoding='utf-8') as file:
+        data = yaml.safe_load(file) or {}
+    examples: Dict[Text, List[Text]] = defaultdict(list)
+    for item in data.get("nlu", []):
+        if "intent" in item:
+            for line in (item.get("examples") or "").splitlines():
+                line = line.strip()
+                if line.startswith("- "):
+                    examples[item["intent"]].append(line[2:])
+    return examples
+
+
+def render_example(example: Text, entities: Dict[Text, Any]) -> Text:
+    """Bỏ nhãn thực thể khỏi ví dụ, thay giá trị bằng giá trị của story nếu có"""
+    def replace(match: "re.Match") -> Text:
+        entity = match.group(2) or match.group(3)
+        value = entities.get(entity)
+        return str(value) if value is not None else match.group(1)
+    return ANNOTATION.sub(replace, example)
+
+
+def choose_text(turn: Turn, examples: Dict[Text, List[Text]], rng: random.Random) -> Text:
+    """Lời người dùng của một lượt: ví dụ có nhiều loại thực thể trùng với story nhất"""
+    if turn.text:
+        return turn.text
+    candidates = examples.get(turn.intent)
+    if not candidates:
+        return " ".join(str(value) for value in turn.entities.values()) or turn.intent
+
+    def overlap(example: Text) -> int:
+        return len({m.group(2) or m.group(3) for m in ANNOTATION.finditer(example)} & set(turn.entities))
+    best = max(overlap(example) for example in candidates)
+    return render_example(rng.choice([e for e in candidates if overlap(e) == best]), turn.entities)
+
+
+class Conversation:
+    """Trạng thái tracker của một cuộc hội thoại đang được phát lại"""
+
+    _ids = itertools.count()
+
+    def __init__(self, domain: Dict[Text, Any], slot_entities: Dict[Text, Text], tenant: Optional[Text]):
+        self.sender_id = f"load-{os.getpid()}-{next(self._ids)}"
+        self.domain = domain
+        self.slot_entities = slot_entities
+        self.slots: Dict[Text, Any] = {slot: None for slot in domain.get("slots") or {}}
+        self.events: List[Dict[Text, Any]] = []
+        self.latest_message: Dict[Text, Any] = {}
+        self.latest_action: Optional[Text] = None
+        self.metadata = {"tenant_id": tenant} if tenant else {}
+        self.now = time.time()
+
+    def _event(self, event: Dict[Text, Any]) -> None:
+        self.now += 0.001
+        self.events.append({"timestamp": self.now, **event})
+
+    def user(self, turn: Turn, text: Text) -> None:
+        entities = [{"entity": entity, "value": value, "extractor": "load_replay"}
+                    for entity, value in turn.entities.items()]
+        self.latest_message = {"text": text, "intent": {"name": turn.intent, "confidence": 1.0},
+                               "entities": entities, "intent_ranking": [], "metadata": self.metadata}
+        self._event({"event": "user", "text": text, "parse_data": self.latest_message,
+                     "input_channel": "rest", "metadata": self.metadata})
+        for entity in entities:
+            slot = self.slot_entities.get(entity["entity"])
+            if slot:
+                self.set_slot(slot, entity["value"])
+
+    def set_slot(self, name: Text, value: Any) -> None:
+        self.slots[name] = value
+        self._event({"event": "slot", "name": name, "value": value})
+
+    def action(self, name: Text) -> None:
+        self.latest_action = name
+        self._event({"event": "action", "name": name})
+
+    def payload(self, action: Text) -> bytes:
+        """Thân lượt gọi webhook cho hành động `action`, như Rasa gửi"""
+        tracker = {
+            "sender_id": self.sender_id,
+            "slots": self.slots,
+            "latest_message": self.latest_message,
+            "latest_event_time": self.now,
+            "followup_action": None,
+            "paused": False,
+            "events": self.events,
+            "latest_input_channel": "rest",
+            "active_loop": {},
+            "latest_action": {"action_name": self.latest_action},
+            "latest_action_name": self.latest_action,
+        }
+        return json.dumps({"next_action": action, "sender_id": self.sender_id, "tracker": tracker,
+                           "domain": self.domain, "version": rasa_sdk.__version__},
+                          ensure_ascii=False).encode("utf-8")
+
+    def apply(self, response: Dict[Text, Any]) -> None:
+        """Cập nhật tracker theo event action server trả về"""
+        for event in response.get("events") or []:
+            if event.get("event") == "slot":
+                self.set_slot(event["name"], event.get("value"))
+            else:
+                self._event(event)
+
+
+class HttpConnection:
+    """Kết nối HTTP/1.1 keep-alive tối giản, đủ để gửi JSON tới action server"""
+
+    def __init__(self, host: Text, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def request(self, method: Text, path: Text, body: bytes = b"") -> Tuple[int, bytes]:
+        """
+        Gửi một request và đọc toàn bộ phản hồi
+
+        Kết nối keep-alive đã bị server đóng được mở lại và gửi lại một lần.
+
+        Returns:
+            tuple: (mã trạng thái, thân phản hồi)
+        """
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("ascii")
+        for attempt in (0, 1):
+            reused = self._writer is not None
+            if not reused:
+                await self._connect()
+            try:
+                self._writer.write(head + body)
+                await self._writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if not reused or attempt:
+                    raise
+        raise ConnectionError("Không gửi được request")
+
+    async def _read_response(self) -> Tuple[int, bytes]:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Server đã đóng kết nối")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                parts.append(chunk[:-2])
+            body = b"".join(parts)
+        else:
+            body = await self._reader.readexactly(int(headers.get("content-length", "0")))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, body
+
+
+class ConnectionPool:
+    """Tập kết nối dùng chung, tối đa `size` kết nối cùng lúc như client HTTP của Rasa"""
+
+    def __init__(self, host: Text, port: int, size: int):
+        self._idle: "asyncio.Queue[HttpConnection]" = asyncio.Queue()
+        for _ in range(size):
+            self._idle.put_nowait(HttpConnection(host, port))
+
+    async def request(self, method: Text, path: Text, body: bytes = b"") -> Tuple[int, bytes]:
+        connection = await self._idle.get()
+        try:
+            return await connection.request(method, path, body)
+        except Exception:
+            connection.close()
+            raise
+        finally:
+            self._idle.put_nowait(connection)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class Result(NamedTuple):
+    phase: int
+    action: Text
+    latency: float
+    outcome: Text
+
+
+class LoadRunner:
+    """Phát lại story lên action server và ghi lại kết quả từng lượt gọi"""
+
+    def __init__(self, url: Text, stories: List[Story], examples: Dict[Text, List[Text]],
+                 domain: Dict[Text, Any], connections: int, think_time: float, timeout: float,
+                 tenants: List[Text], seed: int):
+        parts = urlsplit(url)
+        self.path = parts.path or "/webhook"
+        self.pool = ConnectionPool(parts.hostname or "localhost", parts.port or 80, connections)
+        self.stories = stories
+        self.examples = examples
+        self.domain = domain
+        self.slot_entities = {
+            mapping["entity"]: slot
+            for slot, config in (domain.get("slots") or {}).items()
+            for mapping in config.get("mappings") or []
+            if mapping.get("type") == "from_entity" and mapping.get("entity")
+        }
+        self.think_time = think_time
+        self.timeout = timeout
+        self.tenants = tenants
+        self.rng = random.Random(seed)
+        self.results: List[Result] = []
+        self.phase = 0
+        self.dropped = 0
+        self.max_lag = 0.0
+
+    async def call(self, conversation: Conversation, action: Text) -> None:
+        body = conversation.payload(action)
+        start = time.perf_counter()
+        try:
+            status, raw = await asyncio.wait_for(self.pool.request("POST", self.path, body), self.timeout)
+        except asyncio.TimeoutError:
+            self.results.append(Result(self.phase, action, time.perf_counter() - start, "timeout"))
+            return
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            self.results.append(Result(self.phase, action, time.perf_counter() - start, "error"))
+            return
+        latency = time.perf_counter() - start
+
+        outcome = "ok" if status == 200 else "error"
+        if status == 200:
+            response = json.loads(raw)
+            texts = {message.get("text") for message in response.get("responses") or []}
+            if BUSY_MESSAGE in texts or TIMEOUT_MESSAGE in texts:
+                outcome = "busy"
+            conversation.apply(response)
+        self.results.append(Result(self.phase, action, latency, outcome))
+
+    async def conversation(self) -> None:
+        story = self.rng.choice(self.stories)
+        tenant = self.rng.choice(self.tenants) if self.tenants else None
+        conversation = Conversation(self.domain, self.slot_entities, tenant)
+        for turn in story.turns:
+            if self.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+            conversation.user(turn, choose_text(turn, self.examples, self.rng))
+            for action in turn.actions:
+                if action.startswith("action_"):
+                    await self.call(conversation, action)
+                conversation.action(action)
+
+    async def closed_loop(self, users: int, duration: float) -> None:
+        """`users` người dùng phát lại story liên tục trong `duration` giây"""
+        deadline = time.perf_counter() + duration
+
+        async def user() -> None:
+            while time.perf_counter() < deadline:
+                await self.conversation()
+        await asyncio.gather(*(user() for _ in range(users)))
+
+    async def open_loop(self, phases: List[Tuple[float, float]], max_conversations: int) -> None:
+        """Hội thoại mới đến theo phân phối Poisson với tốc độ của từng pha"""
+        active = set()
+        start = time.perf_counter()
+        scheduled = 0.0
+        for self.phase, (duration, rate) in enumerate(phases):
+            phase_end = scheduled + duration
+            while rate > 0:
+                scheduled += self.rng.expovariate(rate)
+                if scheduled >= phase_end:
+                    break
+                delay = start + scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    # Máy phát tải không theo kịp lịch thì độ trễ đo được thấp hơn thực tế
+                    self.max_lag = max(self.max_lag, -delay)
+                if len(active) >= max_conversations:
+                    self.dropped += 1
+                    continue
+                task = asyncio.ensure_future(self.conversation())
+                active.add(task)
+                task.add_done_callback(active.discard)
+            scheduled = phase_end
+            delay = start + scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if active:
+            await asyncio.gather(*active)
+
+
+def parse_profile(spec: Text) -> List[Tuple[float, float]]:
+    """Đọc mô tả pha dạng "60s@2,5m@10" thành [(thời lượng giây, tốc độ)]"""
+    phases = []
+    for part in PROFILES.get(spec, spec).split(","):
+        duration, _, rate = part.strip().partition("@")
+        scale = {"s": 1, "m": 60, "h": 3600}.get(duration[-1:], None)
+        seconds = float(duration[:-1]) * scale if scale else float(duration)
+        phases.append((seconds, float(rate)))
+    return phases
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(results: List[Result], elapsed: float) -> Dict[Text, Any]:
+    """Thông lượng, phân vị độ trễ (ms) và tỉ lệ lỗi của một nhóm kết quả"""
+    latencies = [result.latency for result in results if result.outcome in ("ok", "busy")]
+    count = len(results)
+    summary = {
+        "calls": count,
+        "throughput": count / elapsed if elapsed else 0.0,
+        "error_rate": sum(result.outcome in ("error", "timeout") for result in results) / count if count else 0.0,
+        "busy_rate": sum(result.outcome == "busy" for result in results) / count if count else 0.0,
+    }
+    if latencies:
+        summary.update({f"p{q}_ms": percentile(latencies, q) * 1000 for q in (50, 95, 99)})
+        summary["mean_ms"] = statistics.mean(latencies) * 1000
+    return summary
+
+
+def print_summary(label: Text, summary: Dict[Text, Any]) -> None:
+    latency = (f"p50 {summary['p50_ms']:7.1f} | p95 {summary['p95_ms']:7.1f} | p99 {summary['p99_ms']:7.1f} ms"
+               if "p50_ms" in summary else "chưa có lượt thành công")
+    print(f"{label:<40} {summary['calls']:>7} lượt {summary['throughput']:8.1f}/s | {latency} | "
+          f"lỗi {summary['error_rate']:6.2%} | từ chối {summary['busy_rate']:6.2%}")
+
+
+async def wait_for_server(url: Text, timeout: float) -> None:
+    parts = urlsplit(url)
+    connection = HttpConnection(parts.hostname or "localhost", parts.port or 80)
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            status, _ = await connection.request("GET", "/health")
+            if status == 200:
+                connection.close()
+                return
+        except OSError:
+            connection.close()
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"Action server tại {url} không sẵn sàng sau {timeout:.0f} giây")
+        await asyncio.sleep(0.5)
+
+
+async def main_async(args: argparse.Namespace) -> Dict[Text, Any]:
+    stories = load_stories(args.stories)
+    if not stories:
+        raise SystemExit("Không có story nào gọi hành động tùy chỉnh")
+    with open(DOMAIN_FILE, 'r', encoding='utf-8') as file:
+        domain = yaml.safe_load(file)
+    runner = LoadRunner(args.url, stories, load_examples(NLU_FILE), domain, args.connections,
+                        args.think_time, args.timeout, args.tenants, args.seed)
+    await wait_for_server(args.url, args.server_timeout)
+
+    phases = parse_profile(args.profile) if args.profile else [(args.duration, 0.0)]
+    start = time.perf_counter()
+    if args.profile:
+        await runner.open_loop(phases, args.max_conversations)
+    else:
+        await runner.closed_loop(args.concurrency, args.duration)
+    elapsed = time.perf_counter() - start
+    runner.pool.close()
+
+    mode = f"{args.concurrency} người dùng" if not args.profile else f"mẫu {args.profile}"
+    print(f"{len(stories)} story, {mode}, {elapsed:.1f} giây, {args.connections} kết nối")
+    by_action = defaultdict(list)
+    for result in runner.results:
+        by_action[result.action].append(result)
+    report = {"elapsed": elapsed, "total": summarize(runner.results, elapsed), "actions": {}, "phases": []}
+    for action in sorted(by_action):
+        report["actions"][action] = summarize(by_action[action], elapsed)
+        print_summary(action, report["actions"][action])
+    print_summary("tổng", report["total"])
+
+    if args.profile and len(phases) > 1:
+        for index, (duration, rate) in enumerate(phases):
+            summary = summarize([result for result in runner.results if result.phase == index], duration)
+            report["phases"].append({"duration": duration, "rate": rate, **summary})
+            print_summary(f"pha {index + 1}: {duration:g}s, {rate:g} hội thoại/s", summary)
+    if runner.dropped:
+        print(f"Bỏ {runner.dropped} hội thoại vì đã có {args.max_conversations} hội thoại đang chạy")
+    if runner.max_lag > 0.1:
+        print(f"Cảnh báo: máy phát tải chậm lịch tới {runner.max_lag:.2f} giây, độ trễ đo được thấp hơn thực tế")
+    report.update({"dropped": runner.dropped, "max_schedule_lag": runner.max_lag})
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5055/webhook")
+    parser.add_argument("--stories", nargs="+", default=STORY_FILES)
+    parser.add_argument("--concurrency", type=int, default=16, help="số người dùng của chế độ vòng kín")
+    parser.add_argument("--duration", type=float, default=30, help="thời lượng (giây) của chế độ vòng kín")
+    parser.add_argument("--profile", help=f"các pha của chế độ vòng hở, hoặc một trong: {', '.join(PROFILES)}")
+    parser.add_argument("--max-conversations", type=int, default=2000, help="số hội thoại chạy cùng lúc tối đa")
+    parser.add_argument("--connections", type=int, default=100, help="số kết nối HTTP tới action server")
+    parser.add_argument("--think-time", type=float, default=0.0, help="thời gian nghĩ trung bình (giây) giữa các lượt")
+    parser.add_argument("--timeout", type=float, default=30.0, help="thời gian chờ tối đa (giây) mỗi lượt gọi")
+    parser.add_argument("--tenants", nargs="*", default=[], help="mã trường gắn vào metadata, chọn ngẫu nhiên")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-server", action="store_true",
+                        help="tự chạy `python -m actions.server` trên cổng của --url (ACTION_WORKERS... lấy từ môi trường)")
+    parser.add_argument("--server-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        port = urlsplit(args.url).port or 5055
+        server = subprocess.Popen([sys.executable, "-m", "actions.server", "--port", str(port)], cwd=ROOT_DIR,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        report = asyncio.run(main_async(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
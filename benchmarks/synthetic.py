@@ -0,0 +1,74 @@
+"""
+Sinh danh mục ngành giả lập với kích thước tùy ý để đo hiệu năng
+"""
+import json
+import os
+import random
+import sys
+from typing import Any, Dict, List, Text
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from actions.catalog import NGANH_JSON_PATH  # noqa: E402
+
+CO_SO = ["Cơ sở Bình Thạnh", "Cơ sở Thủ Đức", "Cơ sở Quận 12", "Phân hiệu Vũng Tàu", "Phân hiệu Cần Thơ"]
+HE_DAO_TAO = ["đại trà", "chất lượng cao", "tiên tiến", "liên kết quốc tế", "tiếng Anh", "Việt - Nhật"]
+KHOI = ["A00", "A01", "B00", "C01", "D01", "D07", "D08"]
+
+
+def load_real_catalog() -> List[Dict[Text, Any]]:
+    """Đọc danh mục ngành thật trong actions/data/nganh.json"""
+    with open(NGANH_JSON_PATH, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def generate_catalog(size: int, years: int = 5, seed: int = 0) -> List[Dict[Text, Any]]:
+    """
+    Sinh danh mục gồm `size` chương trình đào tạo dựa trên các ngành thật
+
+    Mỗi chương trình là một biến thể (cơ sở, hệ đào tạo, chuyên ngành) của một
+    ngành thật, với điểm chuẩn ngẫu nhiên quanh điểm chuẩn gốc.
+
+    Args:
+        size (int): Số chương trình cần sinh
+        years (int): Số năm có điểm chuẩn
+        seed (int): Hạt giống ngẫu nhiên
+
+    Returns:
+        list: Danh sách ngành cùng cấu trúc với nganh.json
+    """
+    rng = random.Random(seed)
+    base = load_real_catalog()
+    nam_cuoi = 2024
+    nam_list = [str(nam) for nam in range(nam_cuoi - years + 1, nam_cuoi + 1)]
+    result = []
+    for i in range(size):
+        goc = base[i % len(base)]
+        bien_the = i // len(base)
+        if bien_the:
+            ten = (f"{goc['ten_nganh']} - {HE_DAO_TAO[bien_the % len(HE_DAO_TAO)]} "
+                   f"{CO_SO[(bien_the // len(HE_DAO_TAO)) % len(CO_SO)]} chuyên ngành {bien_the}")
+        else:
+            ten = goc["ten_nganh"]
+        diem_goc = next((d for d in reversed(list(goc["diem_chuan"].values())) if d is not None), 20.0)
+        result.append({
+            "ma_nganh": f"{goc['ma_nganh'].strip()}-{bien_the}",
+            "ten_nganh": ten,
+            "gioi_thieu_chung": goc["gioi_thieu_chung"],
+            "co_hoi_viec_lam": list(goc["co_hoi_viec_lam"]),
+            "khoi_xet_tuyen": sorted(set(goc["khoi_xet_tuyen"][:2] + rng.sample(KHOI, 2))),
+            "diem_chuan": {
+                nam: (None if rng.random() < 0.1 else round(diem_goc + rng.uniform(-4, 4), 2))
+                for nam in nam_list
+            },
+        })
+    return result
+
+
+def write_catalog(size: int, path: Text, years: int = 5, seed: int = 0) -> Text:
+    """Sinh danh mục và ghi ra file JSON, trả về đường dẫn file"""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(generate_catalog(size, years, seed), file, ensure_ascii=False)
+    return path